@@ -0,0 +1,96 @@
+"""
+Per-call latency of the mermaid-class MCP tools, native versus proxied.
+
+  core     process_folder_bulk called directly (lower bound)
+  http     POST to the FastAPI app through an in-process ASGI client
+  native   MCP tool call on fast_mcp_server's native server
+  proxy    MCP tool call on FastMCP.from_openapi forwarding to the FastAPI app
+
+Every path runs in one process, so "proxy" shows the serialise/validate
+overhead of the extra hop only; a real network hop between containers comes
+on top of it.
+
+    python bench/bench_mcp.py [--files 200] [--calls 200]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+import warnings
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "servers"))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "servers", "mermaid-class"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import generate_tree  # noqa: E402
+from run import latency_summary  # noqa: E402
+
+
+async def measure(call, arguments: list) -> dict:
+    samples = []
+    for args in arguments:
+        start = time.perf_counter()
+        await call(args)
+        samples.append(time.perf_counter() - start)
+    return latency_summary(samples)
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    import httpx
+    from fastmcp import Client, FastMCP
+
+    from core import process_folder_bulk, work_limiter
+    from core.processor import iter_cs_files
+    from fast_api_server.main import app
+    from fast_mcp_server.main import build_native_server
+
+    with tempfile.TemporaryDirectory() as folder:
+        root = os.path.join(folder, "src")
+        generate_tree(root, seed=args.seed, files=args.files)
+        paths = [full_path for full_path, _ in iter_cs_files(root)]
+        rng = random.Random(args.seed)
+        single = [{"path": rng.choice(paths)} for _ in range(args.calls)]
+        bulk = [{"folder_path": root, "max_files": 50}] * max(1, args.calls // 10)
+
+        http = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://mermaid-openapi")
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            proxy_server = FastMCP.from_openapi(openapi_spec=app.openapi(), client=http, name="proxy")
+
+        async with Client(build_native_server()) as native, Client(proxy_server) as proxy:
+            paths_by_name = {
+                "core": lambda a: work_limiter.run(
+                    process_folder_bulk,
+                    a.get("path") or a["folder_path"], a.get("max_files", 1), True, True,
+                ),
+                "http": lambda a: http.post("/class_diagram" if "path" in a else "/bulk_class_diagram", json=a),
+                "native": lambda a: native.call_tool("class_diagram" if "path" in a else "bulk_class_diagram", a),
+                "proxy": lambda a: proxy.call_tool(
+                    "class_diagram_class_diagram_post" if "path" in a else "bulk_class_diagram_bulk_class_diagram_post", a,
+                ),
+            }
+            # Warm the diagram cache so every path measures call overhead, not parsing.
+            for a in single + bulk:
+                await paths_by_name["core"](a)
+
+            print(f"{'path':<10}{'tool':<22}{'p50 ms':>10}{'p99 ms':>10}{'calls/s':>10}")
+            for name, call in paths_by_name.items():
+                for tool, arguments in (("class_diagram", single), ("bulk_class_diagram", bulk)):
+                    result = await measure(call, arguments)
+                    print(f"{name:<10}{tool:<22}{result['p50_ms']:>10.2f}{result['p99_ms']:>10.2f}{result['requests_per_s']:>10.0f}")
+        await http.aclose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Throughput of core.parser.scan_declarations against the original
+line-anchored regex parser on synthetic C# sources.
+
+    python bench/bench_parser.py [--files 300] [--repeat 3]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "servers"))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "servers", "mermaid-class"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import generate_corpus  # noqa: E402
+from core.parser import render_mermaid, scan_declarations  # noqa: E402
+from core.utils import _strip_comments, _strip_generics  # noqa: E402
+
+
+def legacy_generate(code: str, file_name: str) -> str:
+    """
+    The regex parser that scan_declarations replaced, kept here as the baseline.
+    """
+    mermaid = ["classDiagram", f"%% File: {file_name}"]
+    full_pattern = re.compile(
+        r'^\s*((?:\[[^\]]+\]\s*(?:\n\s*)?)*)'
+        r'(?:public|internal|private|protected|protected\s+internal|private\s+protected)?\s*'
+        r'(?:new\s+)?((?:abstract|sealed|partial|static|unsafe|readonly|ref|file)\s*)*'
+        r'(class|interface|struct|record)\s+'
+        r'(\w+(?:<[^>]+>)?)'
+        r'(?:\s*:\s*([^}{\n]+(?:\n\s*[^}{\n]+)*))?',
+        re.MULTILINE
+    )
+    attribute_pattern = re.compile(r"^\s*\[([^\]]+)\]\s*")
+    for m in full_pattern.finditer(code):
+        modifiers = _strip_comments(m.group(2)) or ""
+        class_name = _strip_generics(m.group(4))
+        bases = _strip_comments(m.group(5))
+        raw_attribs = _strip_comments(m.group(1))
+        mermaid.append(f"class {class_name}")
+        if "abstract" in modifiers:
+            mermaid.append(f"class {class_name} {{ <<abstract>> }}")
+        if bases:
+            for base in [b.strip() for b in bases.split(",")]:
+                if base and not base.startswith("{"):
+                    mermaid.append(f"{_strip_generics(base.split()[-1])} <|-- {class_name}")
+        for attr in attribute_pattern.findall(raw_attribs):
+            mermaid.append(f'  note for {class_name} "{attr}"')
+    return " \n ".join(mermaid)
+
+
+def scanner_generate(code: str, file_name: str) -> str:
+    return render_mermaid(scan_declarations(code), file_name)
+
+
+def measure(func, sources, repeat: int) -> float:
+    """
+    Best-of-repeat wall time in seconds for one pass over sources.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for i, code in enumerate(sources):
+            func(code, f"f{i}.cs")
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def pathological_source(comment_chars: int) -> str:
+    """
+    A base list followed by an unterminated block comment: the legacy
+    comment-stripping regex backtracks exponentially in comment_chars.
+    """
+    return f"public class Broken : Base\n/* {'a' * comment_chars}\n{{\n}}\n"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    corpora = {
+        "typical": generate_corpus(args.seed, args.files, attribute_density=0.1),
+        "attribute-heavy": generate_corpus(args.seed, args.files, attribute_density=0.9, members=24),
+    }
+
+    print(f"{'corpus':<18}{'MB':>8}{'legacy MB/s':>14}{'scanner MB/s':>14}{'speedup':>10}")
+    for name, sources in corpora.items():
+        megabytes = sum(len(s.encode("utf-8")) for s in sources) / 1e6
+        legacy = measure(legacy_generate, sources, args.repeat)
+        scanner = measure(scanner_generate, sources, args.repeat)
+        print(f"{name:<18}{megabytes:>8.2f}{megabytes / legacy:>14.2f}{megabytes / scanner:>14.2f}{legacy / scanner:>9.1f}x")
+
+    print()
+    print(f"{'unterminated comment':<24}{'legacy s':>12}{'scanner s':>12}")
+    for chars in (16, 20, 24):
+        source = pathological_source(chars)
+        legacy = measure(legacy_generate, [source], 1)
+        scanner = measure(scanner_generate, [source], 1)
+        print(f"{chars:>4} chars{'':<14}{legacy:>12.4f}{scanner:>12.6f}")
+
+
+if __name__ == "__main__":
+    main()
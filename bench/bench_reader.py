@@ -0,0 +1,99 @@
+"""
+Peak resident memory and wall time of core.parser.scan_file on one large
+generated C# file, compared with reading the whole file into a str first.
+
+Each mode runs in a fresh interpreter so ru_maxrss is not shared between them.
+
+    python bench/bench_reader.py [--megabytes 50]
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "servers"))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "servers", "mermaid-class"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import generate_source  # noqa: E402
+
+MODES = ("read", "stream", "head", "skip")
+
+
+def write_large_file(path: str, megabytes: int, seed: int) -> int:
+    rng = random.Random(seed)
+    target = megabytes * 1024 * 1024
+    written = 0
+    with open(path, "w", encoding="utf-8") as f:
+        while written < target:
+            chunk = generate_source(rng, types=8)
+            f.write(chunk)
+            written += len(chunk.encode("utf-8"))
+    return written
+
+
+def run_mode(mode: str, path: str) -> dict:
+    """
+    Runs in the child: scans path the way mode describes and reports the
+    growth of peak RSS over the interpreter's baseline.
+    """
+    from core.parser import scan_declarations
+    from core.reader import SourceBuffer
+
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    error = None
+    if mode == "read":
+        # What the parser did before core.reader existed.
+        with open(path, "r", encoding="utf-8") as f:
+            declarations = scan_declarations(f.read())
+    else:
+        try:
+            with SourceBuffer(path, max_bytes=8 * 1024 * 1024, policy=mode) as source:
+                declarations = scan_declarations(source.data, source.offset, source.end, source.release)
+        except ValueError as e:
+            declarations, error = [], str(e)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "mode": mode,
+        "seconds": elapsed,
+        "peak_rss_mb": (peak - baseline) / 1024,
+        "declarations": len(declarations),
+        "error": error,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--megabytes", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_mode(*args.child)))
+        return
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "Large.cs")
+        size = write_large_file(path, args.megabytes, args.seed)
+        print(f"{size / 1e6:.1f} MB file, policies applied above 8 MB")
+        print(f"{'mode':<10}{'seconds':>10}{'peak RSS MB':>14}{'types':>10}")
+        for mode in MODES:
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", mode, path],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            result = json.loads(output)
+            types = result["error"] and "skipped" or result["declarations"]
+            print(f"{mode:<10}{result['seconds']:>10.2f}{result['peak_rss_mb']:>14.1f}{types:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Per-file overhead of the mermaid-class parser on tiny files (one small type
+each, a few hundred bytes), which make up most of a typical Unity/.NET tree.
+
+Each stage adds one layer on top of the previous one:
+
+  scan          scan_declarations over bytes already in memory
+  parse_bytes   CSharpParser.parse_bytes (BOM sniffing + scan + render)
+  fresh         a new CSharpParser per file instead of a reused one
+  parse_file    CSharpParser.parse_file (open/read through SourceBuffer)
+  generate      generate_mermaid_from_csharp (thread-local parser lookup)
+
+    python bench/bench_tiny.py [--files 3000] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "servers"))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "servers", "mermaid-class"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import generate_source  # noqa: E402
+from core.parser import CSharpParser, generate_mermaid_from_csharp, scan_declarations  # noqa: E402
+
+
+def best_per_file(run, items: list, repeat: int) -> float:
+    """
+    Best of `repeat` passes over items, in microseconds per item.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            run(item)
+        best = min(best, time.perf_counter() - start)
+    return best / len(items) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=3000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    blobs = [generate_source(rng, types=1, members=2).encode("utf-8") for _ in range(args.files)]
+    reused = CSharpParser()
+
+    with tempfile.TemporaryDirectory() as folder:
+        paths = []
+        for i, data in enumerate(blobs):
+            path = os.path.join(folder, f"Tiny{i}.cs")
+            with open(path, "wb") as f:
+                f.write(data)
+            paths.append(path)
+
+        stages = [
+            ("scan", scan_declarations, blobs),
+            ("parse_bytes", lambda data: reused.parse_bytes(data, "Tiny.cs"), blobs),
+            ("fresh", lambda data: CSharpParser().parse_bytes(data, "Tiny.cs"), blobs),
+            ("parse_file", reused.parse_file, paths),
+            ("generate", generate_mermaid_from_csharp, paths),
+        ]
+        print(f"{args.files} files, {sum(map(len, blobs)) / len(blobs):.0f} bytes on average")
+        print(f"{'stage':<14}{'us/file':>10}{'files/s':>12}")
+        for name, run, items in stages:
+            per_file = best_per_file(run, items, args.repeat)
+            print(f"{name:<14}{per_file:>10.1f}{1e6 / per_file:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Synthetic C# source generator for the benchmarks in this directory.
+
+Output is deterministic for a given seed so runs can be compared.
+"""
+import os
+import random
+
+_MODIFIER_SETS = [
+    "public",
+    "public abstract",
+    "public sealed",
+    "internal",
+    "public static partial",
+    "public readonly",
+]
+_ATTRIBUTES = [
+    "Serializable",
+    "SerializeField",
+    'Header("Settings")',
+    'Tooltip("Speed in units per second")',
+    "Range(0, 10)",
+    'Obsolete("Use the new API")',
+    "RequireComponent(typeof(Rigidbody))",
+]
+_KINDS = ["class", "class", "class", "interface", "struct", "record"]
+
+
+def _type_name(rng: random.Random, i: int) -> str:
+    return f"{rng.choice(['Player', 'Enemy', 'State', 'Node', 'Item', 'Service'])}{i}"
+
+
+def generate_source(
+    rng: random.Random,
+    types: int = 4,
+    members: int = 8,
+    attribute_density: float = 0.3,
+    generic_ratio: float = 0.2,
+    comment_ratio: float = 0.2,
+) -> str:
+    """
+    Returns one C# compilation unit with `types` top-level declarations, each
+    holding `members` fields/methods. attribute_density is the chance that a
+    member or type carries 1-3 stacked attributes.
+    """
+    lines = ["using System;", "using System.Collections.Generic;", "", f"namespace Bench.N{rng.randint(0, 9)}", "{"]
+    for t in range(types):
+        name = _type_name(rng, rng.randint(0, 10_000))
+        kind = rng.choice(_KINDS)
+        modifiers = "public" if kind in ("interface", "record") else rng.choice(_MODIFIER_SETS)
+        if rng.random() < generic_ratio:
+            name += "<T>"
+        if rng.random() < comment_ratio:
+            lines.append(f"    /// <summary>Generated {kind} {t}</summary>")
+        if rng.random() < attribute_density:
+            for attr in rng.sample(_ATTRIBUTES, rng.randint(1, 3)):
+                lines.append(f"    [{attr}]")
+        bases = ""
+        if kind != "struct" and rng.random() < 0.6:
+            bases = f" : Base{rng.randint(0, 50)}"
+            if rng.random() < 0.4:
+                bases += f", IComparable<{name.split('<')[0]}>"
+        if kind == "record":
+            lines.append(f"    {modifiers} record {name}(int Id, string Label){bases};")
+            continue
+        where = " where T : class" if name.endswith("<T>") else ""
+        lines.append(f"    {modifiers} {kind} {name}{bases}{where}")
+        lines.append("    {")
+        for m in range(members):
+            if rng.random() < attribute_density:
+                for attr in rng.sample(_ATTRIBUTES, rng.randint(1, 3)):
+                    lines.append(f"        [{attr}]")
+            if rng.random() < comment_ratio:
+                lines.append(f"        // member {m}: keep in sync with the class docs")
+            if kind == "interface":
+                lines.append(f"        void Method{m}(int value);")
+            elif rng.random() < 0.5:
+                lines.append(f'        private string _field{m} = "value {m} {{ not a brace }}";')
+            else:
+                lines.append(f"        public int Method{m}(int value)")
+                lines.append("        {")
+                lines.append(f"            var total = value * {m};")
+                lines.append("            if (total > 10) { total -= 1; }")
+                lines.append("            return total;")
+                lines.append("        }")
+        lines.append("    }")
+        lines.append("")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def generate_corpus(seed: int = 0, files: int = 200, **options) -> list:
+    """
+    Returns a list of C# sources; options are passed to generate_source.
+    """
+    rng = random.Random(seed)
+    return [generate_source(rng, **options) for _ in range(files)]
+
+
+def generate_tree(
+    root: str,
+    seed: int = 0,
+    files: int = 200,
+    depth: int = 2,
+    fanout: int = 3,
+    noise_ratio: float = 0.2,
+    **options,
+) -> dict:
+    """
+    Writes a project-shaped tree of C# files under root: `files` sources
+    spread over `fanout` ** `depth` leaf folders, plus noise the services are
+    expected to skip for roughly noise_ratio of them (generated .g.cs files,
+    obj/ intermediates and binary bin/ outputs).
+
+    Returns a manifest with the counts and byte sizes of what was written.
+    """
+    rng = random.Random(seed)
+    folders = [""]
+    for level in range(depth):
+        folders = [os.path.join(folder, f"Module{level}_{i}") for folder in folders for i in range(fanout)]
+
+    manifest = {"root": root, "seed": seed, "sources": 0, "sources_bytes": 0, "noise": 0, "noise_bytes": 0}
+
+    def write(rel_path: str, data: bytes, noise: bool) -> None:
+        full_path = os.path.join(root, rel_path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "wb") as f:
+            f.write(data)
+        key = "noise" if noise else "sources"
+        manifest[key] += 1
+        manifest[key + "_bytes"] += len(data)
+
+    for i in range(files):
+        folder = folders[i % len(folders)]
+        write(os.path.join(folder, f"Type{i}.cs"), generate_source(rng, **options).encode("utf-8"), noise=False)
+        if rng.random() < noise_ratio:
+            kind = rng.choice(("generated", "obj", "bin"))
+            if kind == "generated":
+                write(os.path.join(folder, f"Type{i}.g.cs"), generate_source(rng, **options).encode("utf-8"), noise=True)
+            elif kind == "obj":
+                write(os.path.join(folder, "obj", "Debug", f"Type{i}.AssemblyInfo.cs"),
+                      generate_source(rng, types=1, members=2).encode("utf-8"), noise=True)
+            else:
+                write(os.path.join(folder, "bin", "Debug", f"Type{i}.dll"), rng.randbytes(4096), noise=True)
+    return manifest
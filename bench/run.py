@@ -0,0 +1,313 @@
+"""
+End-to-end benchmark of both services on a generated C# tree.
+
+Suites (each in a fresh interpreter, so peak RSS is per suite):
+  parser   files/s and MB/s of core.parser.scan_file and core.processor.render_files
+  mermaid  p50/p99 latency of the mermaid-class endpoints through an in-process ASGI client
+  grep     p50/p99 latency of /grep_request (native and egrep engines)
+
+    python bench/run.py [--files 500] [--output results.json] [--compare baseline.json]
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVERS_DIR = os.path.join(BENCH_DIR, "..", "servers")
+SERVICE_DIRS = {
+    "parser": os.path.join(SERVERS_DIR, "mermaid-class"),
+    "mermaid": os.path.join(SERVERS_DIR, "mermaid-class"),
+    "grep": os.path.join(SERVERS_DIR, "grep-search-container"),
+}
+SUITES = tuple(SERVICE_DIRS)
+
+sys.path.insert(0, BENCH_DIR)
+
+from corpus import generate_tree  # noqa: E402
+
+
+def percentile(samples: list, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def latency_summary(samples: list) -> dict:
+    """
+    Milliseconds; samples are seconds per request.
+    """
+    total = sum(samples)
+    return {
+        "requests": len(samples),
+        "p50_ms": percentile(samples, 0.50) * 1000,
+        "p99_ms": percentile(samples, 0.99) * 1000,
+        "mean_ms": total / len(samples) * 1000,
+        "requests_per_s": len(samples) / total if total else 0.0,
+    }
+
+
+def throughput(files: int, size: int, seconds: float) -> dict:
+    return {
+        "files": files,
+        "seconds": seconds,
+        "files_per_s": files / seconds if seconds else 0.0,
+        "mb_per_s": size / 1e6 / seconds if seconds else 0.0,
+    }
+
+
+async def time_requests(client, method: str, url: str, bodies: list, before=None) -> dict:
+    """
+    Sends each body in turn and summarises per-request latency.
+    before, if given, runs untimed ahead of every request (e.g. to clear a cache).
+    """
+    samples = []
+    statuses: dict = {}
+    for body in bodies:
+        if before is not None:
+            before()
+        start = time.perf_counter()
+        response = await client.request(method, url, json=body)
+        await response.aread()
+        samples.append(time.perf_counter() - start)
+        statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+    return {**latency_summary(samples), "status_codes": statuses}
+
+
+def run_parser(root: str, args: argparse.Namespace) -> dict:
+    from core import diagram_cache, render_files
+    from core.parser import scan_file
+    from core.processor import iter_cs_files
+
+    paths = [full_path for full_path, _ in iter_cs_files(root)]
+    size = sum(os.path.getsize(path) for path in paths)
+
+    best = float("inf")
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        for path in paths:
+            scan_file(path)
+        best = min(best, time.perf_counter() - start)
+    results = {"scan": throughput(len(paths), size, best)}
+
+    diagram_cache.clear()
+    start = time.perf_counter()
+    render_files(paths, include_interfaces=True, include_abstracts=True)
+    results["render_cold"] = throughput(len(paths), size, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    render_files(paths, include_interfaces=True, include_abstracts=True)
+    results["render_warm"] = throughput(len(paths), size, time.perf_counter() - start)
+    return results
+
+
+async def run_mermaid(root: str, args: argparse.Namespace) -> dict:
+    import httpx
+    from core import diagram_cache, get_type_index
+    from core.processor import iter_cs_files
+    from fast_api_server.main import app
+
+    rng = random.Random(args.seed)
+    paths = [full_path for full_path, _ in iter_cs_files(root)]
+    bulk = {"folder_path": root, "max_files": min(100, len(paths))}
+    results = {}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None) as client:
+        single = [{"path": rng.choice(paths)} for _ in range(args.requests)]
+        results["class_diagram_cold"] = await time_requests(client, "POST", "/class_diagram", single, before=diagram_cache.clear)
+        results["class_diagram_warm"] = await time_requests(client, "POST", "/class_diagram", single)
+
+        bulk_runs = [bulk] * max(1, args.requests // 10)
+        results["bulk_class_diagram_cold"] = await time_requests(client, "POST", "/bulk_class_diagram", bulk_runs, before=diagram_cache.clear)
+        results["bulk_class_diagram_warm"] = await time_requests(client, "POST", "/bulk_class_diagram", bulk_runs)
+        results["bulk_class_diagram_stream_warm"] = await time_requests(client, "POST", "/bulk_class_diagram_stream", bulk_runs)
+
+        await client.post("/type_diagram", json={"folder_path": root})  # builds the index
+        declared = sorted(get_type_index(root, refresh=False).all_types())
+        lookups = [{"folder_path": root, "type_name": rng.choice(declared)} for _ in range(args.requests)]
+        results["type_diagram"] = await time_requests(client, "POST", "/type_diagram", lookups)
+        namespaces = [{"folder_path": root, "namespace": f"Bench.N{rng.randint(0, 9)}"} for _ in range(max(1, args.requests // 10))]
+        results["type_diagram_namespace"] = await time_requests(client, "POST", "/type_diagram", namespaces)
+    return results
+
+
+async def run_grep(root: str, args: argparse.Namespace) -> dict:
+    import httpx
+    from core import get_trigram_index
+    from fast_api_server.main import app
+
+    rng = random.Random(args.seed)
+    deadline = time.monotonic() + 120
+    while get_trigram_index(root) is None and time.monotonic() < deadline:
+        await asyncio.sleep(0.1)
+
+    patterns = {
+        "literal": lambda: f"Method{rng.randint(0, 7)}\\(",
+        "rare": lambda: f"Base{rng.randint(0, 50)}\\b",
+        "regex": lambda: "class [A-Z][a-z]+[0-9]+",
+    }
+    results = {}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None) as client:
+        for engine in ("native", "egrep"):
+            for name, make in patterns.items():
+                bodies = [
+                    {"pattern": make(), "folder_path": root, "context_lines": 3, "engine": engine}
+                    for _ in range(args.requests)
+                ]
+                results[f"{engine}_{name}"] = await time_requests(client, "POST", "/grep_request", bodies)
+    return results
+
+
+def run_child(suite: str, root: str, args: argparse.Namespace) -> dict:
+    sys.path.insert(0, SERVERS_DIR)  # the shared package
+    sys.path.insert(0, SERVICE_DIRS[suite])
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if suite == "parser":
+        results = run_parser(root, args)
+    elif suite == "mermaid":
+        results = asyncio.run(run_mermaid(root, args))
+    else:
+        results = asyncio.run(run_grep(root, args))
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results["seconds"] = time.perf_counter() - start
+    results["peak_rss_mb"] = peak / 1024
+    results["peak_rss_growth_mb"] = (peak - baseline) / 1024
+    return results
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def flatten(results: dict, prefix: str = "") -> dict:
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(baseline: dict, current: dict) -> None:
+    """
+    Prints every metric present in both runs with its relative change.
+    """
+    old = flatten(baseline.get("suites", {}))
+    new = flatten(current.get("suites", {}))
+    print(f"\n{'metric':<60}{'baseline':>12}{'current':>12}{'change':>10}")
+    for name in sorted(old.keys() & new.keys()):
+        if old[name]:
+            change = f"{(new[name] - old[name]) / old[name] * 100:+.1f}%"
+        else:
+            change = "n/a"
+        print(f"{name:<60}{old[name]:>12.2f}{new[name]:>12.2f}{change:>10}")
+
+
+def print_summary(suites: dict) -> None:
+    for suite, results in suites.items():
+        print(f"\n[{suite}] peak RSS {results['peak_rss_mb']:.1f} MB, {results['seconds']:.1f}s")
+        for name, value in results.items():
+            if not isinstance(value, dict):
+                continue
+            if "files_per_s" in value:
+                print(f"  {name:<34}{value['files_per_s']:>10.1f} files/s{value['mb_per_s']:>10.2f} MB/s")
+            elif "p50_ms" in value:
+                print(f"  {name:<34}p50 {value['p50_ms']:>8.2f} ms   p99 {value['p99_ms']:>8.2f} ms   {value['status_codes']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=500)
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--fanout", type=int, default=3)
+    parser.add_argument("--noise", type=float, default=0.2, help="share of sources with .g.cs/obj/bin noise")
+    parser.add_argument("--types", type=int, default=4, help="type declarations per file")
+    parser.add_argument("--members", type=int, default=8)
+    parser.add_argument("--attribute-density", type=float, default=0.3)
+    parser.add_argument("--generic-ratio", type=float, default=0.2)
+    parser.add_argument("--requests", type=int, default=50, help="requests per endpoint measurement")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--suites", default=",".join(SUITES))
+    parser.add_argument("--tree", help="benchmark an existing tree instead of generating one")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--child", nargs=2, metavar=("SUITE", "ROOT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.child[0], args.child[1], args)))
+        return
+
+    suites = [suite.strip() for suite in args.suites.split(",") if suite.strip()]
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        parser.error(f"unknown suites: {', '.join(sorted(unknown))}")
+
+    with tempfile.TemporaryDirectory() as folder:
+        if args.tree:
+            root = os.path.abspath(args.tree)
+            manifest = {"root": root}
+        else:
+            root = os.path.join(folder, "src")
+            manifest = generate_tree(
+                root,
+                seed=args.seed,
+                files=args.files,
+                depth=args.depth,
+                fanout=args.fanout,
+                noise_ratio=args.noise,
+                types=args.types,
+                members=args.members,
+                attribute_density=args.attribute_density,
+                generic_ratio=args.generic_ratio,
+            )
+            print(f"Generated {manifest['sources']} sources ({manifest['sources_bytes'] / 1e6:.1f} MB) "
+                  f"and {manifest['noise']} noise files under {root}")
+
+        results = {}
+        for suite in suites:
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), *sys.argv[1:], "--child", suite, root],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            results[suite] = json.loads(output.strip().splitlines()[-1])
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("child", "output", "compare")},
+        },
+        "corpus": manifest,
+        "suites": results,
+    }
+    print_summary(results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
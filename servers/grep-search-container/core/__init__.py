@@ -0,0 +1,76 @@
+# core/__init__.py
+# Re-export the most-used symbols so consumers can do:
+#   from core import work_limiter, get_trigram_index, ...
+
+from .utils import logger
+from .models import (
+    GrepMatch,
+    GrepRequest,
+    GrepResponse,
+    LimiterStats,
+    ServiceStats,
+    StoreStats,
+    TrigramStats,
+)
+from .limiter import WorkLimiter, work_limiter
+from shared.compression import CompressionMiddleware
+from shared.store import ResultStore, result_store
+from shared.telemetry import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    InstrumentationMiddleware,
+    Registry,
+    metrics,
+)
+from .trigram import (
+    INDEX_ENABLED,
+    TrigramIndex,
+    egrep_only,
+    get_trigram_index,
+    literal_plan,
+    trigram_stats,
+    warm_trigram_index,
+)
+from .egrep import EgrepResult, egrep_search
+from .search import (
+    SearchResult,
+    compile_pattern,
+    format_match,
+    iter_search_files,
+    search,
+    search_folder,
+)
+
+__all__ = [
+    "logger",
+    "GrepMatch",
+    "GrepRequest",
+    "GrepResponse",
+    "LimiterStats",
+    "ServiceStats",
+    "StoreStats",
+    "TrigramStats",
+    "WorkLimiter",
+    "work_limiter",
+    "METRICS_CONTENT_TYPE",
+    "CompressionMiddleware",
+    "ResultStore",
+    "result_store",
+    "InstrumentationMiddleware",
+    "Registry",
+    "metrics",
+    "INDEX_ENABLED",
+    "TrigramIndex",
+    "egrep_only",
+    "get_trigram_index",
+    "literal_plan",
+    "trigram_stats",
+    "warm_trigram_index",
+    "EgrepResult",
+    "egrep_search",
+    "SearchResult",
+    "compile_pattern",
+    "format_match",
+    "iter_search_files",
+    "search",
+    "search_folder",
+]
@@ -0,0 +1,139 @@
+# core/egrep.py
+import asyncio
+import time
+from typing import List, NamedTuple
+
+from shared.telemetry import metrics
+
+from .limiter import work_limiter
+from .trigram import INDEX_ENABLED, get_trigram_index
+
+# Candidate files passed to a single egrep invocation
+GREP_BATCH_FILES = 512
+_READ_BYTES = 64 * 1024
+
+subprocess_seconds = metrics.histogram("grep_subprocess_duration_seconds", "Wall time of each egrep invocation.")
+
+
+class EgrepResult(NamedTuple):
+    content: List[str]  # egrep output, one chunk per match (with its context)
+    processed: int | None  # files handed to egrep; None for a recursive search of the folder
+    truncated: bool
+    total_scanned: int | None
+
+
+async def _read_chunks(stream: asyncio.StreamReader, separator: bytes, chunks: List[bytes], wanted: int) -> bool:
+    """
+    Appends the separator-delimited chunks of stream to chunks until it ends
+    or chunks holds wanted of them; True if it stopped before the end.
+    """
+    buffer = bytearray()
+    searched = 0  # buffer[:searched] holds no separator
+    while True:
+        block = await stream.read(_READ_BYTES)
+        if not block:
+            break
+        buffer += block
+        while True:
+            end = buffer.find(separator, searched)
+            if end < 0:
+                searched = max(0, len(buffer) - len(separator) + 1)
+                break
+            chunks.append(bytes(buffer[:end]))
+            del buffer[:end + len(separator)]
+            searched = 0
+            if len(chunks) >= wanted:
+                return True
+    if buffer.strip():
+        chunks.append(bytes(buffer))
+    return False
+
+
+async def egrep_search(
+    pattern: str,
+    folder: str,
+    context_lines: int = 10,
+    case_sensitive: bool = True,
+    max_matches: int = 200,
+    timeout: float = 45,
+) -> EgrepResult:
+    """
+    Runs the search through the egrep subprocess, narrowed to trigram-index
+    candidates once the index is built. This is the reference dialect:
+    POSIX classes and \\< \\> anchors work. Output is read as it arrives and
+    egrep is killed once max_matches chunks (plus one, to know whether the
+    result is truncated) have been read, so memory stays bounded.
+    Raises TimeoutError once timeout seconds have passed and RuntimeError
+    when egrep fails; no matches gives an empty result.
+    """
+    flags = ["-r", "-n"]
+    if not case_sensitive:
+        flags.append("-i")
+    if context_lines > 0:
+        flags.append("-C")
+        flags.append(str(context_lines))
+    # With context egrep separates groups by "--" lines; without, every line is a match.
+    separator = b"\n--\n" if context_lines > 0 else b"\n"
+    chunks: List[bytes] = []
+    returncode = 1
+    stderr = b""
+    stopped = False
+    processed = 0
+    targets = ["."]
+    deadline = asyncio.get_running_loop().time() + timeout
+    async with work_limiter.slot():
+        if INDEX_ENABLED:
+            index = await asyncio.to_thread(get_trigram_index, folder)
+            if index is not None:
+                candidates = await asyncio.to_thread(index.candidates, pattern, case_sensitive)
+                if candidates is not None:
+                    flags.append("-H")
+                    targets = ["./" + rel_path for rel_path in candidates]
+
+        for i in range(0, len(targets), GREP_BATCH_FILES):
+            batch = targets[i:i + GREP_BATCH_FILES]
+            cmd = ["egrep"] + flags + [pattern, "--"] + batch
+            started = time.perf_counter()
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                cwd=folder,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            errors = asyncio.ensure_future(proc.stderr.read())
+            found_before = len(chunks)
+            try:
+                stopped = await asyncio.wait_for(
+                    _read_chunks(proc.stdout, separator, chunks, max_matches + 1),
+                    timeout=max(0.0, deadline - asyncio.get_running_loop().time()),
+                )
+            except asyncio.TimeoutError:
+                proc.kill()
+                await proc.wait()
+                errors.cancel()
+                subprocess_seconds.observe(time.perf_counter() - started)
+                raise TimeoutError(f"egrep exceeded {timeout}s")
+            if stopped:
+                proc.kill()
+            await proc.wait()
+            stderr = await errors
+            subprocess_seconds.observe(time.perf_counter() - started)
+            processed += len(batch)
+            if stopped or len(chunks) > found_before:
+                returncode = 0
+            elif proc.returncode != 1:
+                returncode = proc.returncode
+                break
+            if stopped:
+                break
+
+    if returncode > 1:
+        raise RuntimeError(f"grep error ({returncode}):\n{stderr.decode('utf-8', errors='replace').strip()}")
+    results = [chunk.decode("utf-8", errors="replace").strip() for chunk in chunks]
+    recursive = targets == ["."]
+    return EgrepResult(
+        content=results[:max_matches],
+        processed=None if recursive else processed,
+        truncated=len(results) > max_matches,
+        total_scanned=None if recursive else len(targets),
+    )
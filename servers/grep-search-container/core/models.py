@@ -0,0 +1,65 @@
+from pydantic import BaseModel, Field
+from typing import List, Literal
+
+class GrepMatch(BaseModel):
+    """ A single matching line with its surrounding context """
+    file: str = Field(..., description="Path of the file relative to the searched folder")
+    line: int = Field(..., description="1-based line number of the match")
+    column: int = Field(..., description="1-based column where the match starts")
+    text: str = Field(..., description="The matching line")
+    before: List[str] = Field(default_factory=list, description="Context lines preceding the match")
+    after: List[str] = Field(default_factory=list, description="Context lines following the match")
+
+class GrepResponse(BaseModel):
+    """ Format of a search response """
+    content: List[str] = Field(..., description="List of processed matches of pattern in codebase")
+    matches: List[GrepMatch] = Field(default_factory=list, description="Structured match records (native engine only)")
+    processed: int | None = Field(..., description="Number of files processed (null when egrep searched the folder recursively)")
+    truncated: bool = Field(False, description="True if stopped early due to max_matches or max_files")
+    total_scanned: int | None = Field(0, description="Total files eligible for the search before limits (null when egrep searched the folder recursively)")
+
+class GrepRequest(BaseModel):
+    """ Format of a search request """
+    pattern: str = Field(..., description="Search term")
+    folder_path: str | None = Field("/workspace/src", description="Path to folder containing .cs files")
+    context_lines: int | None = Field(10, ge=1, le=1000)
+    case_sensitive: bool | None = True
+    max_matches: int | None = Field(200, ge=1, le=10000, description="Stop after this many matching lines")
+    max_files: int | None = Field(100, ge=1, le=100000, description="Stop after this many files with matches")
+    engine: Literal["native", "egrep"] | None = Field("native", description="Built-in parallel scanner, or the egrep subprocess (always used for POSIX classes and \\< \\> anchors)")
+
+class LimiterStats(BaseModel):
+    """ Load on the bounded pool of concurrent searches """
+    max_concurrency: int = Field(..., description="Searches allowed to run at once")
+    in_flight: int = Field(0, description="Searches currently running")
+    queue_depth: int = Field(0, description="Requests waiting for a free slot")
+    peak_queue_depth: int = Field(0, description="Highest queue depth observed")
+    completed: int = Field(0, description="Searches finished since startup")
+
+class TrigramStats(BaseModel):
+    """ State of the trigram index for one search root """
+    root: str = Field(..., description="Indexed folder")
+    ready: bool = Field(False, description="False while the first build is running")
+    files: int = Field(0, description="Files tracked under the root")
+    unindexed: int = Field(0, description="Binary, oversized or unreadable files that are always scanned")
+    trigrams: int = Field(0, description="Distinct trigrams in the index")
+    accelerated: int = Field(0, description="Searches narrowed to candidate files")
+    full_scans: int = Field(0, description="Searches whose pattern could not be narrowed")
+
+class StoreStats(BaseModel):
+    """ Counters of the shared result store (SQLite, WAL mode) for this process """
+    path: str = Field(..., description="Database file shared by workers and containers")
+    entries: int = Field(..., description="Results currently stored (all processes)")
+    bytes: int = Field(..., description="Compressed size of the stored results")
+    max_bytes: int = Field(..., description="Size above which least recently used results are evicted")
+    hits: int = Field(0, description="Reads answered from the store by this process")
+    misses: int = Field(0, description="Reads that found nothing (or only an expired result)")
+    writes: int = Field(0, description="Results written by this process")
+    evictions: int = Field(0, description="Results evicted by this process")
+    errors: int = Field(0, description="Reads or writes that failed (e.g. database busy)")
+
+class ServiceStats(BaseModel):
+    """ Runtime counters of the search service """
+    limiter: LimiterStats
+    indexes: List[TrigramStats] = Field(default_factory=list)
+    store: StoreStats | None = Field(None, description="Absent when RESULT_STORE_PATH is unset")
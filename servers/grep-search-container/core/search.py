@@ -0,0 +1,353 @@
+# core/search.py
+import hashlib
+import json
+import mmap
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, Iterable, Iterator, List, NamedTuple
+
+from shared.store import result_store
+
+from .models import GrepMatch
+from .trigram import INDEX_ENABLED, SKIP_DIRS, egrep_only, get_trigram_index
+from .utils import logger
+
+SEARCH_WORKERS = int(os.environ.get("GREP_WORKERS", str(min(32, (os.cpu_count() or 1) * 4))))
+# Seconds a search result in the shared store (see core/store.py) may be
+# reused by any worker; 0 turns result sharing off.
+RESULT_TTL = float(os.environ.get("GREP_RESULT_TTL", "30"))
+_BINARY_SNIFF = 8192
+
+_pool: ThreadPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=SEARCH_WORKERS, thread_name_prefix="grep-scan")
+        return _pool
+
+
+class SearchResult(NamedTuple):
+    matches: List[GrepMatch]
+    processed: int
+    truncated: bool
+    total_scanned: int
+
+
+def compile_pattern(pattern: str, case_sensitive: bool = True) -> "re.Pattern[bytes]":
+    """
+    Compiles an extended regex for byte-wise, line-anchored matching.
+    Raises ValueError for patterns Python cannot compile, or would match
+    differently from egrep (see core.trigram.egrep_only).
+    """
+    if egrep_only(pattern):
+        raise ValueError(f"Pattern '{pattern}' uses egrep-only syntax (POSIX classes, \\< \\> anchors); use the egrep engine")
+    flags = re.MULTILINE
+    if not case_sensitive:
+        flags |= re.IGNORECASE
+    try:
+        return re.compile(pattern.encode("utf-8"), flags)
+    except re.error as exc:
+        raise ValueError(f"Invalid pattern '{pattern}': {exc}")
+
+
+def iter_search_files(root: str) -> Iterator[str]:
+    """
+    Relative paths of files under root in sorted walk order, pruning SKIP_DIRS.
+    """
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS)
+        rel_dir = os.path.relpath(dirpath, root)
+        for filename in sorted(filenames):
+            yield filename if rel_dir == "." else os.path.join(rel_dir, filename)
+
+
+def _lines_before(data, line_start: int, count: int) -> List[bytes]:
+    lines = []
+    end = line_start - 1
+    while count and end >= 0:
+        start = data.rfind(b"\n", 0, end) + 1
+        lines.append(data[start:end])
+        end = start - 1
+        count -= 1
+    lines.reverse()
+    return lines
+
+
+def _lines_after(data, line_end: int, count: int) -> List[bytes]:
+    lines = []
+    start = line_end + 1
+    size = len(data)
+    while count and start < size:
+        end = data.find(b"\n", start)
+        if end < 0:
+            end = size
+        lines.append(data[start:end])
+        start = end + 1
+        count -= 1
+    return lines
+
+
+def _decode(line: bytes) -> str:
+    return line.rstrip(b"\r").decode("utf-8", errors="replace")
+
+
+def scan_file(
+    full_path: str,
+    rel_path: str,
+    regex: "re.Pattern[bytes]",
+    context_lines: int,
+    limit: int,
+    stop: threading.Event,
+) -> List[GrepMatch] | None:
+    """
+    Matching lines of one file (at most limit), or None if the file is
+    binary, empty or unreadable. The file is memory-mapped, not read, and
+    like egrep a match never spans lines.
+    """
+    try:
+        with open(full_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return None
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        if data.find(b"\0", 0, _BINARY_SNIFF) >= 0:
+            return None
+        matches: List[GrepMatch] = []
+        line_no = 1
+        counted_to = 0
+        pos = 0
+        size = len(data)
+        while pos <= size and len(matches) < limit and not stop.is_set():
+            m = regex.search(data, pos)
+            if m is None:
+                break
+            line_start = data.rfind(b"\n", 0, m.start()) + 1
+            line_end = data.find(b"\n", m.start())
+            if line_end < 0:
+                line_end = size
+            if m.end() > line_end:
+                # \s, \W or [^...] ran past the newline: look again within
+                # this line only, then carry on from the next one.
+                m = regex.search(data, line_start, line_end)
+                if m is None:
+                    pos = line_end + 1
+                    continue
+            line_no += data[counted_to:line_start].count(b"\n")
+            counted_to = line_start
+            matches.append(GrepMatch(
+                file=rel_path,
+                line=line_no,
+                column=m.start() - line_start + 1,
+                text=_decode(data[line_start:line_end]),
+                before=[_decode(line) for line in _lines_before(data, line_start, context_lines)],
+                after=[_decode(line) for line in _lines_after(data, line_end, context_lines)],
+            ))
+            pos = line_end + 1
+        return matches
+    finally:
+        data.close()
+
+
+def search(
+    pattern: str,
+    root: str,
+    context_lines: int = 10,
+    case_sensitive: bool = True,
+    max_matches: int = 200,
+    max_files: int = 100,
+    candidates: Iterable[str] | None = None,
+    on_file: Callable[[str, List[GrepMatch]], None] | None = None,
+    timeout: float | None = None,
+) -> SearchResult:
+    """
+    Scans files under root on the shared thread pool, keeping results in
+    sorted path order, and stops submitting work as soon as max_matches lines
+    or max_files files with matches have been collected.
+
+    candidates, if given, restricts the scan (e.g. to trigram-index hits).
+    on_file is called with each file's matches as they are accepted.
+    Raises TimeoutError once timeout seconds have passed.
+    """
+    regex = compile_pattern(pattern, case_sensitive)
+    if candidates is None:
+        paths = list(iter_search_files(root))
+    else:
+        paths = [p for p in candidates if not SKIP_DIRS.intersection(p.split(os.sep)[:-1])]
+
+    stop = threading.Event()
+    pool = _get_pool()
+    window: deque = deque()
+    queued = iter(paths)
+    matches: List[GrepMatch] = []
+    processed = 0
+    files_matched = 0
+    truncated = False
+    deadline = None if timeout is None else time.monotonic() + timeout
+
+    def submit_next(limit: int) -> bool:
+        rel_path = next(queued, None)
+        if rel_path is None:
+            return False
+        window.append(pool.submit(
+            scan_file, os.path.join(root, rel_path), rel_path, regex, context_lines, limit, stop,
+        ))
+        return True
+
+    def next_result() -> List[GrepMatch] | None:
+        remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            return window.popleft().result(timeout=remaining)
+        except FutureTimeoutError:
+            raise TimeoutError(f"Search exceeded {timeout}s")
+
+    def further_match() -> bool:
+        """
+        True if any file not yet accepted has a match; what is left is
+        scanned for one hit per file. A timeout counts as a possible match.
+        """
+        while window or submit_next(1):
+            try:
+                if next_result():
+                    return True
+            except TimeoutError:
+                return True
+            submit_next(1)
+        return False
+
+    # One hit past max_matches tells whether the file that fills the quota has more.
+    for _ in range(SEARCH_WORKERS * 2):
+        if not submit_next(max_matches + 1):
+            break
+
+    try:
+        while window:
+            found = next_result()
+            if found is not None:
+                processed += 1
+            if found:
+                accepted = found[:max_matches - len(matches)]
+                matches.extend(accepted)
+                files_matched += 1
+                if on_file is not None:
+                    on_file(accepted[0].file, accepted)
+                if len(matches) >= max_matches or files_matched >= max_files:
+                    truncated = len(accepted) < len(found) or further_match()
+                    break
+            submit_next(max_matches + 1)
+    finally:
+        stop.set()
+        for future in window:
+            future.cancel()
+
+    logger.info(f"Searched {processed}/{len(paths)} files under {root}: {len(matches)} matches")
+    return SearchResult(matches=matches, processed=processed, truncated=truncated, total_scanned=len(paths))
+
+
+def search_folder(
+    pattern: str,
+    folder: str,
+    context_lines: int = 10,
+    case_sensitive: bool = True,
+    max_matches: int = 200,
+    max_files: int = 100,
+    on_file: Callable[[str, List[GrepMatch]], None] | None = None,
+    timeout: float | None = None,
+    use_index: bool = INDEX_ENABLED,
+) -> SearchResult:
+    """
+    search over folder, narrowed to trigram-index candidates once the index
+    for folder is built (a full scan until then, or with use_index=False).
+    With a shared result store, an identical search run by any worker in the
+    last GREP_RESULT_TTL seconds is answered from the store instead.
+    """
+    key = None
+    if result_store is not None and RESULT_TTL > 0:
+        key = _result_key(pattern, folder, context_lines, case_sensitive, max_matches, max_files)
+        cached = _load_result(key)
+        if cached is not None:
+            if on_file is not None:
+                _replay(cached.matches, on_file)
+            return cached
+
+    candidates = None
+    if use_index:
+        index = get_trigram_index(folder)
+        if index is not None:
+            candidates = index.candidates(pattern, case_sensitive)
+    result = search(
+        pattern,
+        folder,
+        context_lines=context_lines,
+        case_sensitive=case_sensitive,
+        max_matches=max_matches,
+        max_files=max_files,
+        candidates=candidates,
+        on_file=on_file,
+        timeout=timeout,
+    )
+    if key is not None:
+        _save_result(key, result)
+    return result
+
+
+def _result_key(pattern: str, folder: str, *options) -> str:
+    raw = json.dumps([pattern, os.path.realpath(folder), *options])
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _load_result(key: str) -> SearchResult | None:
+    data = result_store.get("grep", key, max_age=RESULT_TTL)
+    if data is None:
+        return None
+    try:
+        record = json.loads(data)
+        return SearchResult(
+            matches=[GrepMatch(**match) for match in record["matches"]],
+            processed=record["processed"],
+            truncated=record["truncated"],
+            total_scanned=record["total_scanned"],
+        )
+    except (ValueError, KeyError, TypeError) as exc:
+        logger.warning(f"Ignoring unreadable stored search result: {exc}")
+        return None
+
+
+def _save_result(key: str, result: SearchResult) -> None:
+    record = {
+        "matches": [match.model_dump() for match in result.matches],
+        "processed": result.processed,
+        "truncated": result.truncated,
+        "total_scanned": result.total_scanned,
+    }
+    result_store.put("grep", key, json.dumps(record, separators=(",", ":")).encode("utf-8"))
+
+
+def _replay(matches: List[GrepMatch], on_file: Callable[[str, List[GrepMatch]], None]) -> None:
+    # Matches are stored in the order files were accepted, so runs share a file.
+    start = 0
+    for i in range(1, len(matches) + 1):
+        if i == len(matches) or matches[i].file != matches[start].file:
+            on_file(matches[start].file, matches[start:i])
+            start = i
+
+
+def format_match(match: GrepMatch) -> str:
+    """
+    grep -n -C style rendering: context lines use '-', the match uses ':'.
+    """
+    first = match.line - len(match.before)
+    lines = [f"./{match.file}-{first + i}-{text}" for i, text in enumerate(match.before)]
+    lines.append(f"./{match.file}:{match.line}:{match.text}")
+    lines.extend(f"./{match.file}-{match.line + 1 + i}-{text}" for i, text in enumerate(match.after))
+    return "\n".join(lines)
@@ -0,0 +1,336 @@
+# core/trigram.py
+import os
+import threading
+import time
+from array import array
+from typing import Dict, List, Set, Tuple
+
+try:
+    from re import _parser as sre_parse, _constants as sre_constants
+except ImportError:  # Python < 3.11
+    import sre_parse
+    import sre_constants
+
+from .utils import logger
+
+Trigram = int  # the three bytes packed big-endian into one int
+
+# Narrow each search to the files the trigram index says can match
+INDEX_ENABLED = os.environ.get("GREP_INDEX", "1").lower() in ("1", "true", "yes")
+INDEX_MAX_BYTES = int(os.environ.get("GREP_INDEX_MAX_BYTES", str(4 * 1024 * 1024)))
+# Searches never wait for the stat walk. An index whose last completed walk
+# began less than this long ago narrows searches; an older one starts a
+# background refresh and searches scan every file until it is done.
+INDEX_REFRESH_SECONDS = float(os.environ.get("GREP_INDEX_REFRESH_SECONDS", "5"))
+# Directories neither indexed nor searched (see core/search.py)
+SKIP_DIRS = frozenset(
+    name.strip()
+    for name in os.environ.get("GREP_SKIP_DIRS", "obj,bin,.git,node_modules,Library,Temp").split(",")
+    if name.strip()
+)
+_BINARY_SNIFF = 8192
+
+_REPEATS = {sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT}
+if hasattr(sre_constants, "POSSESSIVE_REPEAT"):
+    _REPEATS.add(sre_constants.POSSESSIVE_REPEAT)
+
+# GNU grep escapes with no Python equivalent, and POSIX bracket classes that
+# Python would misread as literals: never try to accelerate these.
+_UNSUPPORTED = ("\\<", "\\>", "\\`", "\\'", "[:", "[=", "[.")
+
+
+def egrep_only(pattern: str) -> bool:
+    """
+    True if pattern uses egrep syntax that Python's re reads differently
+    (POSIX bracket classes, GNU word and buffer anchors).
+    """
+    return any(token in pattern for token in _UNSUPPORTED)
+
+
+def _trigrams(data: bytes) -> Set[Trigram]:
+    """
+    Lower-cased byte trigrams of data. grep matches within lines, so duplicate
+    lines contribute nothing new and are dropped before extraction.
+    """
+    unique = b"\n".join(set(data.lower().split(b"\n")))
+    return {a << 16 | b << 8 | c for a, b, c in set(zip(unique, unique[1:], unique[2:]))}
+
+
+def _required_runs(sequence, case_sensitive: bool) -> List[bytes]:
+    """
+    Literal byte strings that every match of sequence must contain.
+    """
+    runs: List[bytes] = []
+    current: List[str] = []
+
+    def flush():
+        if current:
+            runs.append("".join(current).encode("utf-8"))
+            current.clear()
+
+    for op, av in sequence:
+        if op is sre_constants.LITERAL and (case_sensitive or av < 128):
+            current.append(chr(av))
+            continue
+        flush()
+        if op is sre_constants.SUBPATTERN:
+            runs.extend(_required_runs(av[-1], case_sensitive))
+        elif op in _REPEATS and av[0] >= 1:
+            runs.extend(_required_runs(av[2], case_sensitive))
+    flush()
+    return runs
+
+
+def literal_plan(pattern: str, case_sensitive: bool = True) -> List[List[bytes]] | None:
+    """
+    Query plan for an extended regex: a list of alternatives, each a list of
+    literals (length >= 3) that a matching line must contain. None means the
+    pattern cannot be narrowed and every file has to be scanned.
+    """
+    if egrep_only(pattern):
+        return None
+    try:
+        parsed = sre_parse.parse(pattern)
+    except Exception:
+        return None
+
+    sequence = list(parsed)
+    while len(sequence) == 1 and sequence[0][0] is sre_constants.SUBPATTERN:
+        sequence = list(sequence[0][1][-1])
+    if len(sequence) == 1 and sequence[0][0] is sre_constants.BRANCH:
+        alternatives = sequence[0][1][1]
+    else:
+        alternatives = [sequence]
+
+    plan = []
+    for alternative in alternatives:
+        literals = [run for run in _required_runs(alternative, case_sensitive) if len(run) >= 3]
+        if not literals:
+            return None
+        plan.append(literals)
+    return plan
+
+
+class TrigramIndex:
+    """
+    Inverted index from lower-cased byte trigrams to the files under root that
+    contain them. Binary, oversized and unreadable files are not indexed and
+    are always returned as candidates, so narrowing never hides a match.
+
+    File ids only grow, so each posting list is an array('I') kept sorted by
+    appending: 4 bytes per entry, where a set of ints costs over 30.
+    """
+
+    def __init__(self, root: str):
+        self.root = os.path.realpath(root)
+        self.ready = False
+        self.accelerated = 0
+        self.full_scans = 0
+        self._files: Dict[str, Tuple[int, int, int]] = {}  # rel -> (mtime_ns, size, file id)
+        self._paths: Dict[int, str] = {}  # live file id -> rel
+        self._unindexed: Set[str] = set()
+        self._postings: Dict[Trigram, array] = {}
+        self._next_id = 0
+        self._dead = 0
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()  # one stat walk at a time
+        self._refreshed = 0.0  # time.monotonic() when the last walk started
+        self._fresh_since = 0.0  # ... and when the last completed walk started
+
+    def refresh(self) -> dict:
+        """
+        Stats every file under root outside SKIP_DIRS and re-reads the ones
+        that changed. Waits for a refresh already in progress.
+        """
+        with self._refresh_lock:
+            return self._refresh()
+
+    def refresh_soon(self) -> None:
+        """
+        Starts a background refresh unless one is running or the last one
+        started less than INDEX_REFRESH_SECONDS ago.
+        """
+        if time.monotonic() - self._refreshed < INDEX_REFRESH_SECONDS:
+            return
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+
+        def run() -> None:
+            try:
+                self._refresh()
+            finally:
+                self._refresh_lock.release()
+
+        threading.Thread(target=run, name="grep-trigram-refresh", daemon=True).start()
+
+    def fresh(self) -> bool:
+        """
+        True if the last completed walk started less than INDEX_REFRESH_SECONDS ago.
+        """
+        return time.monotonic() - self._fresh_since < INDEX_REFRESH_SECONDS
+
+    def _refresh(self) -> dict:
+        walk_started = self._refreshed = time.monotonic()
+        started = time.perf_counter()
+        seen: Set[str] = set()
+        updated = 0
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+            for filename in filenames:
+                full_path = os.path.join(dirpath, filename)
+                rel_path = os.path.relpath(full_path, self.root)
+                seen.add(rel_path)
+                try:
+                    stat = os.stat(full_path)
+                except OSError:
+                    continue
+                entry = self._files.get(rel_path)
+                if entry is not None and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+                    continue
+                self._index_file(full_path, rel_path, stat)
+                updated += 1
+
+        with self._lock:
+            removed = [rel_path for rel_path in self._files if rel_path not in seen]
+            for rel_path in removed:
+                self._forget(rel_path)
+            if self._dead > max(1024, len(self._paths)):
+                self._compact()
+            self.ready = True
+            self._fresh_since = walk_started
+
+        if updated or removed:
+            logger.info(
+                f"Trigram index {self.root}: {updated} updated, {len(removed)} removed "
+                f"in {time.perf_counter() - started:.2f}s"
+            )
+        return {"updated": updated, "removed": len(removed)}
+
+    def _index_file(self, full_path: str, rel_path: str, stat: os.stat_result) -> None:
+        trigrams = None
+        if stat.st_size <= INDEX_MAX_BYTES:
+            try:
+                with open(full_path, "rb") as f:
+                    data = f.read()
+                if b"\0" not in data[:_BINARY_SNIFF]:
+                    trigrams = _trigrams(data)
+            except OSError:
+                trigrams = None
+
+        with self._lock:
+            self._forget(rel_path)
+            file_id = self._next_id
+            self._next_id += 1
+            self._files[rel_path] = (stat.st_mtime_ns, stat.st_size, file_id)
+            if trigrams is None:
+                self._unindexed.add(rel_path)
+                return
+            self._paths[file_id] = rel_path
+            for trigram in trigrams:
+                posting = self._postings.get(trigram)
+                if posting is None:
+                    self._postings[trigram] = array("I", (file_id,))
+                else:
+                    posting.append(file_id)
+
+    def _forget(self, rel_path: str) -> None:
+        entry = self._files.pop(rel_path, None)
+        if entry is None:
+            return
+        self._unindexed.discard(rel_path)
+        if self._paths.pop(entry[2], None) is not None:
+            self._dead += 1
+
+    def _compact(self) -> None:
+        """
+        Drops ids of replaced or deleted files from every posting list.
+        """
+        live = self._paths.keys()
+        for trigram in list(self._postings):
+            posting = array("I", (i for i in self._postings[trigram] if i in live))
+            if posting:
+                self._postings[trigram] = posting
+            else:
+                del self._postings[trigram]
+        self._dead = 0
+
+    def candidates(self, pattern: str, case_sensitive: bool = True) -> List[str] | None:
+        """
+        Sorted relative paths that may contain a match, or None when the
+        pattern has no usable literals and a full scan is required.
+        """
+        plan = literal_plan(pattern, case_sensitive)
+        if plan is None:
+            self.full_scans += 1
+            return None
+
+        with self._lock:
+            matched: Set[int] = set()
+            for literals in plan:
+                trigrams = sorted(
+                    {t for literal in literals for t in _trigrams(literal)},
+                    key=lambda t: len(self._postings.get(t, ())),
+                )
+                ids: Set[int] | None = None
+                for trigram in trigrams:
+                    posting = self._postings.get(trigram)
+                    if not posting:
+                        ids = set()
+                        break
+                    ids = set(posting) if ids is None else ids.intersection(posting)
+                    if not ids:
+                        break
+                matched |= ids or set()
+            paths = {self._paths[i] for i in matched if i in self._paths}
+            paths |= self._unindexed
+        self.accelerated += 1
+        return sorted(paths)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "root": self.root,
+                "ready": self.ready,
+                "files": len(self._files),
+                "unindexed": len(self._unindexed),
+                "trigrams": len(self._postings),
+                "accelerated": self.accelerated,
+                "full_scans": self.full_scans,
+            }
+
+
+_indexes: Dict[str, TrigramIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_trigram_index(folder: str) -> TrigramIndex | None:
+    """
+    Returns the index for folder, or None (callers fall back to a full
+    scan) while its first build runs or while it is older than
+    INDEX_REFRESH_SECONDS. A stale index is refreshed in the background,
+    never on the request path, and never narrows a search meanwhile.
+    """
+    root = os.path.realpath(folder)
+    with _indexes_lock:
+        index = _indexes.get(root)
+        if index is None:
+            index = _indexes[root] = TrigramIndex(root)
+            threading.Thread(target=index.refresh, name="grep-trigram-build", daemon=True).start()
+            return None
+    if not index.ready:
+        return None
+    index.refresh_soon()
+    return index if index.fresh() else None
+
+
+def warm_trigram_index(folder: str) -> None:
+    """
+    Starts building the index for folder without waiting for it.
+    """
+    get_trigram_index(folder)
+
+
+def trigram_stats() -> List[dict]:
+    with _indexes_lock:
+        indexes = list(_indexes.values())
+    return [index.stats() for index in indexes]
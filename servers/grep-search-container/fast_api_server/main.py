@@ -10,21 +10,51 @@ version: 0.0.2
 licence: MIT
 """
 import os
-import subprocess
-from pydantic import BaseModel, Field
-from typing import Annotated, List
 from fastapi import FastAPI, Body, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.requests import Request
-from starlette.responses import StreamingResponse
+from starlette.responses import PlainTextResponse
 import logging
+from contextlib import asynccontextmanager
+
+from core import (
+    INDEX_ENABLED,
+    METRICS_CONTENT_TYPE,
+    GrepRequest,
+    GrepResponse,
+    CompressionMiddleware,
+    InstrumentationMiddleware,
+    ServiceStats,
+    egrep_only,
+    egrep_search,
+    format_match,
+    metrics,
+    result_store,
+    search_folder,
+    trigram_stats,
+    warm_trigram_index,
+    work_limiter,
+)
 
 logger = logging.getLogger("uvicorn")
 
+GREP_TIMEOUT = 45
+
+search_seconds = metrics.histogram("grep_search_duration_seconds", "Time spent searching, by engine.", ("engine",))
+files_scanned = metrics.counter("grep_files_scanned_total", "Files read by the native engine.")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if INDEX_ENABLED:
+        for root in os.environ.get("GREP_INDEX_ROOTS", "").split(","):
+            if root.strip() and os.path.isdir(root.strip()):
+                warm_trigram_index(root.strip())
+    yield
+
 app = FastAPI(
     title="Grep Search API",
     version="1.0.0",
     description="Searches for a regular expression (grep) pattern within a codebase; taking lines of context and case sensitivity as params.",
+    lifespan=lifespan,
 )
 app.add_middleware(
     CORSMiddleware,
@@ -33,39 +63,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    body = await request.body()
-    logger.info(f"→ {request.method} {request.url}")
-    logger.info(f"Headers: {dict(request.headers)}")
-    logger.info(f"Body: {body.decode('utf-8', errors='replace') or ''}")
-    print("log request called")
-    response = await call_next(request)
-
-    async def stream():
-        async for chunk in response.body_iterator:
-            yield chunk
-        logger.info(f"← {response.status_code}")
-
-    return StreamingResponse(
-        stream(),
-        status_code=response.status_code,
-        headers=response.headers,
-        media_type=response.media_type,
-    )
-class GrepResponse(BaseModel):
-    """ Format of a search response """
-    content: List[str] = Field(..., description="List of processed matches of pattern in codebase")
-    processed: int = Field(..., description="Number of files processed")
-    truncated: bool = Field(False, description="True if stopped early due to max_files")
-    total_scanned: int = Field(0, description="Total .cs files found before limit")
-
-class GrepRequest(BaseModel):
-    """ Format of a search request """
-    pattern: str = Field(..., description="Search term")
-    folder_path: str | None = Field("/workspace/src", description="Path to folder containing .cs files")
-    context_lines: int | None = Field(10, ge=1, le=1000)
-    case_sensitive: bool | None = True
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(InstrumentationMiddleware, logger=logger)
 
 @app.post("/grep_request", response_model=GrepResponse, summary="Perform a grep search")
 async def grep_request(data: GrepRequest = Body(...)):
@@ -77,53 +76,89 @@ async def grep_request(data: GrepRequest = Body(...)):
     Use higher number of context lines in attempts to increase contextual knowledge.
     """
     folder = data.folder_path or "./"
-    context = data.context_lines
-    flags = ["-r", "-n"]
     pattern = "".join(ch for ch in data.pattern if ch.isprintable())
-
-    if not data.case_sensitive:
-        flags.append("-i")
-    if data.context_lines > 0:
-        flags.append("-C")
-        flags.append(str(context))
-    results = []
-    logger.info(f"Calling grep_request with pattern: {pattern} in folder {folder}")
+    logger.info(f"Calling grep_request with pattern: {pattern} in folder {folder} ({data.engine})")
     # Ensure we search inside the correct folder
     if not os.path.isdir(folder):
         raise HTTPException(status_code=500, detail=f"Error: Directory not found: {folder}")
 
-    try:
-        cmd = ["egrep"] + flags + [pattern, "--", "."]
-        result = subprocess.run(
-            cmd, cwd=folder, capture_output=True, text=True, timeout=45
-        )
-        if result.returncode == 0 and result.stdout.strip():
-            entirety = result.stdout.strip()
-            for match in entirety.rsplit("--"):
-                results.append(match.strip())
-            return GrepResponse(
-                content=results,
-                processed=1,
-                truncated=False,
-                total_scanned=1
-            )
-        
-        #result.stdout.strip()
-        elif result.returncode == 1:
+    if data.engine == "egrep" or egrep_only(pattern):
+        # The native engine reads POSIX classes and \< \> differently, so
+        # such patterns always go to egrep whatever engine was asked for.
+        try:
+            with search_seconds.time(engine="egrep"):
+                result = await egrep_search(
+                    pattern,
+                    folder,
+                    context_lines=data.context_lines,
+                    case_sensitive=data.case_sensitive,
+                    max_matches=data.max_matches,
+                    timeout=GREP_TIMEOUT,
+                )
+        except TimeoutError:
+            raise HTTPException(status_code=503, detail=f"grep command timed out ({GREP_TIMEOUT}s limit)")
+        except RuntimeError as e:
+            raise HTTPException(status_code=502, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=504, detail=f"Unexpected error: {str(e)}")
+        if not result.content:
             raise HTTPException(status_code=501, detail=f"No matches found for '{pattern}'")
-        else:
-           raise HTTPException(status_code=502, detail=f"grep error ({result.returncode}):\n{result.stderr.strip()}")
+        return GrepResponse(
+            content=result.content,
+            processed=result.processed,
+            truncated=result.truncated,
+            total_scanned=result.total_scanned,
+        )
 
-    except subprocess.TimeoutExpired:
-        raise HTTPException(status_code=503, detail=f"grep command timed out (45s limit)")
+    try:
+        with search_seconds.time(engine="native"):
+            result = await work_limiter.run(
+                search_folder,
+                pattern,
+                folder,
+                context_lines=data.context_lines,
+                case_sensitive=data.case_sensitive,
+                max_matches=data.max_matches,
+                max_files=data.max_files,
+                timeout=GREP_TIMEOUT,
+            )
+            files_scanned.inc(result.processed)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except TimeoutError:
+        raise HTTPException(status_code=503, detail=f"grep command timed out ({GREP_TIMEOUT}s limit)")
     except Exception as e:
-        raise HTTPException(status_code=504, message=f"Unexpected error: {str(e)}")
-    # return process_folder_bulk(
-    #     folder_path=normalize_path(data.folder_path),
-    #     context_lines=data.context_lines,
-    #     case_sensitive=data.case_sensitive
-    # )
+        raise HTTPException(status_code=504, detail=f"Unexpected error: {str(e)}")
+
+    if not result.matches:
+        raise HTTPException(status_code=501, detail=f"No matches found for '{pattern}'")
+    return GrepResponse(
+        content=[format_match(match) for match in result.matches],
+        matches=result.matches,
+        processed=result.processed,
+        truncated=result.truncated,
+        total_scanned=result.total_scanned,
+    )
+
+
+@app.get("/stats", response_model=ServiceStats)
+async def stats():
+    """
+    Reports how many searches are running and queued, the state of each trigram index,
+    and the shared result store.
+    """
+    return ServiceStats(
+        limiter=work_limiter.stats(),
+        indexes=trigram_stats(),
+        store=result_store.stats() if result_store else None,
+    )
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def prometheus_metrics():
+    """
+    Prometheus text exposition of request latency, bytes out and search timings.
+    """
+    return PlainTextResponse(metrics.render(), media_type=METRICS_CONTENT_TYPE)
 
 # """
 # name: Grep Code Search
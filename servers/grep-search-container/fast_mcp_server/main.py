@@ -1,6 +1,6 @@
 """
 name: Grep Search
-title: Grep Search 
+title: Grep Search
 author: EntityCS
 description: Search the entire project folder recursively with grep (shows file, line numbers and context).
 required_open_webui_version: 0.4.0
@@ -9,41 +9,187 @@ icon: https://img.icons8.com/search
 version: 0.0.2
 licence: MIT
 """
+import asyncio
+import os
+import time
+from typing import List
+
 import httpx
-from fastmcp import FastMCP
-from fastmcp.server.openapi import RouteMap, MCPType, HTTPRoute
+from fastmcp import Context, FastMCP
+from fastmcp.exceptions import ToolError
+
+from core import (
+    INDEX_ENABLED,
+    GrepMatch,
+    GrepResponse,
+    egrep_only,
+    egrep_search,
+    format_match,
+    logger,
+    search_folder,
+    warm_trigram_index,
+    work_limiter,
+)
 
 # ----------------------------------------------------------------------
 # Server definition
 # ----------------------------------------------------------------------
+# native: grep_request runs in this process (no OpenAPI container needed)
+# proxy:  tools are generated from the OpenAPI container and forwarded to it
+MCP_MODE = os.environ.get("GREP_MCP_MODE", "native").lower()
 # Use the service name from docker-compose as hostname
-client = httpx.AsyncClient(base_url="http://grep-serv-openapi:8000")
-
-# Load the OpenAPI spec synchronously once
-openapi_spec = httpx.get("http://grep-serv-openapi:8000/openapi.json").json()
-
-def custom_route_mapper(route: HTTPRoute, mcp_type: MCPType) -> MCPType | None:
-    """Advanced route type mapping."""
-    # Convert all admin routes to tools regardless of HTTP method
-    if "/admin/" in route.path:
-        return MCPType.TOOL
-
-    elif "internal" in route.tags:
-        return MCPType.EXCLUDE
-    
-    # Convert user detail routes to templates even if they're POST
-    elif route.path.startswith("/users/") and route.method == "POST":
-        return MCPType.RESOURCE_TEMPLATE
-    
-    # Use defaults for all other routes
-    return None
-# Create the MCP server
-server = FastMCP.from_openapi(
-    openapi_spec=openapi_spec,
-    client=client,
-    route_map_fn=custom_route_mapper,
-    name="Grep Container MCP"
-)
+OPENAPI_URL = os.environ.get("GREP_OPENAPI_URL", "http://grep-serv-openapi:8000")
+
+GREP_TIMEOUT = 45
+# Characters of matched text sent with each progress notification
+PROGRESS_PREVIEW_CHARS = 2000
+
+
+def build_native_server() -> FastMCP:
+    server = FastMCP(name="Grep Container MCP")
+
+    @server.tool
+    async def grep_request(
+        pattern: str,
+        folder_path: str = "/workspace/src",
+        context_lines: int = 10,
+        case_sensitive: bool = True,
+        max_matches: int = 200,
+        max_files: int = 100,
+        ctx: Context | None = None,
+    ) -> GrepResponse:
+        """
+        Search the given folder path for a given pattern, or textual term.
+        Use this tool when the user asks to 'use grep'.
+        Use this tool whenever the user wants to find where something is defined or used.
+        Use this tool whenever the user wants more context around the usage of a term or pattern.
+        Use higher number of context lines in attempts to increase contextual knowledge.
+        Matches are reported as progress notifications while the search runs.
+        """
+        pattern = "".join(ch for ch in pattern if ch.isprintable())
+        if not os.path.isdir(folder_path):
+            raise ToolError(f"Error: Directory not found: {folder_path}")
+        max_matches = max(1, min(max_matches, 10000))
+        context_lines = max(0, min(context_lines, 1000))
+
+        if egrep_only(pattern):
+            # The native engine reads POSIX classes and \< \> differently,
+            # so such patterns run through egrep as on the OpenAPI endpoint.
+            try:
+                result = await egrep_search(
+                    pattern,
+                    folder_path,
+                    context_lines=context_lines,
+                    case_sensitive=case_sensitive,
+                    max_matches=max_matches,
+                    timeout=GREP_TIMEOUT,
+                )
+            except TimeoutError:
+                raise ToolError(f"grep command timed out ({GREP_TIMEOUT}s limit)")
+            except RuntimeError as exc:
+                raise ToolError(str(exc))
+            if not result.content:
+                raise ToolError(f"No matches found for '{pattern}'")
+            return GrepResponse(
+                content=result.content,
+                processed=result.processed,
+                truncated=result.truncated,
+                total_scanned=result.total_scanned,
+            )
+
+        loop = asyncio.get_running_loop()
+        found: asyncio.Queue = asyncio.Queue()
+
+        def on_file(_: str, matches: List[GrepMatch]) -> None:
+            loop.call_soon_threadsafe(found.put_nowait, matches)
+
+        search = asyncio.ensure_future(work_limiter.run(
+            search_folder,
+            pattern,
+            folder_path,
+            context_lines=context_lines,
+            case_sensitive=case_sensitive,
+            max_matches=max_matches,
+            max_files=max(1, max_files),
+            on_file=on_file if ctx is not None else None,
+            timeout=GREP_TIMEOUT,
+        ))
+
+        reported = 0
+        while ctx is not None and not (search.done() and found.empty()):
+            getter = asyncio.ensure_future(found.get())
+            await asyncio.wait({getter, search}, return_when=asyncio.FIRST_COMPLETED)
+            if not getter.done():
+                getter.cancel()
+                continue
+            matches = getter.result()
+            reported += len(matches)
+            preview = "\n--\n".join(format_match(match) for match in matches)[:PROGRESS_PREVIEW_CHARS]
+            await ctx.report_progress(progress=reported, total=max_matches, message=preview)
+
+        try:
+            result = await search
+        except ValueError as exc:
+            raise ToolError(str(exc))
+        except TimeoutError:
+            raise ToolError(f"grep command timed out ({GREP_TIMEOUT}s limit)")
+        if not result.matches:
+            raise ToolError(f"No matches found for '{pattern}'")
+        return GrepResponse(
+            content=[format_match(match) for match in result.matches],
+            matches=result.matches,
+            processed=result.processed,
+            truncated=result.truncated,
+            total_scanned=result.total_scanned,
+        )
+
+    return server
+
+
+def load_openapi_spec(base_url: str, attempts: int = 30, delay: float = 2.0) -> dict:
+    """
+    Fetches /openapi.json, waiting for the OpenAPI container to come up
+    instead of failing on the first refused connection.
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            response = httpx.get(f"{base_url}/openapi.json", timeout=5.0)
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPError as exc:
+            if attempt == attempts:
+                raise
+            logger.warning(f"OpenAPI spec not available yet ({exc}), retrying in {delay}s")
+            time.sleep(delay)
+
+
+def build_proxy_server(base_url: str = OPENAPI_URL) -> FastMCP:
+    """
+    Tools generated from the OpenAPI container's spec, forwarded over one
+    pooled keep-alive client. The read timeout covers the slowest grep.
+    """
+    client = httpx.AsyncClient(
+        base_url=base_url,
+        limits=httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=60),
+        timeout=httpx.Timeout(GREP_TIMEOUT + 5, connect=5.0),
+    )
+    return FastMCP.from_openapi(
+        openapi_spec=load_openapi_spec(base_url),
+        client=client,
+        name="Grep Container MCP"
+    )
+
+
+def build_server(mode: str = MCP_MODE) -> FastMCP:
+    if mode == "proxy":
+        return build_proxy_server()
+    if INDEX_ENABLED:
+        for root in os.environ.get("GREP_INDEX_ROOTS", "").split(","):
+            if root.strip() and os.path.isdir(root.strip()):
+                warm_trigram_index(root.strip())
+    return build_native_server()
+
 
 if __name__ == "__main__":
+    server = build_server()
     server.run(transport="http", host="0.0.0.0", port=8000)
@@ -0,0 +1,133 @@
+import asyncio
+import re
+import shutil
+
+import pytest
+from fastapi.testclient import TestClient
+from fastmcp import Client
+
+from core import egrep
+from core.search import compile_pattern
+from fast_api_server.main import app
+from fast_mcp_server.main import build_native_server
+
+pytestmark = pytest.mark.skipif(shutil.which("egrep") is None, reason="egrep not installed")
+
+FILES = {
+    "Animals.cs": "class Dog {}\n// <Dog> in brackets\nvar hotdog = 1;\nclass Cat : Animal {}\nBigDog barks\n",
+    "notes/dogs.txt": "dog\nDOGS\nfrog\naa bb\nsee Dog.Bark()\n",
+    "Foo.cs": "class Foo\n{\n    Foo bar\n        x;\n    Foo { get } x\n}\n",
+}
+# Read the same way by Python's re and egrep
+PORTABLE = [
+    "Dog", "[Dd]og", "^class [A-Z]", "(Cat|Dog)s?", "a{2}", "og$", "Dog\\.Bark\\(\\)",
+    # \s, \W and negated classes must not run on into the next line
+    "Foo\\s+\\{", "Foo[^;]*x", "Foo\\W+\\{", "bar\\s*$",
+]
+# POSIX classes and GNU anchors, which only egrep understands
+EGREP_ONLY = ["[[:upper:]]og", "\\<Dog\\>", "\\<hot", "[[:digit:]]", "Do[[:alpha:]]"]
+_EGREP_MATCH = re.compile(r"^(?:\./)?(.+?):(\d+):", re.MULTILINE)
+
+
+@pytest.fixture(scope="module")
+def folder(tmp_path_factory):
+    root = tmp_path_factory.mktemp("engines")
+    for name, text in FILES.items():
+        (root / name).parent.mkdir(parents=True, exist_ok=True)
+        (root / name).write_text(text)
+    return str(root)
+
+
+def _post(folder: str, pattern: str, engine: str, case_sensitive: bool = True, max_matches: int = 200):
+    return TestClient(app).post("/grep_request", json={
+        "pattern": pattern,
+        "folder_path": folder,
+        "context_lines": 1,
+        "case_sensitive": case_sensitive,
+        "max_matches": max_matches,
+        "engine": engine,
+    })
+
+
+def _grep(folder: str, pattern: str, engine: str, case_sensitive: bool = True):
+    """
+    (status, set of (file, line) matches) of one /grep_request call.
+    """
+    response = _post(folder, pattern, engine, case_sensitive)
+    if response.status_code != 200:
+        return response.status_code, set()
+    body = response.json()
+    if engine == "native" and body["matches"]:
+        return 200, {(match["file"], match["line"]) for match in body["matches"]}
+    text = "\n".join(body["content"])
+    return 200, {(file, int(line)) for file, line in _EGREP_MATCH.findall(text)}
+
+
+@pytest.mark.parametrize("case_sensitive", [True, False])
+@pytest.mark.parametrize("pattern", PORTABLE + EGREP_ONLY)
+def test_engines_agree(folder, pattern, case_sensitive):
+    native = _grep(folder, pattern, "native", case_sensitive)
+    egrep = _grep(folder, pattern, "egrep", case_sensitive)
+    assert native == egrep
+    assert native[0] == 200
+
+
+def test_egrep_only_syntax_is_matched_as_egrep_reads_it(folder):
+    assert _grep(folder, "\\<Dog\\>", "native")[1] == {("Animals.cs", 1), ("Animals.cs", 2), ("notes/dogs.txt", 5)}
+    assert _grep(folder, "[[:upper:]]og", "native")[1] == {("Animals.cs", 1), ("Animals.cs", 2), ("Animals.cs", 5), ("notes/dogs.txt", 5)}
+
+
+@pytest.mark.parametrize("pattern", EGREP_ONLY)
+def test_native_compile_rejects_egrep_only_syntax(pattern):
+    with pytest.raises(ValueError):
+        compile_pattern(pattern)
+
+
+def test_multiline_patterns_stay_on_one_line(folder):
+    assert _grep(folder, "Foo\\s+\\{", "native")[1] == {("Foo.cs", 5)}
+    assert _grep(folder, "Foo[^;]*x", "native")[1] == {("Foo.cs", 5)}
+
+
+@pytest.mark.parametrize("max_matches, truncated", [(2, True), (3, False), (4, False)])
+def test_truncated_only_when_a_further_match_exists(folder, max_matches, truncated):
+    # "Foo" is on exactly three lines, all in Foo.cs.
+    body = _post(folder, "Foo", "native", max_matches=max_matches).json()
+    assert len(body["matches"]) == min(max_matches, 3)
+    assert body["truncated"] is truncated
+
+
+@pytest.mark.parametrize("pattern", EGREP_ONLY)
+def test_mcp_tool_routes_egrep_only_syntax_to_egrep(folder, pattern):
+    async def call():
+        async with Client(build_native_server()) as client:
+            return await client.call_tool("grep_request", {"pattern": pattern, "folder_path": folder, "context_lines": 1})
+
+    result = asyncio.run(call())
+    text = "\n".join(result.structured_content["content"])
+    found = {(file, int(line)) for file, line in _EGREP_MATCH.findall(text)}
+    assert (200, found) == _grep(folder, pattern, "egrep")
+
+
+@pytest.mark.parametrize("context_lines", [0, 2])
+def test_egrep_stops_reading_at_max_matches(tmp_path, monkeypatch, context_lines):
+    monkeypatch.setattr(egrep, "INDEX_ENABLED", False)
+    (tmp_path / "big.txt").write_text("".join(f"needle {i}\nhay\nhay\nhay\nhay\nhay\n" for i in range(20000)))
+
+    result = asyncio.run(egrep.egrep_search("needle", str(tmp_path), context_lines=context_lines, max_matches=10))
+
+    assert len(result.content) == 10
+    assert "needle 0" in result.content[0]
+    assert result.truncated is True
+    assert result.processed is None and result.total_scanned is None
+
+
+def test_egrep_without_context_gives_one_entry_per_line(folder, monkeypatch):
+    monkeypatch.setattr(egrep, "INDEX_ENABLED", False)
+    result = asyncio.run(egrep.egrep_search("Dog", folder, context_lines=0))
+    assert result.truncated is False
+    assert sorted(result.content) == [
+        "./Animals.cs:1:class Dog {}",
+        "./Animals.cs:2:// <Dog> in brackets",
+        "./Animals.cs:5:BigDog barks",
+        "./notes/dogs.txt:5:see Dog.Bark()",
+    ]
@@ -0,0 +1,41 @@
+import os
+import time
+
+from core import trigram
+from core.search import search_folder
+from core.trigram import TrigramIndex, get_trigram_index
+
+
+def _built(root, monkeypatch) -> TrigramIndex:
+    index = TrigramIndex(str(root))
+    index.refresh()
+    monkeypatch.setitem(trigram._indexes, index.root, index)
+    return index
+
+
+def test_candidates_follow_edits_and_deletes(tmp_path, monkeypatch):
+    (tmp_path / "a.cs").write_text("class Needle {}\n")
+    (tmp_path / "b.cs").write_text("class Other {}\n")
+    (tmp_path / "obj").mkdir()
+    (tmp_path / "obj" / "c.cs").write_text("class Needle {}\n")
+    index = _built(tmp_path, monkeypatch)
+    assert index.candidates("Needle") == ["a.cs"]
+
+    os.remove(tmp_path / "a.cs")
+    (tmp_path / "b.cs").write_text("class Needle {}\n")
+    os.utime(tmp_path / "b.cs", ns=(time.time_ns() + 10**9,) * 2)
+    index.refresh()
+    assert index.candidates("Needle") == ["b.cs"]
+    assert index.stats()["files"] == 1
+
+
+def test_stale_index_never_narrows_a_search(tmp_path, monkeypatch):
+    (tmp_path / "a.txt").write_text("needle one\n")
+    index = _built(tmp_path, monkeypatch)
+    assert get_trigram_index(str(tmp_path)) is index
+
+    (tmp_path / "b.txt").write_text("needle two\n")
+    monkeypatch.setattr(trigram, "INDEX_REFRESH_SECONDS", 0)
+    assert get_trigram_index(str(tmp_path)) is None
+    result = search_folder("needle", str(tmp_path), context_lines=0)
+    assert sorted(match.file for match in result.matches) == ["a.txt", "b.txt"]
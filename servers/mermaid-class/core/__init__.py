@@ -7,10 +7,57 @@ from .models import (
     DiagramItem,
     DiagramItemRequest,
     BulkDiagramResponse,
+    BulkDiagramSummary,
     BatchCreateClassDiagramRequest,
+    ProjectInfo,
+    ProjectListResponse,
+    DiagramBatchEntry,
+    DiagramBatchRequest,
+    DiagramBatchResult,
+    DiagramBatchResponse,
+    TypeDiagramRequest,
+    TypeMember,
+    TypeMembersRequest,
+    TypeMembersResponse,
+    CacheStats,
+    LimiterStats,
+    WatcherStats,
+    StoreStats,
+    ServiceStats,
 )
-from .parser import generate_mermaid_from_csharp
-from .processor import process_folder_bulk
+from shared.store import ResultStore, result_store
+from .cache import DiagramCache, diagram_cache
+from shared.compression import CompressionMiddleware
+from shared.telemetry import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    InstrumentationMiddleware,
+    Registry,
+    metrics,
+)
+from .limiter import WorkLimiter, work_limiter
+from .reader import SourceBuffer
+from .parser import (
+    CSharpParser,
+    TypeDeclaration,
+    generate_mermaid_from_csharp,
+    get_parser,
+    scan_declarations,
+    strip_comments,
+)
+from .processor import (
+    iter_folder_bulk,
+    iter_render_files,
+    process_batch,
+    process_folder_bulk,
+    render_file_cached,
+    render_files,
+)
+from .budget import MergedDiagram, ResponseBudget, compact_mermaid, estimate_tokens
+from .members import Member, render_members, scan_members, scan_type_members
+from .index import TypeIndex, build_type_diagram, build_type_members, get_type_index
+from .projects import Project, ProjectCatalog, get_project_catalog, list_projects
+from .watcher import WorkspaceWatcher, watcher_from_env
+from .workers import get_executor, shutdown_executors
 
 __all__ = [
     "normalize_path",
@@ -19,8 +66,66 @@ __all__ = [
     "DiagramItem",
     "DiagramItemRequest",
     "BulkDiagramResponse",
+    "BulkDiagramSummary",
     "BatchCreateClassDiagramRequest",
+    "ProjectInfo",
+    "ProjectListResponse",
+    "DiagramBatchEntry",
+    "DiagramBatchRequest",
+    "DiagramBatchResult",
+    "DiagramBatchResponse",
+    "TypeDiagramRequest",
+    "TypeMember",
+    "TypeMembersRequest",
+    "TypeMembersResponse",
+    "CacheStats",
+    "LimiterStats",
+    "WatcherStats",
+    "StoreStats",
+    "ServiceStats",
+    "ResultStore",
+    "result_store",
+    "DiagramCache",
+    "diagram_cache",
+    "METRICS_CONTENT_TYPE",
+    "CompressionMiddleware",
+    "InstrumentationMiddleware",
+    "Registry",
+    "metrics",
+    "WorkLimiter",
+    "work_limiter",
+    "SourceBuffer",
+    "TypeDeclaration",
+    "CSharpParser",
     "generate_mermaid_from_csharp",
+    "get_parser",
+    "scan_declarations",
+    "strip_comments",
+    "iter_folder_bulk",
+    "iter_render_files",
+    "process_batch",
     "process_folder_bulk",
+    "render_file_cached",
+    "render_files",
+    "MergedDiagram",
+    "ResponseBudget",
+    "compact_mermaid",
+    "estimate_tokens",
+    "TypeIndex",
+    "Member",
+    "render_members",
+    "scan_members",
+    "scan_type_members",
+    "build_type_diagram",
+    "build_type_members",
+    "get_type_index",
+    "Project",
+    "ProjectCatalog",
+    "get_project_catalog",
+    "list_projects",
+    "WorkspaceWatcher",
+    "watcher_from_env",
+    "get_executor",
+    "shutdown_executors",
 ]
 
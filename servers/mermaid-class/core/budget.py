@@ -0,0 +1,90 @@
+# core/budget.py
+# Keeps responses that end up in a model's context small: a byte/token
+# budget checked while diagrams are produced, a compact diagram form, and
+# one merged diagram for many files.
+import math
+import os
+from typing import Dict, List
+
+# Rough characters per model token for Mermaid text (mostly identifiers and
+# punctuation); only used to turn max_tokens into a size limit.
+CHARS_PER_TOKEN = float(os.environ.get("MERMAID_CHARS_PER_TOKEN", "4"))
+# JSON framing charged per DiagramItem on top of its file name and diagram.
+ITEM_OVERHEAD_BYTES = 32
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def compact_mermaid(diagram: str) -> str:
+    """
+    The same diagram with plain newlines, no indentation, and a single
+    "class X { <<abstract>> }" line instead of it plus "class X".
+    """
+    lines = [line.strip() for line in diagram.split("\n")]
+    abstract = {line[:-len(" { <<abstract>> }")] for line in lines if line.endswith(" { <<abstract>> }")}
+    return "\n".join(line for line in lines if line and line not in abstract)
+
+
+class ResponseBudget:
+    """
+    Running size of a response against optional max_bytes / max_tokens.
+    take() charges one item if it still fits and refuses it (for good)
+    otherwise, so the caller can stop producing and report truncation.
+    """
+
+    def __init__(self, max_bytes: int | None = None, max_tokens: int | None = None):
+        self.max_bytes = max_bytes
+        self.max_tokens = max_tokens
+        self.bytes = 0
+        self.tokens = 0
+        self.exhausted = False
+
+    def _charge(self, text: str, overhead: int = 0) -> bool:
+        if self.exhausted:
+            return False
+        size = len(text.encode("utf-8")) + overhead
+        tokens = estimate_tokens(text) + math.ceil(overhead / CHARS_PER_TOKEN)
+        if (self.max_bytes is not None and self.bytes + size > self.max_bytes) or (
+            self.max_tokens is not None and self.tokens + tokens > self.max_tokens
+        ):
+            self.exhausted = True
+            return False
+        self.bytes += size
+        self.tokens += tokens
+        return True
+
+    def take(self, file: str, diagram: str) -> bool:
+        return self._charge(diagram, len(file) + ITEM_OVERHEAD_BYTES)
+
+
+class MergedDiagram(ResponseBudget):
+    """
+    One classDiagram for many files: nodes, edges and notes that repeat
+    across files are kept once, in first-seen order. Only the lines a file
+    adds count against the budget.
+    """
+
+    def __init__(self, max_bytes: int | None = None, max_tokens: int | None = None):
+        super().__init__(max_bytes, max_tokens)
+        self.files = 0
+        self._lines: Dict[str, None] = {}
+
+    def take(self, file: str, diagram: str) -> bool:
+        added: List[str] = []
+        for line in compact_mermaid(diagram).split("\n"):
+            if line == "classDiagram" or line.startswith("%%") or line in self._lines:
+                continue
+            added.append(line)
+        if not self._charge("\n".join(added)):
+            return False
+        for line in added:
+            self._lines[line] = None
+        self.files += 1
+        return True
+
+    def render(self, title: str) -> str:
+        abstract = {line[:-len(" { <<abstract>> }")] for line in self._lines if line.endswith(" { <<abstract>> }")}
+        lines = [line for line in self._lines if line not in abstract]
+        return "\n".join(["classDiagram", f"%% Merged: {title} ({self.files} files)", *lines])
@@ -0,0 +1,222 @@
+# core/cache.py
+import hashlib
+import os
+import secrets
+import threading
+from collections import OrderedDict
+from typing import Tuple
+
+from shared.store import ResultStore, result_store
+
+from .utils import logger
+
+CacheKey = Tuple[str, int, int, int, bool, bool]
+
+# The disk tier is pruned back to this many files, least recently used
+# first, checked every _PRUNE_EVERY writes. Every edit of a source file
+# writes a new entry, so without a bound the directory only grows.
+DISK_MAX_ENTRIES = int(os.environ.get("DIAGRAM_CACHE_DISK_ENTRIES", "65536"))
+_PRUNE_EVERY = 256
+
+
+def make_cache_key(
+    file_path: str,
+    stat: os.stat_result,
+    include_interfaces: bool,
+    include_abstracts: bool,
+) -> CacheKey:
+    """
+    Identity of a rendered diagram: resolved path, stat metadata and the render flags.
+    Any edit to the file changes mtime/size and therefore the key.
+    """
+    return (
+        os.path.realpath(file_path),
+        stat.st_mtime_ns,
+        stat.st_size,
+        stat.st_ino,
+        bool(include_interfaces),
+        bool(include_abstracts),
+    )
+
+
+class DiagramCache:
+    """
+    Bounded LRU of rendered mermaid diagrams, optionally backed by the shared
+    result store (see core.store) and/or a directory of files named by a hash
+    of the cache key (path, stat metadata and flags), so warm entries survive
+    a restart and are shared by every worker and container using the same
+    data volume. The directory is an LRU too: hits refresh a file's mtime and
+    the oldest files beyond disk_max_entries are deleted.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 4096,
+        cache_dir: str | None = None,
+        store: ResultStore | None = None,
+        disk_max_entries: int = DISK_MAX_ENTRIES,
+    ):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.disk_max_entries = disk_max_entries
+        self.store = store
+        self._entries: "OrderedDict[CacheKey, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_hits = 0
+        self.disk_evictions = 0
+        self.store_hits = 0
+        self._disk_writes = 0
+
+        if self.cache_dir:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+            except OSError as exc:
+                logger.warning(f"Diagram cache dir unavailable ({self.cache_dir}): {exc}")
+                self.cache_dir = None
+
+    def _digest(self, key: CacheKey) -> str:
+        return hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+
+    def _disk_path(self, key: CacheKey) -> str:
+        digest = self._digest(key)
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}.mmd")
+
+    def get(self, key: CacheKey) -> str | None:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+
+        if self.store is not None:
+            data = self.store.get("diagram", self._digest(key))
+            if data is not None:
+                value = data.decode("utf-8")
+                self._remember(key, value)
+                with self._lock:
+                    self.hits += 1
+                    self.store_hits += 1
+                return value
+
+        if self.cache_dir:
+            disk_path = self._disk_path(key)
+            try:
+                with open(disk_path, "r", encoding="utf-8") as f:
+                    value = f.read()
+                # mtime is the LRU clock of the disk tier (atime is unreliable under noatime/relatime).
+                os.utime(disk_path)
+            except OSError:
+                value = None
+            if value is not None:
+                self._remember(key, value)
+                with self._lock:
+                    self.hits += 1
+                    self.disk_hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: CacheKey, value: str) -> None:
+        self._remember(key, value)
+        if self.store is not None:
+            self.store.put("diagram", self._digest(key), value.encode("utf-8"))
+        if self.cache_dir:
+            disk_path = self._disk_path(key)
+            try:
+                os.makedirs(os.path.dirname(disk_path), exist_ok=True)
+                # Unique per writer: the directory may be shared by several containers (all pid 1)
+                tmp_path = f"{disk_path}.{os.getpid()}.{secrets.token_hex(4)}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(value)
+                os.replace(tmp_path, disk_path)
+            except OSError as exc:
+                logger.warning(f"Cannot persist diagram cache entry: {exc}")
+                return
+            with self._lock:
+                self._disk_writes += 1
+                prune = self._disk_writes % _PRUNE_EVERY == 0
+            if prune:
+                self.prune_disk()
+
+    def prune_disk(self) -> int:
+        """
+        Deletes the least recently used files of the disk tier (and stale
+        temporary files) until at most disk_max_entries remain.
+        """
+        if not self.cache_dir:
+            return 0
+        files = []
+        try:
+            with os.scandir(self.cache_dir) as buckets:
+                for bucket in buckets:
+                    if not bucket.is_dir(follow_symlinks=False):
+                        continue
+                    with os.scandir(bucket.path) as entries:
+                        for entry in entries:
+                            try:
+                                files.append((entry.stat(follow_symlinks=False).st_mtime, entry.path))
+                            except OSError:
+                                continue
+        except OSError as exc:
+            logger.warning(f"Cannot prune diagram cache dir: {exc}")
+            return 0
+        excess = len(files) - self.disk_max_entries
+        if excess <= 0:
+            return 0
+        files.sort()
+        removed = 0
+        for _, path in files[:excess]:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass  # already removed by another worker
+        with self._lock:
+            self.disk_evictions += removed
+        logger.info(f"Pruned {removed} diagram cache files from {self.cache_dir}")
+        return removed
+
+    def _remember(self, key: CacheKey, value: str) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "disk_hits": self.disk_hits,
+                "disk_enabled": bool(self.cache_dir),
+                "disk_evictions": self.disk_evictions,
+                "store_hits": self.store_hits,
+                "store_enabled": self.store is not None,
+            }
+
+
+# The result store already persists and shares every diagram, so the disk
+# tier is only used without one; both would write each diagram twice.
+if result_store is not None and os.environ.get("DIAGRAM_CACHE_DIR"):
+    logger.info("RESULT_STORE_PATH is set: ignoring DIAGRAM_CACHE_DIR")
+
+diagram_cache = DiagramCache(
+    max_entries=int(os.environ.get("DIAGRAM_CACHE_SIZE", "4096")),
+    cache_dir=None if result_store is not None else os.environ.get("DIAGRAM_CACHE_DIR") or None,
+    store=result_store,
+)
@@ -0,0 +1,366 @@
+# core/index.py
+import os
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Set, Tuple
+
+from .members import render_members, scan_type_members
+from .models import DiagramItem, TypeMember, TypeMembersResponse
+from .parser import TypeDeclaration, _split_top_level, render_declaration, scan_file
+from .processor import iter_cs_files
+from .utils import _strip_generics, normalize_path, logger
+from .workers import DEFAULT_WORKERS, get_executor
+
+
+class IndexedType(NamedTuple):
+    file: str  # path relative to the index root
+    decl: TypeDeclaration
+
+
+def type_key(name: str) -> str:
+    """
+    Index key of a declared or referenced type: the simple name without
+    namespace qualification or generic arguments.
+    """
+    return name.split("<", 1)[0].rsplit(".", 1)[-1].strip()
+
+
+def _unqualified(name: str) -> str:
+    head, sep, generics = name.partition("<")
+    return head.rsplit(".", 1)[-1].strip() + sep + generics
+
+
+def _scan_or_error(file_path: str) -> List[TypeDeclaration] | Exception:
+    try:
+        return scan_file(file_path)
+    except (ValueError, RuntimeError) as exc:
+        return exc
+
+
+class TypeIndex:
+    """
+    Every type declared under a workspace root, kept current by re-scanning
+    only the files whose mtime or size changed since the last refresh.
+    """
+
+    def __init__(self, root: str):
+        self.root = str(normalize_path(root))
+        self.generation = 0
+        self.watched = False  # set by core.watcher once it keeps this index current
+        self._files: Dict[str, Tuple[int, int, List[TypeDeclaration]]] = {}
+        self._types: Dict[str, List[IndexedType]] = defaultdict(list)
+        self._derived: Dict[str, Set[str]] = {}
+        self._derived_generation = -1
+        self._lock = threading.RLock()
+
+    def refresh(self, workers: int | None = None, executor: str | None = None) -> dict:
+        """
+        Stats every .cs file under the root and re-scans the changed ones.
+        Returns counts plus the full paths that were (re-)scanned.
+        """
+        workers = workers or DEFAULT_WORKERS
+        seen: Set[str] = set()
+        changed: List[Tuple[str, str, os.stat_result]] = []
+        for full_path, rel_path in iter_cs_files(self.root):
+            seen.add(rel_path)
+            try:
+                stat = os.stat(full_path)
+            except OSError:
+                continue
+            entry = self._files.get(rel_path)
+            if entry is None or entry[0] != stat.st_mtime_ns or entry[1] != stat.st_size:
+                changed.append((full_path, rel_path, stat))
+
+        paths = [full_path for full_path, _, _ in changed]
+        if workers > 1 and len(paths) > 1:
+            scanned = list(get_executor(executor, workers).map(_scan_or_error, paths, chunksize=16))
+        else:
+            scanned = [_scan_or_error(path) for path in paths]
+
+        with self._lock:
+            removed = [rel_path for rel_path in self._files if rel_path not in seen]
+            for rel_path in removed:
+                self._drop(rel_path)
+            for (_, rel_path, stat), declarations in zip(changed, scanned):
+                if isinstance(declarations, Exception):
+                    logger.warning(f"Not indexing {rel_path}: {declarations}")
+                    self._drop(rel_path)
+                    continue
+                self._store(rel_path, stat, declarations)
+            if changed or removed:
+                self.generation += 1
+
+        return {"updated": len(changed), "removed": len(removed), "files": len(self._files), "paths": paths}
+
+    def update_file(self, full_path: str) -> None:
+        """
+        Re-scans one file (or forgets it if it no longer exists).
+        """
+        rel_path = os.path.relpath(full_path, self.root).replace(os.sep, "/")
+        try:
+            stat = os.stat(full_path)
+            declarations = scan_file(full_path)
+        except (OSError, ValueError, RuntimeError):
+            self.remove_file(full_path)
+            return
+        with self._lock:
+            self._store(rel_path, stat, declarations)
+            self.generation += 1
+
+    def remove_file(self, full_path: str) -> None:
+        rel_path = os.path.relpath(full_path, self.root).replace(os.sep, "/")
+        with self._lock:
+            if rel_path in self._files:
+                self._drop(rel_path)
+                self.generation += 1
+
+    def remove_folder(self, full_path: str) -> int:
+        """
+        Forgets every file under a deleted or renamed-away folder; returns how many.
+        """
+        prefix = os.path.relpath(full_path, self.root).replace(os.sep, "/") + "/"
+        with self._lock:
+            gone = [rel_path for rel_path in self._files if rel_path.startswith(prefix)]
+            for rel_path in gone:
+                self._drop(rel_path)
+            if gone:
+                self.generation += 1
+        return len(gone)
+
+    def _store(self, rel_path: str, stat: os.stat_result, declarations: List[TypeDeclaration]) -> None:
+        self._drop(rel_path)
+        self._files[rel_path] = (stat.st_mtime_ns, stat.st_size, declarations)
+        for decl in declarations:
+            self._types[type_key(decl.name)].append(IndexedType(rel_path, decl))
+
+    def _drop(self, rel_path: str) -> None:
+        entry = self._files.pop(rel_path, None)
+        if entry is None:
+            return
+        for key in {type_key(decl.name) for decl in entry[2]}:
+            remaining = [t for t in self._types.get(key, ()) if t.file != rel_path]
+            if remaining:
+                self._types[key] = remaining
+            else:
+                self._types.pop(key, None)
+
+    def _derived_map(self) -> Dict[str, Set[str]]:
+        if self._derived_generation != self.generation:
+            derived: Dict[str, Set[str]] = defaultdict(set)
+            for key, entries in self._types.items():
+                for entry in entries:
+                    for base in entry.decl.bases:
+                        derived[type_key(base)].add(key)
+            self._derived = derived
+            self._derived_generation = self.generation
+        return self._derived
+
+    def lookup(self, name: str) -> List[IndexedType]:
+        with self._lock:
+            return list(self._types.get(type_key(name), ()))
+
+    def lookup_current(self, name: str) -> List[IndexedType]:
+        """
+        lookup, after re-scanning any file of the matches that changed since
+        it was indexed, so their recorded body spans line up with the file.
+        """
+        entries = self.lookup(name)
+        stale = []
+        for entry in entries:
+            full_path = os.path.join(self.root, entry.file)
+            with self._lock:
+                known = self._files.get(entry.file)
+            try:
+                stat = os.stat(full_path)
+            except OSError:
+                stale.append(full_path)
+                continue
+            if known is None or known[0] != stat.st_mtime_ns or known[1] != stat.st_size:
+                stale.append(full_path)
+        for full_path in dict.fromkeys(stale):
+            self.update_file(full_path)
+        return self.lookup(name) if stale else entries
+
+    def related(self, name: str, ancestors: bool = True, descendants: bool = True, depth: int | None = None) -> Set[str]:
+        """
+        Keys reachable from name through base (ancestors) and/or derived
+        (descendants) edges, up to depth hops.
+        """
+        with self._lock:
+            derived = self._derived_map()
+            start = type_key(name)
+            found = {start}
+            frontier = [start]
+            hops = 0
+            while frontier and (depth is None or hops < depth):
+                hops += 1
+                following: List[str] = []
+                for key in frontier:
+                    neighbours: Set[str] = set()
+                    if ancestors:
+                        for entry in self._types.get(key, ()):
+                            neighbours.update(type_key(base) for base in entry.decl.bases)
+                    if descendants:
+                        neighbours.update(derived.get(key, ()))
+                    for neighbour in neighbours - found:
+                        found.add(neighbour)
+                        following.append(neighbour)
+                frontier = following
+            return found
+
+    def in_namespace(self, namespace: str) -> Set[str]:
+        with self._lock:
+            return {
+                key for key, entries in self._types.items()
+                if any(e.decl.namespace == namespace or e.decl.namespace.startswith(namespace + ".") for e in entries)
+            }
+
+    def all_types(self) -> Set[str]:
+        with self._lock:
+            return set(self._types)
+
+    def resolve_bases(self, decl: TypeDeclaration) -> TypeDeclaration:
+        """
+        decl with each base named as the node its declaration is drawn as
+        (Animal<Dog> becomes Animal<T>), so inheritance edges attach to that
+        node instead of starting a separate one. Bases not declared under the
+        root keep their name, minus namespace qualification.
+        """
+        bases = []
+        with self._lock:
+            for base in decl.bases:
+                declared = self._types.get(type_key(base))
+                if not declared:
+                    bases.append(_unqualified(base))
+                    continue
+                _, _, generics = base.partition("<")
+                arity = len(_split_top_level(generics.rstrip()[:-1])) if generics else 0
+                match = next((e for e in declared if e.decl.generic_arity == arity), declared[0])
+                bases.append(match.decl.name)
+        return decl._replace(bases=tuple(bases))
+
+    def render(self, keys: Iterable[str], title: str, include_abstracts: bool = True) -> str:
+        """
+        One merged classDiagram for keys; partial types declared across
+        several files contribute a single node.
+        """
+        lines: Dict[str, None] = {}
+        with self._lock:
+            entries = [entry for key in keys for entry in self._types.get(key, ())]
+        entries.sort(key=lambda e: (e.decl.namespace, type_key(e.decl.name), e.file))
+        for entry in entries:
+            decl = self.resolve_bases(entry.decl)
+            for line in render_declaration(decl, include_abstracts=include_abstracts):
+                lines.setdefault(line)
+        return " \n ".join(["classDiagram", f"%% Index: {title}", *lines])
+
+
+_indexes: Dict[str, TypeIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_type_index(root: str, refresh: bool = True) -> TypeIndex:
+    """
+    Returns the shared index for root, bringing it up to date first unless
+    a watcher already does so.
+    """
+    key = str(normalize_path(root))
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = TypeIndex(key)
+    if refresh and not index.watched:
+        index.refresh()
+    return index
+
+
+def build_type_diagram(
+    folder_path: str,
+    type_name: str | None = None,
+    namespace: str | None = None,
+    relation: str = "both",
+    depth: int | None = None,
+    include_abstracts: bool = True,
+) -> DiagramItem:
+    """
+    Merged diagram answered from the workspace index: a type with its
+    ancestors and/or descendants, a namespace, or (neither given) the whole root.
+    """
+    path = normalize_path(folder_path)
+    if not path.is_dir():
+        raise ValueError(f"Folder not found: {folder_path}")
+    index = get_type_index(str(path))
+
+    if type_name:
+        if not index.lookup(type_name):
+            raise LookupError(f"Type not found: {type_name}")
+        keys = index.related(
+            type_name,
+            ancestors=relation in ("ancestors", "both"),
+            descendants=relation in ("descendants", "both"),
+            depth=depth,
+        )
+        title = f"{type_name} ({relation})"
+    elif namespace:
+        keys = index.in_namespace(namespace)
+        if not keys:
+            raise LookupError(f"Namespace not found: {namespace}")
+        title = f"namespace {namespace}"
+    else:
+        keys = index.all_types()
+        title = index.root
+
+    if namespace and type_name:
+        keys &= index.in_namespace(namespace) | {type_key(type_name)}
+
+    return DiagramItem(file=index.root, mermaid=index.render(keys, title, include_abstracts=include_abstracts))
+
+
+def build_type_members(
+    folder_path: str,
+    type_name: str,
+    file: str | None = None,
+    include_private: bool = True,
+) -> TypeMembersResponse:
+    """
+    Members of one type from the workspace index: only the body spans the
+    index recorded for its declarations are read and scanned, so expanding a
+    type costs the same whatever the size of the workspace.
+    """
+    path = normalize_path(folder_path)
+    if not path.is_dir():
+        raise ValueError(f"Folder not found: {folder_path}")
+    index = get_type_index(str(path), refresh=False)
+    entries = index.lookup_current(type_name)
+    if not entries and not index.watched:
+        # Not indexed yet, or declared in a file added since the last refresh.
+        index.refresh()
+        entries = index.lookup_current(type_name)
+    if file:
+        wanted = os.path.relpath(os.path.join(index.root, file), index.root).replace(os.sep, "/")
+        entries = [entry for entry in entries if entry.file == wanted]
+    if not entries:
+        raise LookupError(f"Type not found: {type_name}" + (f" in {file}" if file else ""))
+    entries.sort(key=lambda e: (e.file, e.decl.start))
+
+    members: List[TypeMember] = []
+    lines: Dict[str, None] = {}
+    for entry in entries:
+        decl = index.resolve_bases(entry.decl)
+        for line in render_declaration(decl):
+            lines.setdefault(line)
+        found = [
+            member for member in scan_type_members(os.path.join(index.root, entry.file), entry.decl)
+            if include_private or member.visibility != "private"
+        ]
+        # Same node name render_declaration gives the class (Shape~T~).
+        for line in render_members(_strip_generics(decl.name), found):
+            lines.setdefault(line)
+        members.extend(TypeMember(**member._asdict(), file=entry.file) for member in found)
+
+    return TypeMembersResponse(
+        type_name=entries[0].decl.name,
+        files=list(dict.fromkeys(entry.file for entry in entries)),
+        members=members,
+        mermaid=" \n ".join(["classDiagram", f"%% Members: {entries[0].decl.name}", *lines]),
+    )
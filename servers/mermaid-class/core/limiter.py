@@ -0,0 +1,75 @@
+# core/limiter.py
+import asyncio
+import contextlib
+import functools
+import os
+from typing import Any, AsyncIterator, Callable, Iterator
+
+
+class WorkLimiter:
+    """
+    Bounds how many blocking jobs run at once off the event loop and counts
+    the requests queued behind them.
+    """
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max(1, max_concurrency)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+        self.peak_waiting = 0
+        self.completed = 0
+
+    @contextlib.asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        self.waiting += 1
+        self.peak_waiting = max(self.peak_waiting, self.waiting)
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            self._semaphore.release()
+
+    async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Runs func(*args, **kwargs) on a worker thread once a slot is free.
+        """
+        async with self.slot():
+            return await asyncio.to_thread(functools.partial(func, *args, **kwargs))
+
+    async def iterate(self, func: Callable[..., Iterator[Any]], *args: Any, **kwargs: Any) -> AsyncIterator[Any]:
+        """
+        Drives the generator returned by func(*args, **kwargs) on worker
+        threads, holding one slot until it is exhausted or closed.
+        """
+        done = object()
+        async with self.slot():
+            iterator = await asyncio.to_thread(functools.partial(func, *args, **kwargs))
+            try:
+                while True:
+                    item = await asyncio.to_thread(next, iterator, done)
+                    if item is done:
+                        break
+                    yield item
+            finally:
+                close = getattr(iterator, "close", None)
+                if close is not None:
+                    await asyncio.to_thread(close)
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "queue_depth": self.waiting,
+            "peak_queue_depth": self.peak_waiting,
+            "completed": self.completed,
+        }
+
+
+work_limiter = WorkLimiter(int(os.environ.get("MERMAID_MAX_CONCURRENCY", "4")))
@@ -0,0 +1,355 @@
+# core/members.py
+# Fields, properties, methods, constructors, events and indexers of one type,
+# scanned on demand from the body span core.parser.scan_declarations recorded
+# for it. Nothing outside that span (and a record's header) is read.
+import re
+from typing import List, NamedTuple, Tuple
+
+from .parser import TypeDeclaration, _SKIP_SOURCE, _decode, _split_top_level
+from .reader import SourceBuffer
+
+# Everything that shapes a member at the top level of a body; comments,
+# literals and preprocessor lines are skipped whole as in core.parser.
+_MEMBER_TOKEN = re.compile(
+    r"(?:" + _SKIP_SOURCE + r"""
+    | (?P<op>==|!=|<=|>=|=>|=)
+    | (?P<punct>[{}()\[\];])
+    )""",
+    re.VERBOSE | re.DOTALL,
+)
+_SPACE_BEFORE = re.compile(r"\s+(?=[<>()\[\].,?*])")
+_SPACE_AFTER = re.compile(r"(?<=[<(\[.])\s+")
+_COMMA = re.compile(r",\s*")
+_IDENTIFIER = re.compile(r"@?[A-Za-z_]\w*\Z")
+_OPERATOR = re.compile(r"\boperator\b")
+_TYPE_KEYWORDS = frozenset(("class", "interface", "struct", "record", "enum", "delegate"))
+
+MEMBER_MODIFIERS = frozenset((
+    "public", "internal", "private", "protected", "static", "abstract", "virtual", "override",
+    "sealed", "readonly", "const", "async", "extern", "new", "partial", "unsafe", "volatile",
+    "required", "event", "fixed", "implicit", "explicit",
+))
+_VISIBILITY_SYMBOLS = {
+    "public": "+",
+    "internal": "~",
+    "protected": "#",
+    "private": "-",
+    "protected internal": "#",
+    "private protected": "-",
+}
+
+
+class Member(NamedTuple):
+    name: str
+    kind: str  # field, property, method, constructor, event or indexer
+    visibility: str
+    type: str | None  # field/property/return type; None for constructors
+    parameters: Tuple[str, ...] | None  # None unless a method, constructor or indexer
+    static: bool
+    abstract: bool
+
+
+def _normalize(text: str) -> str:
+    """
+    One space between words and after commas, none inside <>, () and []
+    brackets or before ? and * (so "Dictionary< int,string >" becomes
+    "Dictionary<int, string>").
+    """
+    text = _SPACE_AFTER.sub("", _SPACE_BEFORE.sub("", " ".join(text.split())))
+    return _COMMA.sub(", ", text)
+
+
+def _split_declarators(text: str) -> List[str]:
+    # Like core.parser._split_top_level, but initializers may hold { } blocks.
+    parts = []
+    depth = 0
+    last = 0
+    for i, ch in enumerate(text):
+        if ch in "<([{":
+            depth += 1
+        elif ch in ">)]}":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            parts.append(text[last:i])
+            last = i + 1
+    parts.append(text[last:])
+    return parts
+
+
+def _split_last(text: str) -> Tuple[str, str]:
+    """
+    (type, name) of a normalized "Type Name" declaration, split at the last
+    space outside <>, () and [].
+    """
+    depth = 0
+    for i in range(len(text) - 1, -1, -1):
+        ch = text[i]
+        if ch in ">)]":
+            depth += 1
+        elif ch in "<([":
+            depth -= 1
+        elif ch == " " and depth == 0:
+            return text[:i], text[i + 1:]
+    return "", text
+
+
+def _matching(text: str, start: int, open_ch: str = "(", close_ch: str = ")") -> int:
+    depth = 0
+    for i in range(start, len(text)):
+        if text[i] == open_ch:
+            depth += 1
+        elif text[i] == close_ch:
+            depth -= 1
+            if depth == 0:
+                return i
+    return len(text)
+
+
+def _parameters(text: str) -> Tuple[str, ...]:
+    """
+    Parameter declarations without attributes or default values.
+    """
+    params = []
+    for param in _split_top_level(text):
+        while param.lstrip().startswith("["):
+            param = param.lstrip()
+            param = param[_matching(param, 0, "[", "]") + 1:]
+        param = param.split("=", 1)[0].strip()
+        if param:
+            params.append(_normalize(param))
+    return tuple(params)
+
+
+def _visibility(modifiers: List[str], default: str) -> str:
+    if "protected" in modifiers and "internal" in modifiers:
+        return "protected internal"
+    if "private" in modifiers and "protected" in modifiers:
+        return "private protected"
+    for name in ("public", "internal", "protected", "private"):
+        if name in modifiers:
+            return name
+    return default
+
+
+def _member(header: str, initializer: str, has_body: bool, type_name: str, default_visibility: str) -> List[Member]:
+    """
+    Members declared by one header (the text before its body, "=" or "=>").
+    initializer holds the remaining text up to ";" for field declarators.
+    """
+    words = header.split()
+    modifiers: List[str] = []
+    while words and words[0] in MEMBER_MODIFIERS:
+        modifiers.append(words.pop(0))
+    rest = " ".join(words)
+    if not rest or rest.startswith("~") or _TYPE_KEYWORDS.intersection(rest.split("(", 1)[0].split()):
+        return []
+    visibility = _visibility(modifiers, default_visibility)
+    static = "static" in modifiers or "const" in modifiers
+    abstract = "abstract" in modifiers
+
+    operator = _OPERATOR.search(rest)
+    if operator is not None:
+        open_paren = rest.find("(", operator.end())
+    else:
+        rest = _normalize(rest)
+        open_paren = -1
+        depth = 0
+        for i, ch in enumerate(rest):
+            if ch in "<[":
+                depth += 1
+            elif ch in ">]":
+                depth -= 1
+            elif ch == "(":
+                if depth == 0 and i > 0 and rest[i - 1] not in "(, ":
+                    open_paren = i
+                    break
+                depth += 1
+            elif ch == ")":
+                depth -= 1
+
+    if open_paren >= 0:
+        close_paren = _matching(rest, open_paren)
+        parameters = _parameters(rest[open_paren + 1:close_paren])
+        signature = rest[:open_paren].strip()
+        if operator is not None:
+            name = " ".join(rest[operator.start():open_paren].split())
+            return_type = _normalize(rest[:operator.start()]) or name.split()[-1]
+            return [Member(name, "method", visibility, return_type, parameters, static, abstract)]
+        return_type, name = _split_last(signature)
+        if not return_type and name.split("<", 1)[0] == type_name:
+            return [Member(name, "constructor", visibility, None, parameters, static, False)]
+        if "." in name:
+            visibility = "public"  # explicit interface implementation
+        return [Member(name, "method", visibility, return_type or None, parameters, static, abstract)]
+
+    member_type, name = _split_last(rest)
+    if not member_type:
+        return []
+    if "." in name:
+        visibility = "public"
+    if name.endswith("]") and name.split("[", 1)[0].rsplit(".", 1)[-1] == "this":
+        bracket = name.index("[")
+        parameters = _parameters(name[bracket + 1:-1])
+        return [Member(name[:bracket], "indexer", visibility, member_type, parameters, static, abstract)]
+    kind = "event" if "event" in modifiers else ("property" if has_body else "field")
+    members = [Member(name, kind, visibility, member_type, None, static, abstract)]
+    if kind != "property":
+        # int a = 1, b; declares one field per top-level declarator.
+        for declarator in _split_declarators(initializer)[1:]:
+            extra = declarator.split("=", 1)[0].strip()
+            if _IDENTIFIER.match(extra):
+                members.append(Member(extra, kind, visibility, member_type, None, static, abstract))
+    return members
+
+
+def scan_members(body: str, type_name: str, kind: str = "class") -> List[Member]:
+    """
+    Members declared directly in body (the text between a type's braces), in
+    source order. Nested types, destructors and anything inside member bodies
+    or initializers are skipped.
+    """
+    default_visibility = "public" if kind == "interface" else "private"
+    members: List[Member] = []
+    start = 0  # where the current member's text begins
+    cuts: List[Tuple[int, int]] = []  # comments and attributes to drop from it
+    header_end = -1  # where its header ends ("=", "=>" or "{"), -1 until then
+    initializer = False
+    has_body = False
+    braces = 0
+    parens = 0
+    brackets = 0
+    attribute_start = 0
+
+    def text(a: int, b: int) -> str:
+        pieces = []
+        pos = a
+        for cut_start, cut_end in sorted(cuts):
+            if cut_end <= a or cut_start >= b:
+                continue
+            pieces.append(body[pos:max(pos, cut_start)])
+            pos = max(pos, cut_end)
+        pieces.append(body[pos:b])
+        return " ".join(pieces)
+
+    def finish(end: int) -> None:
+        nonlocal start, cuts, header_end, initializer, has_body
+        header = text(start, end if header_end < 0 else header_end)
+        tail = text(start, end) if initializer else ""
+        if header.strip():
+            members.extend(_member(header, tail, has_body, type_name, default_visibility))
+        start = end + 1
+        cuts = []
+        header_end = -1
+        initializer = False
+        has_body = False
+
+    for m in _MEMBER_TOKEN.finditer(body):
+        group = m.lastgroup
+        token_start, token_end = m.span()
+        if group == "comment" or group == "literal":
+            if braces == 0 and header_end < 0:
+                if group == "comment" or body[token_start] == "#":
+                    cuts.append((token_start, token_end))
+            continue
+        token = m.group()
+        if braces:
+            if token == "{":
+                braces += 1
+            elif token == "}":
+                braces -= 1
+                if braces == 0 and not initializer:
+                    finish(token_start)
+            continue
+        if brackets:
+            if token == "[":
+                brackets += 1
+            elif token == "]":
+                brackets -= 1
+                if brackets == 0:
+                    cuts.append((attribute_start, token_end))
+            continue
+        if token == "(":
+            parens += 1
+        elif token == ")":
+            parens -= 1
+        elif parens:
+            continue
+        elif token == "[":
+            if header_end < 0 and not text(start, token_start).strip():
+                brackets = 1
+                attribute_start = token_start
+        elif token == "=" or token == "=>":
+            if header_end < 0:
+                header_end = token_start
+                initializer = True
+                has_body = token == "=>"
+        elif token == "{":
+            braces = 1
+            if header_end < 0:
+                header_end = token_start
+                has_body = True
+        elif token == ";":
+            finish(token_start)
+    return members
+
+
+def record_parameters(header: str, name: str) -> List[Member]:
+    """
+    Public properties declared by a record's primary constructor, given its
+    header text (attributes to the opening brace or semicolon).
+    """
+    simple = name.split("<", 1)[0]
+    match = re.search(r"\b" + re.escape(simple) + r"\b\s*(?:<[^()]*?>)?\s*\(", header)
+    if match is None:
+        return []
+    open_paren = match.end() - 1
+    members = []
+    for param in _parameters(header[open_paren + 1:_matching(header, open_paren)]):
+        param_type, param_name = _split_last(param)
+        if param_type:
+            members.append(Member(param_name, "property", "public", param_type, None, False, False))
+    return members
+
+
+def scan_type_members(file_path: str, decl: TypeDeclaration) -> List[Member]:
+    """
+    Members of decl as declared in file_path, re-reading only its header (for
+    records) and body span. decl must come from a scan of the file as it is now.
+    """
+    type_name = decl.name.split("<", 1)[0]
+    with SourceBuffer(file_path) as source:
+        header = _decode(source.data[decl.start:decl.end]) if decl.kind == "record" else ""
+        body = _decode(source.data[decl.body_start:decl.body_end]) if decl.body_start >= 0 else ""
+    members = record_parameters(header, decl.name) if header else []
+    return members + scan_members(body, type_name, decl.kind)
+
+
+def _mermaid_type(text: str) -> str:
+    return text.replace("<", "~").replace(">", "~")
+
+
+def render_members(class_name: str, members: List[Member]) -> List[str]:
+    """
+    "Class : member" Mermaid lines: +public -private #protected ~internal,
+    $ static, * abstract.
+    """
+    lines = []
+    for member in members:
+        symbol = _VISIBILITY_SYMBOLS[member.visibility]
+        name = _mermaid_type(member.name)
+        if member.parameters is None:
+            line = f"{symbol}{_mermaid_type(member.type)} {name}"
+            if member.static:
+                line += "$"
+        else:
+            params = ", ".join(_mermaid_type(p) for p in member.parameters)
+            brackets = "[]" if member.kind == "indexer" else "()"
+            line = f"{symbol}{name}{brackets[0]}{params}{brackets[1]}"
+            if member.static:
+                line += "$"
+            elif member.abstract:
+                line += "*"
+            if member.type:
+                line += f" {_mermaid_type(member.type)}"
+        lines.append(f"{class_name} : {line}")
+    return lines
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Literal
 
 class DiagramItem(BaseModel):
     """
@@ -23,6 +23,14 @@ class BulkDiagramResponse(BaseModel):
     truncated: bool = Field(False, description="True if stopped early due to max_files")
     total_scanned: int = Field(0, description="Total .cs files found before limit")
 
+class BulkDiagramSummary(BaseModel):
+    """
+    Closing record of a streamed bulk response, sent after the last DiagramItem.
+    """
+    processed: int = Field(..., description="Number of files processed")
+    truncated: bool = Field(False, description="True if stopped early due to max_files")
+    total_scanned: int = Field(0, description="Total .cs files found before limit")
+
 class BatchCreateClassDiagramRequest(BaseModel):
     """
     Format of request to retrieve one or more mermaid diagrams from source code given a path (file path or filename), or from the current workspace 
@@ -31,4 +39,161 @@ class BatchCreateClassDiagramRequest(BaseModel):
     max_files: int | None = Field(10, ge=1, le=1000)
     include_interfaces: bool | None = True # note - likely to deprecate
     include_abstracts: bool | None = True
+    project: str | None = Field(None, description="Only files compiled into this project (name from the .sln, or .csproj path relative to folder_path)")
+    max_bytes: int | None = Field(None, ge=256, description="Stop adding diagrams once their text would exceed this many bytes (sets truncated)")
+    max_tokens: int | None = Field(None, ge=64, description="Same as max_bytes, in estimated model tokens")
+    merge: bool = Field(False, description="Return one diagram for all files with repeated classes, edges and notes removed")
+    compact: bool = Field(False, description="Plain newlines, no indentation, one line per abstract class")
+
+class ProjectInfo(BaseModel):
+    """
+    One .csproj found under a folder, with the number of .cs files compiled into it.
+    """
+    name: str = Field(..., description="Project name from the .sln, else the .csproj file name")
+    path: str = Field(..., description=".csproj path relative to the folder")
+    sdk: bool = Field(..., description="SDK-style project (default **/*.cs globbing)")
+    files: int = Field(..., description="Number of .cs files compiled into the project")
 
+class ProjectListResponse(BaseModel):
+    """
+    Format of response listing the solutions and projects under a folder.
+    """
+    solutions: List[str] = Field(default_factory=list, description=".sln paths relative to the folder")
+    projects: List[ProjectInfo] = Field(default_factory=list, description="Projects usable as BatchCreateClassDiagramRequest.project")
+
+
+class DiagramBatchEntry(BaseModel):
+    """
+    One entry of a batch request: a file path or glob, with optional per-entry render options.
+    """
+    path: str = Field(..., description="File path or glob (e.g. Player/**/*.cs), relative to root unless absolute")
+    include_interfaces: bool | None = Field(None, description="Overrides the request-level option for these files")
+    include_abstracts: bool | None = Field(None, description="Overrides the request-level option for these files")
+
+class DiagramBatchRequest(BaseModel):
+    """
+    Format of request to retrieve mermaid diagrams for a list of specific files, paths or globs, in one call.
+    """
+    paths: List[str | DiagramBatchEntry] = Field(..., min_length=1, max_length=500, description="File paths or globs; duplicates are parsed once")
+    root: str | None = Field("/workspace/src", description="Folder that relative paths and globs are resolved against")
+    max_files: int | None = Field(100, ge=1, le=1000, description="Upper bound on resolved files")
+    include_interfaces: bool | None = True
+    include_abstracts: bool | None = True
+
+class DiagramBatchResult(BaseModel):
+    """
+    Outcome for one resolved file (or for a path/glob that resolved to nothing): a diagram or an error.
+    """
+    file: str = Field(..., description="Path relative to root, or the requested path when it could not be resolved")
+    mermaid: str | None = Field(None, description="Pure Mermaid classDiagram code")
+    error: str | None = Field(None, description="Why this entry has no diagram")
+
+class DiagramBatchResponse(BaseModel):
+    """
+    Format of response to a batch request; one result per resolved file or unmatched entry, in request order.
+    """
+    content: List[DiagramBatchResult] = Field(..., description="Diagrams and per-entry errors")
+    processed: int = Field(..., description="Number of files rendered")
+    failed: int = Field(0, description="Number of entries that produced an error")
+    truncated: bool = Field(False, description="True if resolution stopped at max_files")
+    total_matched: int = Field(0, description="Distinct files the paths and globs resolved to")
+
+class TypeDiagramRequest(BaseModel):
+    """
+    Format of request to retrieve one merged mermaid diagram from the workspace type index: a type and its relatives, a namespace, or the whole project.
+    """
+    folder_path: str | None = Field("/workspace/src", description="Workspace root to index")
+    type_name: str | None = Field(None, description="Type to centre the diagram on; omit for a namespace or the whole project")
+    namespace: str | None = Field(None, description="Namespace (including nested namespaces) to diagram")
+    relation: Literal["ancestors", "descendants", "both"] = Field("both", description="Which relatives of type_name to include")
+    depth: int | None = Field(None, ge=1, le=50, description="Maximum inheritance hops from type_name; unlimited if omitted")
+    include_abstracts: bool | None = True
+
+class TypeMembersRequest(BaseModel):
+    """
+    Format of request to expand one type from the workspace type index to its members (bulk diagrams only outline types).
+    """
+    folder_path: str | None = Field("/workspace/src", description="Workspace root to index")
+    type_name: str = Field(..., description="Type to expand; namespace qualification and generic arguments are ignored")
+    file: str | None = Field(None, description="Only the declaration in this file (relative to folder_path), e.g. one part of a partial class")
+    include_private: bool | None = Field(True, description="Also list private members")
+
+class TypeMember(BaseModel):
+    """
+    One field, property, method, constructor, event or indexer of a type.
+    """
+    name: str = Field(..., description="Member name; \"this\" for indexers, \"operator +\" for operators")
+    kind: Literal["field", "property", "method", "constructor", "event", "indexer"]
+    visibility: Literal["public", "internal", "protected", "private", "protected internal", "private protected"]
+    type: str | None = Field(None, description="Field or property type, or return type; absent for constructors")
+    parameters: List[str] | None = Field(None, description="Parameter declarations of methods, constructors and indexers")
+    static: bool = False
+    abstract: bool = False
+    file: str = Field(..., description="Declaring file relative to folder_path")
+
+class TypeMembersResponse(BaseModel):
+    """
+    Format of response expanding one type: its members and a classDiagram with them.
+    """
+    type_name: str = Field(..., description="Type as declared (with generic parameters)")
+    files: List[str] = Field(..., description="Files declaring the type (several for partial types)")
+    members: List[TypeMember] = Field(default_factory=list, description="Members in declaration order")
+    mermaid: str = Field(..., description="Pure Mermaid classDiagram code: the type's outline plus one line per member")
+
+class CacheStats(BaseModel):
+    """
+    Counters of the per-file diagram cache.
+    """
+    entries: int = Field(..., description="Diagrams currently held in memory")
+    max_entries: int = Field(..., description="Upper bound of in-memory diagrams before LRU eviction")
+    hits: int = Field(0, description="Lookups answered from memory, the shared store or disk")
+    misses: int = Field(0, description="Lookups that required parsing the file")
+    evictions: int = Field(0, description="Diagrams dropped from memory by the LRU bound")
+    disk_hits: int = Field(0, description="Hits served from the on-disk store")
+    disk_enabled: bool = Field(False, description="True if the on-disk store is configured")
+    disk_evictions: int = Field(0, description="Files deleted from the on-disk store by its LRU bound")
+    store_hits: int = Field(0, description="Hits served from the shared result store")
+    store_enabled: bool = Field(False, description="True if RESULT_STORE_PATH is configured")
+
+class StoreStats(BaseModel):
+    """
+    Counters of the shared result store (SQLite, WAL mode) for this process.
+    """
+    path: str = Field(..., description="Database file shared by workers and containers")
+    entries: int = Field(..., description="Results currently stored (all processes)")
+    bytes: int = Field(..., description="Compressed size of the stored results")
+    max_bytes: int = Field(..., description="Size above which least recently used results are evicted")
+    hits: int = Field(0, description="Reads answered from the store by this process")
+    misses: int = Field(0, description="Reads that found nothing (or only an expired result)")
+    writes: int = Field(0, description="Results written by this process")
+    evictions: int = Field(0, description="Results evicted by this process")
+    errors: int = Field(0, description="Reads or writes that failed (e.g. database busy)")
+
+class LimiterStats(BaseModel):
+    """
+    Load on the bounded pool that runs blocking work off the event loop.
+    """
+    max_concurrency: int = Field(..., description="Jobs allowed to run at once")
+    in_flight: int = Field(0, description="Jobs currently running")
+    queue_depth: int = Field(0, description="Requests waiting for a free slot")
+    peak_queue_depth: int = Field(0, description="Highest queue depth observed")
+    completed: int = Field(0, description="Jobs finished since startup")
+
+class WatcherStats(BaseModel):
+    """
+    State of the background filesystem watcher.
+    """
+    mode: Literal["native", "polling"] = Field(..., description="inotify events or periodic re-stat")
+    roots: List[str] = Field(..., description="Watched workspace roots")
+    ready: bool = Field(False, description="True once the startup warm-up finished")
+    events: int = Field(0, description="File change events handled")
+    reparsed: int = Field(0, description="Files parsed by the watcher, including warm-up")
+
+class ServiceStats(BaseModel):
+    """
+    Runtime counters of the diagram service.
+    """
+    cache: CacheStats
+    limiter: LimiterStats
+    watcher: WatcherStats | None = Field(None, description="Absent when MERMAID_WATCH_ROOTS is unset")
+    store: StoreStats | None = Field(None, description="Absent when RESULT_STORE_PATH is unset")
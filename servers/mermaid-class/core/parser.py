@@ -1,55 +1,458 @@
 import re
 import os
-from .utils import _strip_generics, _strip_comments, logger
+import sys
+import threading
+from typing import Callable, Dict, List, NamedTuple, Tuple
+from .reader import Source, SourceBuffer, sniff_encoding
+from .utils import _strip_generics, logger
 
-def generate_mermaid_from_csharp(
-    file_path: str,
+MODIFIERS = frozenset((
+    "public", "internal", "private", "protected", "new",
+    "abstract", "sealed", "partial", "static", "unsafe", "readonly", "ref", "file",
+))
+DECLARATION_KEYWORDS = frozenset(("class", "interface", "struct", "record"))
+
+# Comments, string/char literals and preprocessor lines, consumed whole so
+# nothing inside them can look like code (also used by core.members).
+_SKIP_SOURCE = r"""
+      (?P<comment>//[^\n]*|/\*.*?(?:\*/|\Z))
+    | (?P<literal>
+        \$*(?P<raw>"{3,}).*?(?:(?P=raw)|\Z)
+      | (?:@\$|\$@|@)"(?:[^"]|"")*"?
+      | \$+"(?:[^"\\\n{]|\\.|\{\{|\{(?:[^{}"\n]|"(?:[^"\\\n]|\\.)*")*\})*"?
+      | "(?:[^"\\\n]|\\.)*"?
+      | '(?:[^'\\\n]|\\.)*'?
+      | \#[^\n]*
+    )"""
+
+# One alternation, scanned left to right exactly once. Every token that
+# matters besides the skipped spans is a single keyword or punctuation
+# character. Each branch is linear (no nested quantifiers) and the leading
+# lookahead lets the engine skip uninteresting characters quickly.
+_TOKEN_SOURCE = r"""
+    (?=[/"'@$\#\[\]{};a-z])
+    (?:""" + _SKIP_SOURCE + r"""
+    | (?P<word>(?:public|internal|private|protected|new|abstract|sealed|partial|static
+        |unsafe|readonly|ref|file|class|interface|struct|record|namespace)\b)
+    | (?P<punct>[\[\]{};])
+    )
+    """
+_TOKEN_PATTERN = re.compile(_TOKEN_SOURCE, re.VERBOSE | re.DOTALL)
+_SKIP_PATTERN = re.compile(r"""(?=[/"'@$\#])(?:""" + _SKIP_SOURCE + ")", re.VERBOSE | re.DOTALL)
+_NAME_PATTERN = re.compile(r"\s+(?:(?:class|struct)\s+)?(@?[A-Za-z_]\w*)(\s*<[^<>{};]*>)?")
+_NAMESPACE_PATTERN = re.compile(r"\s+(@?[A-Za-z_][\w.]*)")
+_WHERE_PATTERN = re.compile(r"\bwhere\b")
+
+# The same grammar over undecoded bytes (UTF-8 or any other ASCII superset).
+# Bytes >= 0x80 can only be part of an identifier, so they count as word
+# characters wherever \w does.
+_TOKEN_PATTERN_BYTES = re.compile(
+    _TOKEN_SOURCE.replace(r"namespace)\b)", r"namespace)\b(?![\x80-\xff]))").encode("ascii"),
+    re.VERBOSE | re.DOTALL,
+)
+_NAME_PATTERN_BYTES = re.compile(rb"\s+(?:(?:class|struct)\s+)?(@?[A-Za-z_\x80-\xff][\w\x80-\xff]*)(\s*<[^<>{};]*>)?")
+_NAMESPACE_PATTERN_BYTES = re.compile(rb"\s+(@?[A-Za-z_\x80-\xff][\w.\x80-\xff]*)")
+_WORD_BYTES = frozenset(b"_@0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ") | frozenset(range(0x80, 0x100))
+# Every keyword/punctuation token the bytes pattern can return, already decoded.
+_BYTES_TOKENS = {
+    token.encode("ascii"): token
+    for token in MODIFIERS | DECLARATION_KEYWORDS | {"namespace", "[", "]", "{", "}", ";"}
+}
+
+# How often (in bytes scanned) scan_declarations reports progress to release.
+_RELEASE_STRIDE = 4 * 1024 * 1024
+
+_BOUNDARY, _MODIFIER, _ATTRIBUTE_END, _OTHER = range(4)
+
+
+class TypeDeclaration(NamedTuple):
+    """
+    A class/interface/struct/record header found by scan_declarations.
+    start/end are offsets of the header (first attribute to the opening brace);
+    body_start/body_end of the text between the braces (-1 without a body).
+    """
+    name: str
+    kind: str
+    modifiers: Tuple[str, ...]
+    attributes: Tuple[str, ...]
+    bases: Tuple[str, ...]
+    generic_arity: int
+    namespace: str
+    start: int
+    end: int
+    body_start: int = -1
+    body_end: int = -1
+
+
+def _decode(text: str | bytes) -> str:
+    """
+    Text of a slice taken from the source; bytes are UTF-8 unless they are
+    not valid UTF-8, in which case they come from legacy (cp1252) code.
+    """
+    if isinstance(text, str):
+        return text
+    try:
+        return text.decode("utf-8")
+    except UnicodeDecodeError:
+        return text.decode("cp1252", errors="replace")
+
+
+def _cut(text: str | bytes, offset: int, cuts: List[Tuple[int, int]]) -> str:
+    """
+    Removes the absolute spans in cuts (comments) from text, which starts at
+    offset, and returns the remainder decoded.
+    """
+    if not cuts:
+        return _decode(text)
+    pieces = []
+    pos = 0
+    for start, end in cuts:
+        pieces.append(text[pos:start - offset])
+        pos = end - offset
+    pieces.append(text[pos:])
+    return _decode((b" " if isinstance(text, bytes) else " ").join(pieces))
+
+
+def strip_comments(code: str) -> str:
+    """
+    code without // and /* */ comments. Unlike utils._strip_comments, text
+    that only looks like a comment inside string/char literals (URLs, "/*"
+    in a format string) or on preprocessor lines is kept.
+    """
+    return _SKIP_PATTERN.sub(lambda m: "" if m.lastgroup == "comment" else m.group(), code)
+
+
+def _split_top_level(text: str) -> List[str]:
+    parts = []
+    depth = 0
+    last = 0
+    for i, ch in enumerate(text):
+        if ch in "<([":
+            depth += 1
+        elif ch in ">)]":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            parts.append(text[last:i])
+            last = i + 1
+    parts.append(text[last:])
+    return parts
+
+
+def _parse_bases(header: str) -> Tuple[str, ...]:
+    """
+    Extracts the base list from the text between a type name and its body,
+    skipping a record's primary constructor and any generic constraints.
+    """
+    header = header.strip()
+    if header.startswith("("):
+        depth = 0
+        for i, ch in enumerate(header):
+            if ch == "(":
+                depth += 1
+            elif ch == ")":
+                depth -= 1
+                if depth == 0:
+                    header = header[i + 1:].lstrip()
+                    break
+    if not header.startswith(":"):
+        return ()
+
+    base_list = header[1:]
+    where = _WHERE_PATTERN.search(base_list)
+    if where:
+        base_list = base_list[:where.start()]
+
+    bases = []
+    for base in _split_top_level(base_list):
+        base = base.split("(", 1)[0]
+        base = " ".join(base.split())
+        if base:
+            bases.append(base)
+    return tuple(bases)
+
+
+def scan_declarations(
+    code: Source,
+    pos: int = 0,
+    endpos: int | None = None,
+    release: Callable[[int], None] | None = None,
+) -> List[TypeDeclaration]:
+    """
+    Single-pass lexer over C# source returning type declarations in source order.
+    Runs in time linear in len(code).
+
+    code may be a str or, without decoding, bytes or an mmap (start/end are
+    then byte offsets). Only code[pos:endpos] is scanned. release, if given,
+    is called every few MB with the current offset; nothing before that
+    offset minus a small margin is looked at again.
+    """
+    binary = not isinstance(code, str)
+    if binary:
+        token_pattern, name_pattern, namespace_pattern = _TOKEN_PATTERN_BYTES, _NAME_PATTERN_BYTES, _NAMESPACE_PATTERN_BYTES
+    else:
+        token_pattern, name_pattern, namespace_pattern = _TOKEN_PATTERN, _NAME_PATTERN, _NAMESPACE_PATTERN
+    next_release = _RELEASE_STRIDE if release is not None else sys.maxsize
+
+    declarations: List[TypeDeclaration] = []
+    state = _BOUNDARY
+    prev_end = pos
+    pending_modifiers: List[str] = []
+    pending_attributes: List[str] = []
+    decl_start = -1
+
+    attribute_depth = 0
+    attribute_start = 0
+    attribute_cuts: List[Tuple[int, int]] = []
+
+    header = None  # (name, kind, generic_arity, header_start)
+    header_cuts: List[Tuple[int, int]] = []
+
+    depth = 0
+    open_bodies: List[Tuple[int, int]] = []  # (index in declarations, depth of its body)
+    namespaces: List[Tuple[str, int]] = []  # (name, depth of its body)
+    file_namespace = ""
+    pending_namespace = None
+
+    endpos = len(code) if endpos is None else endpos
+    for m in token_pattern.finditer(code, pos, endpos):
+        kind = m.lastgroup
+        start, end = m.span()
+        if start >= next_release:
+            release(start)
+            next_release = start + _RELEASE_STRIDE
+
+        if kind == "comment" or kind == "literal":
+            if kind == "comment":
+                if attribute_depth:
+                    attribute_cuts.append((start, end))
+                elif header is not None:
+                    header_cuts.append((start, end))
+            if not attribute_depth and header is None and state != _OTHER and code[prev_end:start].strip():
+                state = _OTHER
+            prev_end = end
+            continue
+
+        token = m.group()
+        if kind == "word" and start > pos:
+            prev = code[start - 1]
+            if (prev in _WORD_BYTES) if binary else (prev.isalnum() or prev in "_@"):
+                continue
+        if binary:
+            token = _BYTES_TOKENS[token]
+
+        if attribute_depth:
+            if token == "[":
+                attribute_depth += 1
+            elif token == "]":
+                attribute_depth -= 1
+                if not attribute_depth:
+                    text = _cut(code[attribute_start:start], attribute_start, attribute_cuts).strip()
+                    if text and not text.startswith(("assembly:", "module:")):
+                        pending_attributes.append(" ".join(text.split()))
+                    attribute_cuts = []
+                    state = _ATTRIBUTE_END
+            prev_end = end
+            continue
+
+        if header is not None:
+            if token == "{" or token == ";":
+                if token == "{":
+                    depth += 1
+                    open_bodies.append((len(declarations), depth))
+                name, decl_kind, arity, header_start = header
+                text = _cut(code[header_start:start], header_start, header_cuts)
+                declarations.append(TypeDeclaration(
+                    name=name,
+                    kind=decl_kind,
+                    modifiers=tuple(pending_modifiers),
+                    attributes=tuple(pending_attributes),
+                    bases=_parse_bases(text),
+                    generic_arity=arity,
+                    namespace=".".join(([file_namespace] if file_namespace else []) + [n for n, _ in namespaces]),
+                    start=decl_start,
+                    end=start,
+                    body_start=end if token == "{" else -1,
+                ))
+                header = None
+                header_cuts = []
+                pending_modifiers = []
+                pending_attributes = []
+                state = _BOUNDARY
+            prev_end = end
+            continue
+
+        contiguous = state != _OTHER and not code[prev_end:start].strip()
+        if not contiguous:
+            state = _OTHER
+            pending_modifiers = []
+            pending_attributes = []
+        prev_end = end
+
+        if token == "{" or token == "}" or token == ";":
+            if token == "{":
+                depth += 1
+                if pending_namespace is not None:
+                    namespaces.append((pending_namespace, depth))
+            elif token == "}":
+                depth -= 1
+                while namespaces and namespaces[-1][1] > depth:
+                    namespaces.pop()
+                while open_bodies and open_bodies[-1][1] > depth:
+                    i = open_bodies.pop()[0]
+                    declarations[i] = declarations[i]._replace(body_end=start)
+            elif pending_namespace is not None:
+                file_namespace = pending_namespace
+            pending_namespace = None
+            state = _BOUNDARY
+            pending_modifiers = []
+            pending_attributes = []
+        elif token == "[":
+            if contiguous:
+                if state == _BOUNDARY:
+                    decl_start = start
+                attribute_depth = 1
+                attribute_start = end
+            else:
+                state = _OTHER
+        elif token == "]":
+            state = _OTHER
+        elif token in MODIFIERS:
+            if contiguous:
+                if state == _BOUNDARY:
+                    decl_start = start
+                pending_modifiers.append(token)
+                state = _MODIFIER
+        elif token == "namespace":
+            name_match = namespace_pattern.match(code, end) if contiguous else None
+            if name_match is not None:
+                pending_namespace = _decode(name_match.group(1)).lstrip("@")
+                prev_end = name_match.end()
+            state = _OTHER
+        elif contiguous:
+            name_match = name_pattern.match(code, end)
+            if name_match is None:
+                state = _OTHER
+                continue
+            if state == _BOUNDARY:
+                decl_start = start
+            generics = _decode(name_match.group(2) or "")
+            arity = len(_split_top_level(generics.strip()[1:-1])) if generics else 0
+            header = (_decode(name_match.group(1)).lstrip("@") + generics.strip(), token, arity, name_match.end())
+            prev_end = name_match.end()
+
+    # Bodies left open by a truncated or malformed file run to the end.
+    for i, _ in open_bodies:
+        declarations[i] = declarations[i]._replace(body_end=endpos)
+    return declarations
+
+
+def render_declaration(decl: TypeDeclaration, include_abstracts: bool = True) -> List[str]:
+    """
+    Mermaid lines for one declaration: the node, its abstract marker,
+    inheritance edges and attribute notes.
+    """
+    class_name = _strip_generics(decl.name)
+    lines = [f"class {class_name}"]
+    if include_abstracts and "abstract" in decl.modifiers:
+        lines.append(f"class {class_name} {{ <<abstract>> }}")
+
+    for base in decl.bases:
+        if not base.startswith("{"):
+            clean_base = _strip_generics(base)
+            lines.append(f"{clean_base} <|-- {class_name}")
+
+    for attr in decl.attributes:
+        lines.append(f'  note for {class_name} "{attr}"')
+    return lines
+
+
+def render_mermaid(
+    declarations: List[TypeDeclaration],
+    file_name: str,
     include_interfaces: bool = True,
     include_abstracts: bool = True,
 ) -> str:
-    logger.info(f"attempting read of {file_path}")
-    if not os.path.isfile(file_path):
-        raise ValueError(f"Not a file: {file_path}")
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            code = f.read()
-    except Exception as e:
-        raise RuntimeError(f"Cannot read file: {e}")
-
-    mermaid = [
-        "classDiagram",
-        f"%% File: {os.path.basename(file_path)}",
-    ]
-
-    full_pattern = re.compile(
-        r'^\s*((?:\[[^\]]+\]\s*(?:\n\s*)?)*)'
-        r'(?:public|internal|private|protected|protected\s+internal|private\s+protected)?\s*'
-        r'(?:new\s+)?((?:abstract|sealed|partial|static|unsafe|readonly|ref|file)\s*)*'
-        r'(class|interface|struct|record)\s+'
-        r'(\w+(?:<[^>]+>)?)'
-        r'(?:\s*:\s*([^}{\n]+(?:\n\s*[^}{\n]+)*))?',
-        re.MULTILINE
-    )
-    attribute_pattern = re.compile(r"^\s*\[([^\]]+)\]\s*")
+    return CSharpParser(include_interfaces, include_abstracts).render(declarations, file_name)
+
+
+class CSharpParser:
+    """
+    C# source to Mermaid classDiagram, independent of where the source comes
+    from: the compiled patterns above, the render options and one output
+    buffer reused across calls. parse_text/parse_bytes never touch the
+    filesystem; parse_file reads through core.reader.SourceBuffer.
 
-    for m in full_pattern.finditer(code):
-        modifiers = _strip_comments(m.group(2)) or ""
-        class_name = _strip_generics(m.group(4))
-        bases = _strip_comments(m.group(5))
-        raw_attribs = _strip_comments(m.group(1))
+    An instance is not thread-safe; get_parser hands out one per thread.
+    """
 
-        mermaid.append(f"class {class_name}")
-        if include_abstracts and "abstract" in modifiers:
-            mermaid.append(f"class {class_name} {{ <<abstract>> }}")
+    def __init__(self, include_interfaces: bool = True, include_abstracts: bool = True):
+        self.include_interfaces = include_interfaces
+        self.include_abstracts = include_abstracts
+        self._lines: List[str] = []
 
-        if bases:
-            for base in [b.strip() for b in bases.split(",")]:
-                if base and not base.startswith("{"):
-                    clean_base = _strip_generics(base.split()[-1])
-                    mermaid.append(f"{clean_base} <|-- {class_name}")
+    def declarations_text(self, text: str) -> List[TypeDeclaration]:
+        return scan_declarations(text, 1 if text.startswith("\ufeff") else 0)
 
-        for attr in attribute_pattern.findall(raw_attribs):
-            # clean = attr.strip().replace('"', "'")
-            mermaid.append(f'  note for {class_name} "{attr}"')
+    def declarations_bytes(self, data: bytes) -> List[TypeDeclaration]:
+        """
+        Declarations of an encoded file image: BOMs and UTF-16/32 are handled
+        as SourceBuffer does; anything else is scanned without decoding.
+        """
+        encoding, offset = sniff_encoding(data[:4])
+        if encoding.startswith(("utf-16", "utf-32")):
+            return scan_declarations(data[offset:].decode(encoding, errors="replace"))
+        return scan_declarations(data, offset)
 
-    return " \n ".join(mermaid)
+    def render(self, declarations: List[TypeDeclaration], file_name: str) -> str:
+        lines = self._lines
+        lines.clear()
+        lines.append("classDiagram")
+        lines.append(f"%% File: {file_name}")
+        for decl in declarations:
+            lines.extend(render_declaration(decl, include_abstracts=self.include_abstracts))
+        return " \n ".join(lines)
+
+    def parse_text(self, text: str, file_name: str = "") -> str:
+        return self.render(self.declarations_text(text), file_name)
+
+    def parse_bytes(self, data: bytes, file_name: str = "") -> str:
+        return self.render(self.declarations_bytes(data), file_name)
+
+    def parse_file(self, file_path: str) -> str:
+        return self.render(scan_file(file_path), os.path.basename(file_path))
+
+
+_parsers = threading.local()
+
+def get_parser(include_interfaces: bool = True, include_abstracts: bool = True) -> CSharpParser:
+    """
+    This thread's CSharpParser for the given options, created on first use
+    so pool workers keep theirs for their whole lifetime.
+    """
+    cache: Dict[Tuple[bool, bool], CSharpParser] | None = getattr(_parsers, "by_options", None)
+    if cache is None:
+        cache = _parsers.by_options = {}
+    key = (bool(include_interfaces), bool(include_abstracts))
+    parser = cache.get(key)
+    if parser is None:
+        parser = cache[key] = CSharpParser(*key)
+    return parser
+
+
+def scan_file(file_path: str) -> List[TypeDeclaration]:
+    """
+    Declarations of one file, scanned in place through core.reader.SourceBuffer.
+    Raises ValueError for missing or (policy "skip") oversized files and
+    RuntimeError when the file cannot be read.
+    """
+    logger.info(f"attempting read of {file_path}")
+    with SourceBuffer(file_path) as source:
+        return scan_declarations(source.data, source.offset, source.end, source.release)
+
+
+def generate_mermaid_from_csharp(
+    file_path: str,
+    include_interfaces: bool = True,
+    include_abstracts: bool = True,
+) -> str:
+    return get_parser(include_interfaces, include_abstracts).parse_file(file_path)
@@ -1,25 +1,191 @@
 # core/processor.py
+import glob
 import os
 import pathlib
-from typing import List
+import time
+from concurrent.futures import BrokenExecutor
+from itertools import islice
+from typing import Dict, Iterator, List, Tuple
 
-from .models import DiagramItem, BulkDiagramResponse
+from shared.telemetry import metrics
+
+from .budget import MergedDiagram, ResponseBudget, compact_mermaid
+from .cache import diagram_cache, make_cache_key
+from .models import (
+    DiagramItem,
+    BulkDiagramResponse,
+    BulkDiagramSummary,
+    DiagramBatchEntry,
+    DiagramBatchResponse,
+    DiagramBatchResult,
+)
 from .parser import generate_mermaid_from_csharp
+from .projects import get_project_catalog
 from .utils import normalize_path, logger
+from .walker import SKIP_DIRS, is_source_name, iter_source_files
+from .workers import DEFAULT_WORKERS, discard_executor, get_executor
 
-def process_folder_bulk(
+files_parsed = metrics.counter("mermaid_files_parsed_total", "Files parsed (cache misses), by outcome.", ("outcome",))
+parse_seconds = metrics.histogram("mermaid_parse_duration_seconds", "Time to parse and render one file.")
+
+def _render_timed(file_path: str, include_interfaces: bool, include_abstracts: bool) -> Tuple[str, float]:
+    """
+    generate_mermaid_from_csharp plus its duration; runs on the pool, so the
+    duration is recorded by the caller in this process.
+    """
+    start = time.perf_counter()
+    diagram = generate_mermaid_from_csharp(file_path, include_interfaces, include_abstracts)
+    return diagram, time.perf_counter() - start
+
+def render_file_cached(
+    file_path: str,
+    include_interfaces: bool,
+    include_abstracts: bool,
+) -> str:
+    """
+    Returns the diagram for file_path, parsing only when the file's stat
+    metadata or the render flags differ from the cached entry.
+    """
+    outcome = render_files(
+        [file_path],
+        include_interfaces=include_interfaces,
+        include_abstracts=include_abstracts,
+        workers=1,
+    )[0]
+    if isinstance(outcome, Exception):
+        raise outcome
+    return outcome
+
+def render_files(
+    file_paths: List[str],
+    include_interfaces: bool,
+    include_abstracts: bool,
+    workers: int | None = None,
+    executor: str | None = None,
+) -> List[str | Exception]:
+    """
+    Renders file_paths in order. Each slot holds either the diagram or the
+    ValueError/RuntimeError raised for it.
+    """
+    return list(iter_render_files(file_paths, include_interfaces, include_abstracts, workers, executor))
+
+def iter_render_files(
+    file_paths: List[str],
+    include_interfaces: bool,
+    include_abstracts: bool,
+    workers: int | None = None,
+    executor: str | None = None,
+) -> Iterator[str | Exception]:
+    """
+    Yields one outcome per path, in order, as soon as it is available.
+    Cache hits are answered in this process; misses are parsed on the shared
+    pool when there is more than one of them.
+    """
+    workers = workers or DEFAULT_WORKERS
+    results: List[str | Exception | None] = [None] * len(file_paths)
+    pending: List[Tuple[int, str, tuple]] = []
+
+    for i, file_path in enumerate(file_paths):
+        try:
+            stat = os.stat(file_path)
+        except OSError as exc:
+            results[i] = ValueError(f"Not a file: {file_path} ({exc})")
+            continue
+        key = make_cache_key(file_path, stat, include_interfaces, include_abstracts)
+        diagram = diagram_cache.get(key)
+        if diagram is None:
+            pending.append((i, file_path, key))
+        else:
+            results[i] = diagram
+
+    futures = []
+    if workers > 1 and len(pending) > 1:
+        try:
+            pool = get_executor(executor, workers)
+            futures = [
+                pool.submit(_render_timed, file_path, include_interfaces, include_abstracts)
+                for _, file_path, _ in pending
+            ]
+        except BrokenExecutor as exc:
+            logger.warning(f"Parse pool unavailable, parsing inline: {exc}")
+            discard_executor(executor, workers)
+            futures = []
+
+    emitted = 0
+    for n, (i, file_path, key) in enumerate(pending):
+        while emitted < i:
+            yield results[emitted]
+            emitted += 1
+        try:
+            if futures:
+                try:
+                    diagram, elapsed = futures[n].result()
+                except BrokenExecutor as exc:
+                    logger.warning(f"Parse pool failed on {file_path}, parsing inline: {exc}")
+                    discard_executor(executor, workers)
+                    futures = []
+                    diagram, elapsed = _render_timed(file_path, include_interfaces, include_abstracts)
+            else:
+                diagram, elapsed = _render_timed(file_path, include_interfaces, include_abstracts)
+        except (ValueError, RuntimeError) as exc:
+            files_parsed.inc(outcome="error")
+            results[i] = exc
+        else:
+            files_parsed.inc(outcome="ok")
+            parse_seconds.observe(elapsed)
+            diagram_cache.put(key, diagram)
+            results[i] = diagram
+
+    while emitted < len(results):
+        yield results[emitted]
+        emitted += 1
+
+def is_source_file(folder: str, file: str) -> bool:
+    """
+    True for hand-written .cs files: not generated (.g.cs) and not under a
+    SKIP_DIRS directory. folder is taken relative to the root being searched.
+    """
+    return is_source_name(file) and not SKIP_DIRS.intersection(pathlib.PurePath(folder).parts)
+
+def iter_cs_files(folder_path: str, scanned: List[int] | None = None) -> Iterator[Tuple[str, str]]:
+    """
+    Yields (full_path, relative_posix_path) for each eligible .cs file in walk
+    order (see core.walker.iter_source_files for pruning and ignore rules).
+    scanned[0], if given, counts the .cs files enumerated so far.
+    """
+    for full_path, rel_path in iter_source_files(folder_path):
+        if scanned is not None:
+            scanned[0] += 1
+        yield full_path, rel_path
+
+def iter_folder_bulk(
     folder_path: str,
     max_files: int,
     include_interfaces: bool,
     include_abstracts: bool,
-) -> BulkDiagramResponse:
+    workers: int | None = None,
+    executor: str | None = None,
+    project: str | None = None,
+    budget: ResponseBudget | None = None,
+    compact: bool = False,
+) -> Iterator[DiagramItem | BulkDiagramSummary]:
     """
-    Shared bulk processing logic.
-    Used by both FastAPI and MCP servers.
+    Generator form of process_folder_bulk: yields each DiagramItem as soon as
+    it is rendered, then a single BulkDiagramSummary as the last element.
+
+    Files are parsed in windows of the number still needed, fanned out to the
+    shared pool (see core.workers), and emitted in walk order. With project,
+    only the files compiled into that project (see core.projects) are
+    considered; an unknown project raises LookupError.
+
+    budget (see core.budget) is charged for every item before it is yielded;
+    the first item that does not fit ends the walk with truncated set, and
+    parsing proceeds in small windows so little work is thrown away.
+    compact emits core.budget.compact_mermaid text.
     """
-    diagrams: List[DiagramItem] = []
     processed = 0
-    total_scanned = 0
+    truncated = False
+    scanned = [0]
     path = normalize_path(folder_path)
 
     if not path.exists():
@@ -27,48 +193,219 @@ def process_folder_bulk(
     if not path.is_dir():
         if path.is_file():
             folder_path = str(path)
-            total_scanned = 1
             try:
-                raw_diagram = generate_mermaid_from_csharp(
+                raw_diagram = render_file_cached(
                     folder_path,
                     include_interfaces=include_interfaces,
                     include_abstracts=include_abstracts,
                 )
-                diagrams.append(DiagramItem(file=folder_path, mermaid=raw_diagram))
-
             except (ValueError, RuntimeError) as exc:
                 raise ValueError(f"File not readable: {folder_path} - {exc}")
 
-            return diagrams[0]
-
+            if compact:
+                raw_diagram = compact_mermaid(raw_diagram)
+            yield DiagramItem(file=folder_path, mermaid=raw_diagram)
+            yield BulkDiagramSummary(processed=1, truncated=max_files <= 1, total_scanned=1)
+            return
 
-    for root, _, files in os.walk(folder_path):
-        total_scanned += 1
-        for file in sorted(files):
-            if file.endswith(".cs") and not file.endswith(".g.cs") and "obj" not in root.split(os.sep):
-                processed += 1
-                full_path = pathlib.Path(root) / file
-                rel_path = full_path.relative_to(folder_path).as_posix()
-                try:
-                    raw_diagram = generate_mermaid_from_csharp(
-                        str(full_path),
-                        include_interfaces=include_interfaces,
-                        include_abstracts=include_abstracts,
-                    )
-                    diagrams.append(DiagramItem(file=rel_path, mermaid=raw_diagram))
-                    processed += 1
-                except (ValueError, RuntimeError) as exc:
-                    logger.warning(f"Skipping {rel_path}: {exc}")
-                    continue
-
-                if processed >= max_files:
-                    break
-        if processed >= max_files:
+    if project:
+        if not path.is_dir():
+            raise ValueError(f"Folder not found: {folder_path}")
+        project_files = get_project_catalog(str(path)).files(project)
+        candidates = iter(project_files)
+        scanned[0] = len(project_files)
+    else:
+        candidates = iter_cs_files(str(path), scanned)
+    window_size = max(1, workers or DEFAULT_WORKERS) * 4 if budget is not None else max_files
+    while processed < max_files and not truncated:
+        window = list(islice(candidates, min(window_size, max_files - processed)))
+        if not window:
             break
+        outcomes = iter_render_files(
+            [full_path for full_path, _ in window],
+            include_interfaces=include_interfaces,
+            include_abstracts=include_abstracts,
+            workers=workers,
+            executor=executor,
+        )
+        for (_, rel_path), outcome in zip(window, outcomes):
+            if isinstance(outcome, Exception):
+                logger.warning(f"Skipping {rel_path}: {outcome}")
+                continue
+            if compact:
+                outcome = compact_mermaid(outcome)
+            if budget is not None and not budget.take(rel_path, outcome):
+                truncated = True
+                break
+            processed += 1
+            yield DiagramItem(file=rel_path, mermaid=outcome)
 
-    return BulkDiagramResponse(
-        content=diagrams,
+    yield BulkDiagramSummary(
         processed=processed,
-        truncated=processed >= max_files,
-        total_scanned=total_scanned,
+        truncated=truncated or processed >= max_files,
+        total_scanned=scanned[0],
+    )
+
+def process_folder_bulk(
+    folder_path: str,
+    max_files: int,
+    include_interfaces: bool,
+    include_abstracts: bool,
+    workers: int | None = None,
+    executor: str | None = None,
+    project: str | None = None,
+    max_bytes: int | None = None,
+    max_tokens: int | None = None,
+    merge: bool = False,
+    compact: bool = False,
+) -> BulkDiagramResponse:
+    """
+    Shared bulk processing logic.
+    Used by both FastAPI and MCP servers.
+
+    A single file path returns its DiagramItem directly. merge returns a
+    single item holding one deduplicated diagram for every file; max_bytes
+    and max_tokens bound the diagram text of the response (see core.budget).
+    """
+    path = normalize_path(folder_path)
+    if merge:
+        budget = MergedDiagram(max_bytes, max_tokens)
+    elif max_bytes is not None or max_tokens is not None:
+        budget = ResponseBudget(max_bytes, max_tokens)
+    else:
+        budget = None
+    records = list(iter_folder_bulk(
+        folder_path,
+        max_files=max_files,
+        include_interfaces=include_interfaces,
+        include_abstracts=include_abstracts,
+        workers=workers,
+        executor=executor,
+        project=project,
+        budget=budget,
+        compact=compact,
+    ))
+    summary = records.pop()
+    if path.is_file():
+        return records[0]
+    if merge:
+        title = f"{path.name} ({project})" if project else path.name
+        records = [DiagramItem(file=str(path), mermaid=budget.render(title))]
+
+    return BulkDiagramResponse(
+        content=records,
+        processed=summary.processed,
+        truncated=summary.truncated,
+        total_scanned=summary.total_scanned,
+    )
+
+def _display_path(full_path: str, root: str) -> str:
+    relative = os.path.relpath(full_path, root)
+    return full_path if relative.startswith("..") else pathlib.PurePath(relative).as_posix()
+
+def resolve_batch_paths(
+    entries: List[str | DiagramBatchEntry],
+    root: str,
+    max_files: int,
+    include_interfaces: bool,
+    include_abstracts: bool,
+) -> Tuple[List[Tuple[str, str, bool, bool]], List[Tuple[int, DiagramBatchResult]], bool]:
+    """
+    Expands paths, folders and globs (relative to root) into distinct source
+    files in request order. Returns (full_path, display, include_interfaces,
+    include_abstracts) per file, an error result for every entry that matched
+    nothing (with the number of files resolved before it, its slot in request
+    order), and whether max_files cut the list short.
+    """
+    resolved: List[Tuple[str, str, bool, bool]] = []
+    errors: List[Tuple[int, DiagramBatchResult]] = []
+    seen = set()
+    truncated = False
+    root = str(normalize_path(root))
+
+    for entry in entries:
+        if isinstance(entry, str):
+            entry = DiagramBatchEntry(path=entry)
+        ii = include_interfaces if entry.include_interfaces is None else entry.include_interfaces
+        ia = include_abstracts if entry.include_abstracts is None else entry.include_abstracts
+        pattern = os.path.join(root, os.path.expanduser(entry.path))
+
+        if glob.has_magic(entry.path):
+            matches = sorted(
+                path for path in glob.glob(pattern, recursive=True)
+                if os.path.isfile(path) and is_source_file(os.path.relpath(os.path.dirname(path), root), os.path.basename(path))
+            )
+        elif os.path.isdir(pattern):
+            matches = [full_path for full_path, _ in iter_cs_files(pattern)]
+        elif os.path.isfile(pattern):
+            matches = [pattern]
+        else:
+            errors.append((len(resolved), DiagramBatchResult(file=entry.path, error=f"Not found: {entry.path}")))
+            continue
+        if not matches:
+            errors.append((len(resolved), DiagramBatchResult(file=entry.path, error=f"No .cs files match {entry.path}")))
+            continue
+
+        for match in matches:
+            full_path = os.path.realpath(match)
+            if (full_path, ii, ia) in seen:
+                continue
+            if len(resolved) >= max_files:
+                truncated = True
+                break
+            seen.add((full_path, ii, ia))
+            resolved.append((full_path, _display_path(full_path, root), ii, ia))
+    return resolved, errors, truncated
+
+def process_batch(
+    entries: List[str | DiagramBatchEntry],
+    root: str,
+    max_files: int,
+    include_interfaces: bool,
+    include_abstracts: bool,
+    workers: int | None = None,
+    executor: str | None = None,
+) -> DiagramBatchResponse:
+    """
+    Diagrams for a list of specific files, folders and globs in one call.
+    Duplicates are parsed once; files sharing the same options are rendered
+    together on the shared pool; a failing file only fails its own entry.
+    """
+    resolved, errors, truncated = resolve_batch_paths(entries, root, max_files, include_interfaces, include_abstracts)
+
+    groups: Dict[Tuple[bool, bool], List[int]] = {}
+    for n, (_, _, ii, ia) in enumerate(resolved):
+        groups.setdefault((ii, ia), []).append(n)
+
+    outcomes: List[str | Exception | None] = [None] * len(resolved)
+    for (ii, ia), members in groups.items():
+        rendered = iter_render_files(
+            [resolved[n][0] for n in members],
+            include_interfaces=ii,
+            include_abstracts=ia,
+            workers=workers,
+            executor=executor,
+        )
+        for n, outcome in zip(members, rendered):
+            outcomes[n] = outcome
+
+    # Entries that matched nothing keep their place among the rendered files.
+    unmatched: List[List[DiagramBatchResult]] = [[] for _ in range(len(resolved) + 1)]
+    for slot, result in errors:
+        unmatched[slot].append(result)
+    content = list(unmatched[0])
+    for n, ((_, display, _, _), outcome) in enumerate(zip(resolved, outcomes)):
+        if isinstance(outcome, Exception):
+            content.append(DiagramBatchResult(file=display, error=str(outcome)))
+        else:
+            content.append(DiagramBatchResult(file=display, mermaid=outcome))
+        content.extend(unmatched[n + 1])
+
+    failed = sum(1 for result in content if result.error is not None)
+    return DiagramBatchResponse(
+        content=content,
+        processed=len(content) - failed,
+        failed=failed,
+        truncated=truncated,
+        total_matched=len(resolved),
     )
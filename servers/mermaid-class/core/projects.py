@@ -0,0 +1,299 @@
+# core/projects.py
+# Which .cs files compile into which project, read from .sln and .csproj files.
+import os
+import re
+import threading
+import time
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterator, List, NamedTuple, Tuple
+
+from .models import ProjectInfo, ProjectListResponse
+from .utils import normalize_path, logger
+from .walker import _translate, _walk_key, iter_source_files
+
+# How long a discovered project map is trusted before the tree is walked
+# again to pick up added or removed sources (edits to .sln/.csproj files
+# are noticed immediately).
+PROJECT_CACHE_SECONDS = float(os.environ.get("MERMAID_PROJECT_CACHE_SECONDS", "30"))
+
+# Project("{type guid}") = "Name", "relative\path.csproj", "{project guid}"
+_SLN_PROJECT = re.compile(r'^Project\("\{[^}]*\}"\)\s*=\s*"([^"]+)"\s*,\s*"([^"]+\.csproj)"', re.MULTILINE)
+_PROPERTY = re.compile(r"\$\(([A-Za-z_][\w.]*)\)")
+_WILDCARD = re.compile(r"[*?]")
+
+# What the .NET SDK leaves out of its default **/*.cs glob.
+_DEFAULT_EXCLUDES = ("bin/**", "obj/**", "**/.*/**")
+
+
+class Project(NamedTuple):
+    name: str
+    path: str  # full path of the .csproj
+    sdk: bool  # SDK-style (default globbing) rather than an explicit file list
+    files: Tuple[str, ...]  # full paths of the compiled .cs files, in walk order
+
+
+def _local(tag: str) -> str:
+    # Old-style projects put every element in the msbuild 2003 namespace.
+    return tag.rsplit("}", 1)[-1]
+
+
+def _split_items(spec: str) -> List[str]:
+    return [item.strip().replace("\\", "/") for item in spec.split(";") if item.strip()]
+
+
+def _absolute(project_dir: str, item: str) -> str:
+    return os.path.normpath(os.path.join(project_dir, item)).replace(os.sep, "/")
+
+
+def _glob_regex(project_dir: str, items: List[str]) -> re.Pattern | None:
+    """
+    One regex over absolute posix paths matching any of the MSBuild item
+    specs (relative to project_dir); None when there are none.
+    """
+    if not items:
+        return None
+    return re.compile("|".join(f"(?:{_translate(_absolute(project_dir, item))})" for item in items) + r"\Z")
+
+
+def _expand(project_dir: str, item: str) -> Iterator[str]:
+    """
+    Full paths of the .cs files one Include item names: a plain path, or a
+    glob walked from its last directory without wildcards.
+    """
+    path = _absolute(project_dir, item)
+    if not _WILDCARD.search(path):
+        if path.endswith(".cs") and os.path.isfile(path):
+            yield os.path.normpath(path)
+        return
+    parts = path.split("/")
+    fixed = next(i for i, part in enumerate(parts) if _WILDCARD.search(part))
+    base = "/".join(parts[:fixed]) or "/"
+    if not os.path.isdir(base):
+        return
+    rest = re.compile(_translate("/".join(parts[fixed:])) + r"\Z")
+    for full_path, rel_path in iter_source_files(base, use_git=False):
+        if rest.match(rel_path):
+            yield full_path
+
+
+def parse_solution(sln_path: str) -> List[Tuple[str, str]]:
+    """
+    (project name, full .csproj path) for each C# project listed in a .sln.
+    """
+    try:
+        with open(sln_path, encoding="utf-8-sig", errors="replace") as f:
+            text = f.read()
+    except OSError as exc:
+        logger.warning(f"Cannot read solution {sln_path}: {exc}")
+        return []
+    folder = os.path.dirname(sln_path)
+    return [
+        (name, os.path.normpath(os.path.join(folder, rel_path.replace("\\", "/"))))
+        for name, rel_path in _SLN_PROJECT.findall(text)
+    ]
+
+
+def parse_project(csproj_path: str, name: str | None = None) -> Project:
+    """
+    Evaluates the Compile items of one .csproj: the SDK's default **/*.cs
+    glob (unless EnableDefaultCompileItems is false) followed by every
+    Compile Include/Exclude/Remove in document order.
+
+    Conditions are ignored and only properties defined in the file itself
+    (plus the MSBuildProject*/MSBuildThisFile* ones) are substituted; items
+    that still reference an unknown property are skipped.
+    Raises ValueError when the file is not a readable MSBuild project.
+    """
+    try:
+        tree = ET.parse(csproj_path)
+    except (OSError, ET.ParseError) as exc:
+        raise ValueError(f"Cannot read project {csproj_path}: {exc}")
+    root = tree.getroot()
+    project_dir = os.path.dirname(os.path.abspath(csproj_path))
+    name = name or os.path.splitext(os.path.basename(csproj_path))[0]
+
+    sdk = bool(root.get("Sdk")) or any(
+        _local(el.tag) == "Sdk" or (_local(el.tag) == "Import" and el.get("Sdk")) for el in root
+    )
+    properties: Dict[str, str] = {
+        "MSBuildProjectDirectory": project_dir,
+        "MSBuildThisFileDirectory": project_dir + os.sep,
+        "MSBuildProjectName": name,
+        "MSBuildProjectFile": os.path.basename(csproj_path),
+    }
+    for group in root:
+        if _local(group.tag) == "PropertyGroup":
+            for prop in group:
+                properties[_local(prop.tag)] = (prop.text or "").strip()
+
+    def substitute(spec: str | None) -> List[str]:
+        spec = _PROPERTY.sub(lambda m: properties.get(m.group(1), m.group(0)), spec or "")
+        items = _split_items(spec)
+        unresolved = [item for item in items if "$(" in item or "@(" in item]
+        if unresolved:
+            logger.debug(f"{csproj_path}: skipping unresolved items {unresolved}")
+        return [item for item in items if item not in unresolved]
+
+    files: Dict[str, None] = {}
+    enabled = properties.get("EnableDefaultCompileItems", properties.get("EnableDefaultItems", "true"))
+    if sdk and enabled.lower() != "false":
+        excludes = list(_DEFAULT_EXCLUDES)
+        for prop in ("BaseOutputPath", "BaseIntermediateOutputPath"):
+            if properties.get(prop):
+                excludes.append(properties[prop].replace("\\", "/").rstrip("/") + "/**")
+        excludes += substitute(properties.get("DefaultItemExcludes"))
+        exclude = _glob_regex(project_dir, excludes)
+        for full_path in _expand(project_dir, "**/*.cs"):
+            if not exclude.match(full_path.replace(os.sep, "/")):
+                files[full_path] = None
+
+    for group in root:
+        if _local(group.tag) != "ItemGroup":
+            continue
+        for item in group:
+            if _local(item.tag) != "Compile":
+                continue
+            if item.get("Include"):
+                exclude = _glob_regex(project_dir, substitute(item.get("Exclude")))
+                for spec in substitute(item.get("Include")):
+                    for full_path in _expand(project_dir, spec):
+                        if exclude is None or not exclude.match(full_path.replace(os.sep, "/")):
+                            files[full_path] = None
+            elif item.get("Remove"):
+                remove = _glob_regex(project_dir, substitute(item.get("Remove")))
+                if remove is not None:
+                    files = {path: None for path in files if not remove.match(path.replace(os.sep, "/"))}
+
+    return Project(name=name, path=os.path.abspath(csproj_path), sdk=sdk, files=tuple(files))
+
+
+class ProjectCatalog:
+    """
+    The projects found under a root: every .csproj named by a .sln (using
+    the solution's project names) plus any other .csproj in the tree, each
+    with its evaluated file list.
+    """
+
+    def __init__(self, root: str):
+        self.root = str(normalize_path(root))
+        self.solutions: List[str] = []
+        self.projects: List[Project] = []
+        self.built_at: float | None = None
+        self._stamps: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _stamp(self, path: str) -> int:
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return -1
+
+    def stale(self) -> bool:
+        if self.built_at is None or time.monotonic() - self.built_at > PROJECT_CACHE_SECONDS:
+            return True
+        return any(self._stamp(path) != stamp for path, stamp in self._stamps.items())
+
+    def build(self) -> "ProjectCatalog":
+        started = time.perf_counter()
+        solutions, csprojs = [], []
+        for full_path, _ in iter_source_files(self.root, use_git=False, extensions=(".sln", ".csproj")):
+            (solutions if full_path.endswith(".sln") else csprojs).append(full_path)
+
+        names: Dict[str, str] = {}
+        for sln in solutions:
+            for name, csproj in parse_solution(sln):
+                if os.path.isfile(csproj):
+                    names.setdefault(os.path.normcase(csproj), name)
+                    if csproj not in csprojs:
+                        csprojs.append(csproj)
+
+        projects = []
+        for csproj in csprojs:
+            try:
+                projects.append(parse_project(csproj, names.get(os.path.normcase(csproj))))
+            except ValueError as exc:
+                logger.warning(str(exc))
+
+        with self._lock:
+            self.solutions = solutions
+            self.projects = projects
+            self._stamps = {path: self._stamp(path) for path in solutions + csprojs}
+            self.built_at = time.monotonic()
+        logger.info(
+            f"Discovered {len(projects)} projects in {len(solutions)} solutions under {self.root} "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
+        return self
+
+    def find(self, project: str) -> Project:
+        """
+        The project named project (case-insensitive), or whose .csproj is at
+        that path (absolute or relative to the root).
+        Raises LookupError when there is no such project or the name is ambiguous.
+        """
+        wanted = project.strip()
+        as_path = os.path.normcase(os.path.normpath(os.path.join(self.root, wanted)))
+        matches = [
+            p for p in self.projects
+            if p.name.lower() == wanted.lower() or os.path.normcase(p.path) == as_path
+        ]
+        if not matches:
+            known = ", ".join(sorted(p.name for p in self.projects)) or "none"
+            raise LookupError(f"Project not found: {project} (known: {known})")
+        if len(matches) > 1:
+            paths = ", ".join(os.path.relpath(p.path, self.root) for p in matches)
+            raise LookupError(f"Project name {project} is ambiguous: {paths}; give the .csproj path instead")
+        return matches[0]
+
+    def files(self, project: str) -> List[Tuple[str, str]]:
+        """
+        (full_path, relative_posix_path) for the files compiled into project,
+        relative to the root where possible, in walk order.
+        """
+        entries = []
+        for full_path in self.find(project).files:
+            relative = os.path.relpath(full_path, self.root)
+            entries.append((full_path, full_path if relative.startswith("..") else relative.replace(os.sep, "/")))
+        entries.sort(key=lambda entry: (entry[1].startswith("/"), _walk_key(entry[1])))
+        return entries
+
+
+_catalogs: Dict[str, ProjectCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_project_catalog(root: str, refresh: bool = False) -> ProjectCatalog:
+    """
+    Returns the shared catalog for root, rebuilding it when asked, when a
+    .sln/.csproj changed, or after PROJECT_CACHE_SECONDS.
+    """
+    key = str(normalize_path(root))
+    with _catalogs_lock:
+        catalog = _catalogs.get(key)
+        if catalog is None:
+            catalog = _catalogs[key] = ProjectCatalog(key)
+    if refresh or catalog.stale():
+        catalog.build()
+    return catalog
+
+
+def list_projects(folder_path: str, refresh: bool = False) -> ProjectListResponse:
+    """
+    Solutions and projects under folder_path, paths relative to it.
+    """
+    path = normalize_path(folder_path)
+    if not path.is_dir():
+        raise ValueError(f"Folder not found: {folder_path}")
+    catalog = get_project_catalog(str(path), refresh=refresh)
+    return ProjectListResponse(
+        solutions=[os.path.relpath(sln, catalog.root).replace(os.sep, "/") for sln in catalog.solutions],
+        projects=[
+            ProjectInfo(
+                name=project.name,
+                path=os.path.relpath(project.path, catalog.root).replace(os.sep, "/"),
+                sdk=project.sdk,
+                files=len(project.files),
+            )
+            for project in catalog.projects
+        ],
+    )
@@ -0,0 +1,146 @@
+# core/reader.py
+import codecs
+import mmap
+import os
+from typing import Union
+
+from .utils import logger
+
+# Files above this size are handled according to LARGE_FILE_POLICY:
+#   skip   - report an error instead of parsing
+#   head   - parse only the first MAX_SOURCE_BYTES (cut back to a line break)
+#   stream - parse everything, dropping pages already scanned from the mapping
+MAX_SOURCE_BYTES = int(os.environ.get("MERMAID_MAX_FILE_BYTES", str(8 * 1024 * 1024)))
+LARGE_FILE_POLICY = os.environ.get("MERMAID_LARGE_FILE_POLICY", "stream").lower()
+LARGE_FILE_POLICIES = ("skip", "head", "stream")
+
+# Below this size a plain read() is cheaper than setting up a mapping.
+MMAP_MIN_BYTES = 64 * 1024
+# How far behind the scan position "stream" keeps pages mapped.
+RELEASE_MARGIN = 1024 * 1024
+
+_BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32-le"),
+    (codecs.BOM_UTF32_BE, "utf-32-be"),
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+)
+
+Source = Union[str, bytes, mmap.mmap]
+
+
+def sniff_encoding(head: bytes) -> tuple:
+    """
+    (encoding, bom length) from the first bytes of a file. Without a BOM,
+    UTF-16 is recognised by its NUL high bytes; anything else is treated as
+    an ASCII superset (UTF-8, with a cp1252 fallback when decoding names).
+    """
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            return encoding, len(bom)
+    if len(head) >= 4:
+        if head[1] == 0 and head[3] == 0 and head[0] and head[2]:
+            return "utf-16-le", 0
+        if head[0] == 0 and head[2] == 0 and head[1] and head[3]:
+            return "utf-16-be", 0
+    return "utf-8", 0
+
+
+class SourceBuffer:
+    """
+    Contents of one source file ready for core.parser.scan_declarations.
+
+    ASCII-compatible files are scanned as bytes straight from the page cache
+    (a read-only mmap, or a read() for small files) with no decoded copy;
+    only UTF-16/32 files are decoded to str. The scanner reads data between
+    offset (past any BOM) and end.
+    Use as a context manager so the mapping is closed promptly.
+    """
+
+    def __init__(self, file_path: str, max_bytes: int | None = None, policy: str | None = None):
+        self.path = file_path
+        self.max_bytes = MAX_SOURCE_BYTES if max_bytes is None else max_bytes
+        self.policy = (policy or LARGE_FILE_POLICY).lower()
+        if self.policy not in LARGE_FILE_POLICIES:
+            raise ValueError(f"Unknown large file policy: {self.policy}")
+        self.data: Source = b""
+        self.encoding = "utf-8"
+        self.offset = 0
+        self.size = 0
+        self.end = 0
+        self.truncated = False
+        self.streaming = False
+        self._map: mmap.mmap | None = None
+        self._released = 0
+        self._open()
+
+    def _open(self) -> None:
+        if not os.path.isfile(self.path):
+            raise ValueError(f"Not a file: {self.path}")
+        try:
+            with open(self.path, "rb") as f:
+                self.size = os.fstat(f.fileno()).st_size
+                length = self.size
+                if self.size > self.max_bytes:
+                    if self.policy == "skip":
+                        raise ValueError(f"File too large ({self.size} bytes > {self.max_bytes}): {self.path}")
+                    if self.policy == "head":
+                        length = self.max_bytes
+                        self.truncated = True
+                    else:
+                        self.streaming = True
+                    logger.info(f"Large file {self.path} ({self.size} bytes), policy {self.policy}")
+                if length == 0:
+                    return
+                if length < MMAP_MIN_BYTES:
+                    data = f.read(length)
+                else:
+                    data = self._map = mmap.mmap(f.fileno(), length, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Cannot read file: {e}")
+
+        self.encoding, self.offset = sniff_encoding(data[:4])
+        if self.encoding.startswith(("utf-16", "utf-32")):
+            # Not ASCII-compatible: the only case that needs a decoded copy.
+            text = data[self.offset:]
+            if self.truncated:
+                text = text[:len(text) - len(text) % 4]
+            self.data = bytes(text).decode(self.encoding, errors="replace")
+            self.offset = 0
+            self.end = len(self.data)
+            self.close()
+            return
+        self.data = data
+        self.end = len(data)
+        if self.truncated:
+            # Do not hand the scanner half a line.
+            cut = data.rfind(b"\n")
+            if cut > self.offset:
+                self.end = cut + 1
+
+    def release(self, position: int) -> None:
+        """
+        Drops mapped pages well behind position from this process's resident
+        set ("stream" policy only). They are re-read from the page cache if the
+        scanner ever looks back that far, so this never changes the result.
+        """
+        if self._map is None or not self.streaming or not hasattr(mmap, "MADV_DONTNEED"):
+            return
+        upto = (position - RELEASE_MARGIN) // mmap.PAGESIZE * mmap.PAGESIZE
+        if upto > self._released:
+            self._map.madvise(mmap.MADV_DONTNEED, self._released, upto - self._released)
+            self._released = upto
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def __enter__(self) -> "SourceBuffer":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -8,8 +8,12 @@ logger = logging.getLogger("mermaid-csharp")
 def normalize_path(requested_path: str) -> pathlib.Path:
     return pathlib.Path(os.path.expanduser(requested_path)).resolve()
 
+_GENERICS_PATTERN = re.compile(r"<([^>]+)>")
+_COMMENTS_PATTERN = re.compile(r"(?:\/\/[^\n]*|[/][*]([^*/]+|[^*][/]|[*])*[*][/])")
+
 def _strip_generics(name: str) -> str:
-    return re.sub(r"<([^>]+)>", r"~\g<1>~", name.strip() if name else "")
+    name = name.strip() if name else ""
+    return _GENERICS_PATTERN.sub(r"~\g<1>~", name) if "<" in name else name
 
 def _strip_comments(token: str) -> str:
-    return re.sub(r"(?:\/\/[^\n]*|[/][*]([^*/]+|[^*][/]|[*])*[*][/])","", token) if token else token
\ No newline at end of file
+    return _COMMENTS_PATTERN.sub("", token) if token and "/" in token else token
\ No newline at end of file
@@ -0,0 +1,303 @@
+# core/walker.py
+# Enumerates the .cs files under a root without descending into build output,
+# VCS metadata or anything the project's ignore files exclude.
+import os
+import re
+import shutil
+import subprocess
+from typing import Callable, Iterable, Iterator, List, Tuple
+
+from .utils import logger
+
+# Directory names never descended into, wherever they appear under a root.
+SKIP_DIRS = frozenset(
+    name.strip()
+    for name in os.environ.get(
+        "MERMAID_SKIP_DIRS", "obj,bin,.git,.vs,.idea,node_modules,Library,Temp,Logs,packages",
+    ).split(",")
+    if name.strip()
+)
+# Extra gitignore-style patterns applied to every root, comma separated.
+IGNORE_PATTERNS = [p.strip() for p in os.environ.get("MERMAID_IGNORE", "").split(",") if p.strip()]
+# Per-directory ignore files read while walking (gitignore syntax).
+IGNORE_FILES = [p.strip() for p in os.environ.get("MERMAID_IGNORE_FILES", ".gitignore,.mermaidignore").split(",") if p.strip()]
+# auto: list files with `git ls-files` when the root is inside a work tree
+# and git is installed; 1: same, but warn when git is unavailable; 0: never.
+GIT_LS_FILES = os.environ.get("MERMAID_GIT_LS_FILES", "auto").lower()
+GIT_TIMEOUT = 30
+
+
+def is_source_name(name: str) -> bool:
+    """
+    True for hand-written C# sources (generated .g.cs files are skipped).
+    """
+    return name.endswith(".cs") and not name.endswith(".g.cs")
+
+
+def _translate(pattern: str) -> str:
+    """
+    Regex source for one gitignore glob: * and ? stay within a path segment,
+    ** spans segments, [...] is a character class.
+    """
+    out = []
+    i = 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+            continue
+        if ch == "*":
+            out.append("[^/]*")
+        elif ch == "?":
+            out.append("[^/]")
+        elif ch == "[":
+            close = pattern.find("]", i + 2)
+            if close == -1:
+                out.append(re.escape(ch))
+            else:
+                body = pattern[i + 1:close].replace("\\", "\\\\")
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = close
+        elif ch == "\\" and i + 1 < len(pattern):
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(ch))
+        i += 1
+    return "".join(out)
+
+
+class IgnoreRules:
+    """
+    An ordered list of gitignore-style rules. Later rules win, "!" re-includes,
+    a trailing "/" restricts a rule to directories, and a rule containing a
+    "/" is anchored to the directory of the file that declared it.
+    """
+
+    def __init__(self, rules: List[Tuple[re.Pattern, bool, bool]] | None = None):
+        self.rules = rules or []  # (regex over the root-relative path, negate, dir_only)
+
+    def extend(self, lines: Iterable[str], base: str = "") -> "IgnoreRules":
+        """
+        A copy with lines appended; base is the declaring directory relative to the root.
+        """
+        rules = list(self.rules)
+        prefix = re.escape(f"{base}/") if base else ""
+        for line in lines:
+            line = line.rstrip("\n").rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            if "/" in line:
+                regex = prefix + _translate(line.lstrip("/"))
+            else:
+                regex = prefix + "(?:.*/)?" + _translate(line)
+            rules.append((re.compile(f"^{regex}$", re.DOTALL), negate, dir_only))
+        return IgnoreRules(rules)
+
+    def ignored(self, rel_path: str, is_dir: bool) -> bool:
+        result = False
+        for regex, negate, dir_only in self.rules:
+            if (is_dir or not dir_only) and regex.match(rel_path):
+                result = not negate
+        return result
+
+    def __bool__(self) -> bool:
+        return bool(self.rules)
+
+
+class WalkStats:
+    """
+    Counters for one enumeration: directories entered, directories pruned
+    (skip list or ignore rules), source files yielded and source files ignored.
+    """
+    __slots__ = ("directories", "pruned", "files", "ignored", "mode")
+
+    def __init__(self):
+        self.directories = 0
+        self.pruned = 0
+        self.files = 0
+        self.ignored = 0
+        self.mode = "scandir"
+
+
+def _read_ignore_files(folder: str, names: List[str] = IGNORE_FILES) -> List[str]:
+    lines: List[str] = []
+    for name in names:
+        try:
+            with open(os.path.join(folder, name), encoding="utf-8", errors="replace") as f:
+                lines.extend(f)
+        except OSError:
+            continue
+    return lines
+
+
+def _walk_key(rel_path: str) -> tuple:
+    """
+    Sort key giving the order of iter_source_files' scandir walk: per
+    directory, its files by name, then its subdirectories by name.
+    """
+    parts = rel_path.split("/")
+    return tuple((1, part) for part in parts[:-1]) + ((0, parts[-1]),)
+
+
+def git_ls_files(root: str, extensions: Tuple[str, ...] = (".cs",)) -> List[str] | None:
+    """
+    Root-relative paths of the tracked and untracked-but-not-ignored files
+    with one of extensions under root, or None when root is not in a git
+    work tree or git is not available.
+    """
+    if shutil.which("git") is None:
+        if GIT_LS_FILES != "auto":
+            logger.warning("MERMAID_GIT_LS_FILES is set but git is not installed; walking the tree instead")
+        return None
+    try:
+        result = subprocess.run(
+            ["git", "-C", root, "ls-files", "-z", "--cached", "--others", "--exclude-standard", "--", *(f"*{ext}" for ext in extensions)],
+            capture_output=True,
+            timeout=GIT_TIMEOUT,
+        )
+    except (OSError, subprocess.TimeoutExpired) as exc:
+        logger.warning(f"git ls-files failed in {root}: {exc}")
+        return None
+    if result.returncode != 0:
+        if GIT_LS_FILES != "auto":
+            logger.warning(f"git ls-files failed in {root}: {result.stderr.decode(errors='replace').strip()}")
+        return None
+    return [path for path in dict.fromkeys(os.fsdecode(p) for p in result.stdout.split(b"\0")) if path]
+
+
+def _iter_git(
+    root: str,
+    paths: List[str],
+    rules: IgnoreRules,
+    stats: WalkStats,
+    accept: Callable[[str], bool],
+) -> Iterator[Tuple[str, str]]:
+    # git has applied .gitignore already; the other ignore files are read
+    # once per directory that still holds a candidate.
+    stats.mode = "git"
+    extra_files = [name for name in IGNORE_FILES if name != ".gitignore"]
+    folder_rules = {"": rules.extend(_read_ignore_files(root, extra_files))}
+
+    def rules_for(rel_folder: str) -> IgnoreRules | None:
+        if rel_folder not in folder_rules:
+            parent = rel_folder.rpartition("/")[0]
+            inherited = rules_for(parent)
+            if inherited is None or inherited.ignored(rel_folder, True):
+                folder_rules[rel_folder] = None
+                stats.pruned += 1
+            else:
+                stats.directories += 1
+                lines = _read_ignore_files(os.path.join(root, rel_folder), extra_files)
+                folder_rules[rel_folder] = inherited.extend(lines, rel_folder) if lines else inherited
+        return folder_rules[rel_folder]
+
+    stats.directories += 1
+    for rel_path in sorted(paths, key=_walk_key):
+        parts = rel_path.split("/")
+        if not accept(parts[-1]):
+            continue
+        if SKIP_DIRS.intersection(parts[:-1]):
+            stats.ignored += 1
+            continue
+        rules = rules_for("/".join(parts[:-1]))
+        if rules is None or rules.ignored(rel_path, False):
+            stats.ignored += 1
+            continue
+        full_path = os.path.join(root, *parts)
+        if not os.path.isfile(full_path):
+            continue  # deleted from the work tree but still in the index
+        stats.files += 1
+        yield full_path, rel_path
+
+
+def _iter_scandir(
+    root: str,
+    rules: IgnoreRules,
+    stats: WalkStats,
+    accept: Callable[[str], bool],
+) -> Iterator[Tuple[str, str]]:
+    # Depth-first, files before subdirectories, both by name; an explicit
+    # stack of (folder, relative folder, rules in force) instead of recursion.
+    stack = [(root, "", rules)]
+    while stack:
+        folder, rel_folder, rules = stack.pop()
+        stats.directories += 1
+        lines = _read_ignore_files(folder)
+        if lines:
+            rules = rules.extend(lines, rel_folder)
+        try:
+            with os.scandir(folder) as entries:
+                entries = sorted(entries, key=lambda entry: entry.name)
+        except OSError as exc:
+            logger.warning(f"Cannot list {folder}: {exc}")
+            continue
+
+        subdirs = []
+        for entry in entries:
+            rel_path = f"{rel_folder}/{entry.name}" if rel_folder else entry.name
+            try:
+                is_dir = entry.is_dir()
+                if is_dir and entry.is_symlink():
+                    continue  # like os.walk, never follow directory links (a/loop -> .. would never end)
+            except OSError:
+                continue
+            if is_dir:
+                if entry.name in SKIP_DIRS or (rules and rules.ignored(rel_path, True)):
+                    stats.pruned += 1
+                else:
+                    subdirs.append((entry.path, rel_path, rules))
+            elif accept(entry.name):
+                if rules and rules.ignored(rel_path, False):
+                    stats.ignored += 1
+                    continue
+                stats.files += 1
+                yield entry.path, rel_path
+        stack.extend(reversed(subdirs))
+
+
+def iter_source_files(
+    root: str,
+    stats: WalkStats | None = None,
+    use_git: bool | None = None,
+    extensions: Tuple[str, ...] = (".cs",),
+) -> Iterator[Tuple[str, str]]:
+    """
+    Yields (full_path, relative_posix_path) for each .cs source (or, with
+    extensions, each file ending in one of them) under root, lazily and in
+    a stable order: per directory, files by name, then subdirectories by name.
+
+    SKIP_DIRS and rule-matched directories are pruned before they are opened.
+    Rules come from IGNORE_PATTERNS plus the IGNORE_FILES found on the way
+    down. When use_git (default: GIT_LS_FILES) and root is in a git work
+    tree, `git ls-files` supplies the list instead of a directory walk, so
+    .gitignore is applied by git itself.
+    """
+    stats = stats if stats is not None else WalkStats()
+    rules = IgnoreRules().extend(IGNORE_PATTERNS)
+    if use_git is None:
+        use_git = GIT_LS_FILES not in ("0", "false", "no", "off")
+    if extensions == (".cs",):
+        accept = is_source_name
+    else:
+        def accept(name: str) -> bool:
+            return name.endswith(extensions) and not name.endswith(".g.cs")
+    paths = git_ls_files(root, extensions) if use_git else None
+    if paths is not None:
+        yield from _iter_git(root, paths, rules, stats, accept)
+    else:
+        yield from _iter_scandir(root, rules, stats, accept)
@@ -0,0 +1,194 @@
+# core/watcher.py
+import os
+import threading
+import time
+from typing import Iterable, List, Set
+
+from .index import TypeIndex, get_type_index
+from .processor import is_source_file, iter_cs_files, render_files
+from .utils import normalize_path, logger
+from .walker import SKIP_DIRS
+
+try:
+    # Installed with uvicorn[standard]; uses inotify on Linux.
+    import watchfiles
+except ImportError:
+    watchfiles = None
+
+
+def _is_relevant(path: str, roots: List[str]) -> bool:
+    """
+    True for .cs sources under a root, and for folders and paths that no
+    longer exist there: a folder deleted or renamed in one step reports only
+    its own path, never the files it held.
+    """
+    for root in roots:
+        if path.startswith(root + os.sep):
+            rel_path = path[len(root) + 1:]
+            if is_source_file(os.path.dirname(rel_path), os.path.basename(rel_path)):
+                return True
+            return not SKIP_DIRS.intersection(rel_path.split(os.sep)) and not os.path.isfile(path)
+    return False
+
+
+class WorkspaceWatcher:
+    """
+    Background thread that warms the diagram cache and type index for each
+    root at startup, then re-parses only the .cs files that change.
+
+    Native events come from watchfiles (inotify); bind mounts that never
+    deliver events (e.g. Windows drives under WSL) can use polling instead,
+    which re-stats the tree every poll_interval seconds.
+    """
+
+    def __init__(
+        self,
+        roots: Iterable[str],
+        debounce_ms: int = 500,
+        poll_interval: float = 2.0,
+        force_polling: bool = False,
+    ):
+        self.roots = [str(normalize_path(root)) for root in roots]
+        self.debounce_ms = debounce_ms
+        self.poll_interval = poll_interval
+        self.mode = "polling" if force_polling or watchfiles is None else "native"
+        self.events = 0
+        self.reparsed = 0
+        self.ready = False
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._indexes: List[TypeIndex] = []
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="mermaid-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        try:
+            self._warm()
+            if self.mode == "native":
+                try:
+                    self._watch_native()
+                except OSError as exc:
+                    logger.warning(f"Native file events unavailable, polling instead: {exc}")
+                    self.mode = "polling"
+            if self.mode == "polling":
+                self._watch_polling()
+        except Exception as exc:
+            logger.error(f"Workspace watcher stopped: {exc}")
+
+    def _warm(self) -> None:
+        started = time.perf_counter()
+        for root in self.roots:
+            if not os.path.isdir(root):
+                logger.warning(f"Not watching missing folder: {root}")
+                continue
+            # Requests keep refreshing the index themselves until the watcher
+            # is live (see _go_live): changes made while warming are not lost.
+            index = get_type_index(root)
+            self._indexes.append(index)
+            paths = [full_path for full_path, _ in iter_cs_files(root)]
+            render_files(paths, include_interfaces=True, include_abstracts=True)
+            self.reparsed += len(paths)
+        self.ready = True
+        logger.info(f"Watcher warmed {self.reparsed} files in {time.perf_counter() - started:.1f}s ({self.mode})")
+
+    def _reparse(self, paths: Set[str]) -> None:
+        """
+        Brings the index and the default-flag diagram cache up to date for paths.
+        Entries for the old contents are keyed by the old stat and age out of the LRU.
+        """
+        existing = []
+        for path in sorted(paths):
+            if os.path.isdir(path):
+                # Created or renamed in: its files sent no events of their own.
+                added = [full_path for full_path, _ in iter_cs_files(path)]
+            else:
+                added = [path] if os.path.isfile(path) else []
+            for index in self._indexes:
+                if path.startswith(index.root + os.sep):
+                    if not os.path.exists(path):
+                        index.remove_file(path)
+                        index.remove_folder(path)
+                    for full_path in added:
+                        index.update_file(full_path)
+            existing.extend(added)
+        if existing:
+            render_files(existing, include_interfaces=True, include_abstracts=True)
+        self.reparsed += len(existing)
+
+    def _go_live(self) -> None:
+        """
+        Called once events are being delivered: catches up with whatever
+        changed during the warm-up, then stops requests refreshing the indexes.
+        """
+        for index in self._indexes:
+            result = index.refresh()
+            if result["paths"]:
+                render_files(result["paths"], include_interfaces=True, include_abstracts=True)
+                self.reparsed += len(result["paths"])
+            index.watched = True
+
+    def _watch_native(self) -> None:
+        roots = [index.root for index in self._indexes]
+        if not roots:
+            return
+        live = False
+        # yield_on_timeout: the first (possibly empty) batch means the
+        # watcher is set up, so the catch-up refresh cannot miss a change.
+        for changes in watchfiles.watch(
+            *roots,
+            watch_filter=lambda _, path: _is_relevant(path, roots),
+            debounce=self.debounce_ms,
+            rust_timeout=max(self.debounce_ms, 1000),
+            yield_on_timeout=True,
+            stop_event=self._stop,
+        ):
+            if not live:
+                self._go_live()
+                live = True
+            if changes:
+                self.events += len(changes)
+                self._reparse({path for _, path in changes})
+
+    def _watch_polling(self) -> None:
+        self._go_live()
+        while not self._stop.wait(self.poll_interval):
+            for index in self._indexes:
+                result = index.refresh()
+                if result["paths"]:
+                    self.events += len(result["paths"])
+                    render_files(result["paths"], include_interfaces=True, include_abstracts=True)
+                    self.reparsed += len(result["paths"])
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "roots": self.roots,
+            "ready": self.ready,
+            "events": self.events,
+            "reparsed": self.reparsed,
+        }
+
+
+def watcher_from_env() -> WorkspaceWatcher | None:
+    """
+    MERMAID_WATCH_ROOTS (comma separated) enables the watcher;
+    MERMAID_WATCH_POLLING=1 forces the polling fallback.
+    """
+    roots = [root.strip() for root in os.environ.get("MERMAID_WATCH_ROOTS", "").split(",") if root.strip()]
+    if not roots:
+        return None
+    return WorkspaceWatcher(
+        roots,
+        debounce_ms=int(os.environ.get("MERMAID_WATCH_DEBOUNCE_MS", "500")),
+        poll_interval=float(os.environ.get("MERMAID_WATCH_POLL_SECONDS", "2")),
+        force_polling=os.environ.get("MERMAID_WATCH_POLLING", "0").lower() in ("1", "true", "yes"),
+    )
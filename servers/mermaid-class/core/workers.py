@@ -0,0 +1,68 @@
+# core/workers.py
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from .utils import logger
+
+EXECUTOR_KINDS = ("process", "thread")
+
+DEFAULT_WORKERS = int(os.environ.get("MERMAID_WORKERS", os.cpu_count() or 1))
+DEFAULT_EXECUTOR = os.environ.get("MERMAID_EXECUTOR", "process")
+# The process pool starts lazily, when the server already runs threads (the
+# watcher, anyio's workers, logging locks); fork()ing such a process can leave
+# a lock held forever in the child. forkserver forks workers from a clean
+# single-threaded helper instead (spawn where forkserver does not exist).
+START_METHOD = os.environ.get(
+    "MERMAID_START_METHOD",
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn",
+)
+
+_executors: dict = {}
+_lock = threading.Lock()
+
+
+def get_executor(kind: str | None = None, workers: int | None = None) -> Executor:
+    """
+    Returns the shared pool for (kind, workers), creating it on first use so
+    every request in this process fans out to the same workers.
+    """
+    kind = kind or DEFAULT_EXECUTOR
+    workers = workers or DEFAULT_WORKERS
+    if kind not in EXECUTOR_KINDS:
+        raise ValueError(f"Unknown executor kind: {kind} (expected one of {EXECUTOR_KINDS})")
+
+    with _lock:
+        executor = _executors.get((kind, workers))
+        if executor is None:
+            logger.info(f"Starting {kind} pool with {workers} workers")
+            if kind == "process":
+                executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context(START_METHOD),
+                )
+            else:
+                executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mermaid-parse")
+            _executors[(kind, workers)] = executor
+        return executor
+
+
+def discard_executor(kind: str | None = None, workers: int | None = None) -> None:
+    """
+    Drops a pool that can no longer accept work (e.g. a worker process died).
+    """
+    kind = kind or DEFAULT_EXECUTOR
+    workers = workers or DEFAULT_WORKERS
+    with _lock:
+        executor = _executors.pop((kind, workers), None)
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_executors() -> None:
+    with _lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -9,23 +9,69 @@ licence: MIT
 """
 from fastapi import FastAPI, Body, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+import json
+import os
+from contextlib import AsyncExitStack, asynccontextmanager
+
 from starlette.requests import Request
-from starlette.responses import StreamingResponse
+from starlette.responses import PlainTextResponse, StreamingResponse
 
 from core import (
     DiagramItem,
     DiagramItemRequest,
     BulkDiagramResponse,
+    BulkDiagramSummary,
     BatchCreateClassDiagramRequest,
+    DiagramBatchRequest,
+    DiagramBatchResponse,
+    ProjectListResponse,
+    TypeDiagramRequest,
+    TypeMembersRequest,
+    TypeMembersResponse,
+    ServiceStats,
+    diagram_cache,
+    result_store,
+    work_limiter,
+    ResponseBudget,
+    build_type_diagram,
+    build_type_members,
+    iter_folder_bulk,
+    list_projects,
+    process_batch,
     process_folder_bulk,
     normalize_path,
-    logger
+    watcher_from_env,
+    metrics,
+    CompressionMiddleware,
+    InstrumentationMiddleware,
+    METRICS_CONTENT_TYPE,
 )
 
+watcher = watcher_from_env()
+
+# MERMAID_MCP_MOUNT=1 also serves the native MCP tools from this process at /mcp,
+# so MCP calls share this app's diagram cache, worker pool and watcher.
+mcp_app = None
+if os.environ.get("MERMAID_MCP_MOUNT", "0").lower() in ("1", "true", "yes"):
+    from fast_mcp_server.main import build_native_server
+    mcp_app = build_native_server().http_app(path="/mcp")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    async with AsyncExitStack() as stack:
+        if mcp_app is not None:
+            await stack.enter_async_context(mcp_app.lifespan(app))
+        if watcher is not None:
+            watcher.start()
+        yield
+        if watcher is not None:
+            watcher.stop()
+
 app = FastAPI(
     title="Mermaid Diagram API",
     version="1.0.0",
     description="Provides mermaid diagrams for C# class source code",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -36,40 +82,84 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    body = await request.body()
-    logger.info(f"→ {request.method} {request.url}")
-    logger.info(f"Headers: {dict(request.headers)}")
-    logger.info(f"Body: {body.decode('utf-8', errors='replace') or ''}")
-
-    response = await call_next(request)
-
-    async def stream():
-        async for chunk in response.body_iterator:
-            yield chunk
-        logger.info(f"← {response.status_code}")
-
-    return StreamingResponse(
-        stream(),
-        status_code=response.status_code,
-        headers=response.headers,
-        media_type=response.media_type,
-    )
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(InstrumentationMiddleware)
 
 @app.post("/bulk_class_diagram", response_model=BulkDiagramResponse)
 async def bulk_class_diagram(data: BatchCreateClassDiagramRequest = Body(...)):
     """
     Creates a list of Mermaid Class Diagrams given a folder path containing c or dotnet code.
     
+    Give project to limit the diagrams to the files compiled into one .csproj under folder_path.
+    max_bytes/max_tokens stop early once the diagrams reach that size, merge returns one deduplicated
+    diagram for all files, and compact drops the padding; all three reduce what a model has to read.
+    Diagrams are outlines (types, inheritance, attributes); use /type_members to expand a type to its members.
+
+    :param data: Request object containing user config parameters
+    :type data: BatchCreateClassDiagramRequest
+    """
+    try:
+        return await work_limiter.run(
+            process_folder_bulk,
+            folder_path=normalize_path(data.folder_path),
+            max_files=data.max_files,
+            include_interfaces=data.include_interfaces,
+            include_abstracts=data.include_abstracts,
+            project=data.project,
+            max_bytes=data.max_bytes,
+            max_tokens=data.max_tokens,
+            merge=data.merge,
+            compact=data.compact,
+        )
+    except LookupError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+
+@app.post("/bulk_class_diagram_stream")
+async def bulk_class_diagram_stream(request: Request, data: BatchCreateClassDiagramRequest = Body(...)):
+    """
+    Streams Mermaid Class Diagrams for a folder path, one record per file as soon as it is produced.
+    Records are NDJSON lines ({"type": "item", "file", "mermaid"}) closed by a
+    {"type": "summary", "processed", "truncated", "total_scanned"} record; send
+    "Accept: text/event-stream" to receive the same records as server-sent events.
+    max_bytes/max_tokens and compact apply as in /bulk_class_diagram; merge does not.
+
     :param data: Request object containing user config parameters
     :type data: BatchCreateClassDiagramRequest
     """
-    return process_folder_bulk(
+    records = work_limiter.iterate(
+        iter_folder_bulk,
         folder_path=normalize_path(data.folder_path),
         max_files=data.max_files,
         include_interfaces=data.include_interfaces,
         include_abstracts=data.include_abstracts,
+        project=data.project,
+        budget=ResponseBudget(data.max_bytes, data.max_tokens) if data.max_bytes or data.max_tokens else None,
+        compact=data.compact,
+    )
+    try:
+        first = await records.__anext__()
+    except (ValueError, LookupError) as exc:
+        await records.aclose()
+        raise HTTPException(status_code=404, detail=str(exc))
+
+    sse = "text/event-stream" in request.headers.get("accept", "")
+
+    async def encode():
+        record = first
+        try:
+            while True:
+                kind = "summary" if isinstance(record, BulkDiagramSummary) else "item"
+                line = json.dumps({"type": kind, **record.model_dump()})
+                yield f"event: {kind}\ndata: {line}\n\n" if sse else f"{line}\n"
+                if kind == "summary":
+                    break
+                record = await records.__anext__()
+        finally:
+            await records.aclose()
+
+    return StreamingResponse(
+        encode(),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
     )
 
 @app.post("/class_diagram", response_model=DiagramItem)
@@ -80,9 +170,107 @@ async def class_diagram(data: DiagramItemRequest = Body(...)):
     :param data: Request object containing user config parameters
     :type data
     """
-    return process_folder_bulk(
+    return await work_limiter.run(
+        process_folder_bulk,
         folder_path=data.path,
         max_files=1,
         include_interfaces=True,
         include_abstracts=True
-    )
\ No newline at end of file
+    )
+
+@app.post("/class_diagram_batch", response_model=DiagramBatchResponse)
+async def class_diagram_batch(data: DiagramBatchRequest = Body(...)):
+    """
+    Creates Mermaid Class Diagrams for a list of files, folders or glob patterns in one call.
+    Relative paths and globs are resolved against root; each path may override include_interfaces/include_abstracts.
+    Files named more than once are parsed once, and a path that fails only fails its own entry.
+
+    :param data: Request object containing user config parameters
+    :type data: DiagramBatchRequest
+    """
+    return await work_limiter.run(
+        process_batch,
+        entries=data.paths,
+        root=data.root or "/workspace/src",
+        max_files=data.max_files or 100,
+        include_interfaces=data.include_interfaces,
+        include_abstracts=data.include_abstracts,
+    )
+
+@app.post("/type_diagram", response_model=DiagramItem)
+async def type_diagram(data: TypeDiagramRequest = Body(...)):
+    """
+    Creates one merged Mermaid Class Diagram across files from the workspace type index.
+    Give type_name for a type and its ancestors/descendants, namespace for every type in a namespace, or neither for the whole project.
+
+    :param data: Request object containing user config parameters
+    :type data: TypeDiagramRequest
+    """
+    try:
+        return await work_limiter.run(
+            build_type_diagram,
+            folder_path=data.folder_path,
+            type_name=data.type_name,
+            namespace=data.namespace,
+            relation=data.relation,
+            depth=data.depth,
+            include_abstracts=data.include_abstracts,
+        )
+    except LookupError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+
+@app.post("/type_members", response_model=TypeMembersResponse)
+async def type_members(data: TypeMembersRequest = Body(...)):
+    """
+    Expands one type to its fields, properties, methods, constructors, events and indexers
+    (visibility, static/abstract markers and types), as a list and as a classDiagram.
+    Only the type's body is read again, using the span recorded by the workspace type index.
+
+    :param data: Request object containing user config parameters
+    :type data: TypeMembersRequest
+    """
+    try:
+        return await work_limiter.run(
+            build_type_members,
+            folder_path=data.folder_path,
+            type_name=data.type_name,
+            file=data.file,
+            include_private=data.include_private,
+        )
+    except (LookupError, ValueError) as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+
+@app.get("/projects", response_model=ProjectListResponse)
+async def projects(folder_path: str = "/workspace/src", refresh: bool = False):
+    """
+    Lists the .sln files and .csproj projects under a folder, with how many .cs files compile into each.
+    Use a project name as "project" in /bulk_class_diagram to scope diagrams to that project.
+    """
+    try:
+        return await work_limiter.run(list_projects, folder_path, refresh=refresh)
+    except ValueError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+
+@app.get("/stats", response_model=ServiceStats)
+async def stats():
+    """
+    Reports diagram cache hit/miss/eviction counters, worker queue depth, watcher state
+    and the shared result store.
+    """
+    return ServiceStats(
+        cache=diagram_cache.stats(),
+        limiter=work_limiter.stats(),
+        watcher=watcher.stats() if watcher is not None else None,
+        store=result_store.stats() if result_store else None,
+    )
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def prometheus_metrics():
+    """
+    Prometheus text exposition of request latency, bytes out and parse timings.
+    """
+    return PlainTextResponse(metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+# Mounted last so every route above takes precedence over the MCP app
+if mcp_app is not None:
+    app.mount("/", mcp_app)
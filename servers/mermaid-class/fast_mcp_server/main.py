@@ -1,21 +1,221 @@
+import os
+import time
+from typing import List
+
 import httpx
 from fastmcp import FastMCP
+from fastmcp.exceptions import ToolError
+
+from core import (
+    BulkDiagramResponse,
+    DiagramBatchEntry,
+    DiagramBatchResponse,
+    DiagramItem,
+    ProjectListResponse,
+    TypeMembersResponse,
+    build_type_diagram,
+    build_type_members,
+    list_projects as discover_projects,
+    logger,
+    normalize_path,
+    process_batch,
+    process_folder_bulk,
+    work_limiter,
+)
 
 # ----------------------------------------------------------------------
 # Server definition
 # ----------------------------------------------------------------------
+# native: tools call core directly in this process (no HTTP hop)
+# proxy:  tools are generated from the OpenAPI container and forwarded to it
+MCP_MODE = os.environ.get("MERMAID_MCP_MODE", "native").lower()
 # Use the service name from docker-compose as hostname
-client = httpx.AsyncClient(base_url="http://mermaid-openapi:8000")
+OPENAPI_URL = os.environ.get("MERMAID_OPENAPI_URL", "http://mermaid-openapi:8000")
 
-# Load the OpenAPI spec synchronously once
-openapi_spec = httpx.get("http://mermaid-openapi:8000/openapi.json").json()
 
-# Create the MCP server
-server = FastMCP.from_openapi(
-    openapi_spec=openapi_spec,
-    client=client,
-    name="My API Server"
-)
+def build_native_server() -> FastMCP:
+    """
+    MCP tools backed by the same core functions, diagram cache and worker
+    pool as the OpenAPI app.
+    """
+    server = FastMCP(name="Mermaid Class Diagrams")
+
+    @server.tool
+    async def bulk_class_diagram(
+        folder_path: str = "/workspace/src",
+        max_files: int = 10,
+        include_interfaces: bool = True,
+        include_abstracts: bool = True,
+        project: str | None = None,
+        max_tokens: int | None = None,
+        merge: bool = False,
+        compact: bool = True,
+    ) -> BulkDiagramResponse | DiagramItem:
+        """
+        Creates a list of Mermaid Class Diagrams given a folder path containing c or dotnet code.
+        Give project (see list_projects) to only include the files compiled into that project.
+        max_tokens stops adding diagrams once that many tokens are used (truncated is then true);
+        merge returns one diagram for all files with repeated classes and edges removed.
+        Diagrams only outline each type; call type_members to see the members of the ones that matter.
+        """
+        try:
+            return await work_limiter.run(
+                process_folder_bulk,
+                folder_path=normalize_path(folder_path),
+                max_files=max(1, min(max_files, 1000)),
+                include_interfaces=include_interfaces,
+                include_abstracts=include_abstracts,
+                project=project,
+                max_tokens=max(64, max_tokens) if max_tokens else None,
+                merge=merge,
+                compact=compact,
+            )
+        except (LookupError, ValueError, RuntimeError) as exc:
+            raise ToolError(str(exc))
+
+    @server.tool
+    async def list_projects(folder_path: str = "/workspace/src") -> ProjectListResponse:
+        """
+        Lists the .sln solutions and .csproj projects under a folder and how many .cs files compile into each.
+        """
+        try:
+            return await work_limiter.run(discover_projects, folder_path)
+        except ValueError as exc:
+            raise ToolError(str(exc))
+
+    @server.tool
+    async def class_diagram(path: str) -> BulkDiagramResponse | DiagramItem:
+        """
+        Creates a single Mermaid Class Diagram given a file path containing c or dotnet code.
+        """
+        try:
+            return await work_limiter.run(
+                process_folder_bulk,
+                folder_path=path,
+                max_files=1,
+                include_interfaces=True,
+                include_abstracts=True,
+            )
+        except (ValueError, RuntimeError) as exc:
+            raise ToolError(str(exc))
+
+    @server.tool
+    async def class_diagram_batch(
+        paths: List[str | DiagramBatchEntry],
+        root: str = "/workspace/src",
+        max_files: int = 100,
+        include_interfaces: bool = True,
+        include_abstracts: bool = True,
+    ) -> DiagramBatchResponse:
+        """
+        Creates Mermaid Class Diagrams for a list of files, folders or glob patterns (e.g. "Models/**/*.cs") in one call.
+        Relative paths are resolved against root. Prefer this over repeated class_diagram calls.
+        """
+        if not paths:
+            raise ToolError("paths must not be empty")
+        try:
+            return await work_limiter.run(
+                process_batch,
+                entries=paths[:500],
+                root=root,
+                max_files=max(1, min(max_files, 1000)),
+                include_interfaces=include_interfaces,
+                include_abstracts=include_abstracts,
+            )
+        except (ValueError, RuntimeError) as exc:
+            raise ToolError(str(exc))
+
+    @server.tool
+    async def type_diagram(
+        folder_path: str = "/workspace/src",
+        type_name: str | None = None,
+        namespace: str | None = None,
+        relation: str = "both",
+        depth: int | None = None,
+        include_abstracts: bool = True,
+    ) -> DiagramItem:
+        """
+        Creates one merged Mermaid Class Diagram across files from the workspace type index.
+        Give type_name for a type and its ancestors/descendants (relation: ancestors, descendants or both),
+        namespace for every type in a namespace, or neither for the whole project.
+        """
+        if relation not in ("ancestors", "descendants", "both"):
+            raise ToolError(f"Unknown relation: {relation}")
+        try:
+            return await work_limiter.run(
+                build_type_diagram,
+                folder_path=folder_path,
+                type_name=type_name,
+                namespace=namespace,
+                relation=relation,
+                depth=depth,
+                include_abstracts=include_abstracts,
+            )
+        except (LookupError, ValueError, RuntimeError) as exc:
+            raise ToolError(str(exc))
+
+    @server.tool
+    async def type_members(
+        type_name: str,
+        folder_path: str = "/workspace/src",
+        file: str | None = None,
+        include_private: bool = True,
+    ) -> TypeMembersResponse:
+        """
+        Expands one type to its fields, properties, methods, constructors, events and indexers,
+        with visibility (+ public, - private, # protected, ~ internal), static ($) and abstract (*) markers and types.
+        Give file (relative to folder_path) to expand only the part of a partial type declared there.
+        """
+        try:
+            return await work_limiter.run(
+                build_type_members,
+                folder_path=folder_path,
+                type_name=type_name,
+                file=file,
+                include_private=include_private,
+            )
+        except (LookupError, ValueError, RuntimeError) as exc:
+            raise ToolError(str(exc))
+
+    return server
+
+
+def load_openapi_spec(base_url: str, attempts: int = 30, delay: float = 2.0) -> dict:
+    """
+    Fetches /openapi.json, waiting for the OpenAPI container to come up
+    instead of failing on the first refused connection.
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            response = httpx.get(f"{base_url}/openapi.json", timeout=5.0)
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPError as exc:
+            if attempt == attempts:
+                raise
+            logger.warning(f"OpenAPI spec not available yet ({exc}), retrying in {delay}s")
+            time.sleep(delay)
+
+
+def build_proxy_server(base_url: str = OPENAPI_URL) -> FastMCP:
+    """
+    The original design: tools generated from the OpenAPI container's spec,
+    each call forwarded to it over HTTP.
+    """
+    client = httpx.AsyncClient(base_url=base_url)
+    return FastMCP.from_openapi(
+        openapi_spec=load_openapi_spec(base_url),
+        client=client,
+        name="My API Server"
+    )
+
+
+def build_server(mode: str = MCP_MODE) -> FastMCP:
+    if mode == "proxy":
+        return build_proxy_server()
+    return build_native_server()
+
 
 if __name__ == "__main__":
+    server = build_server()
     server.run(transport="http", host="0.0.0.0", port=8000)
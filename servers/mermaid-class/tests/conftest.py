@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The service runs from its own directory with core importable at top level,
+# and the shared package (servers/shared) next to it.
+_HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(_HERE, "..", ".."))
+sys.path.insert(0, os.path.join(_HERE, ".."))
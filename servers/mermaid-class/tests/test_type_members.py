@@ -0,0 +1,45 @@
+from core.index import build_type_members
+
+SOURCE = """
+namespace Zoo
+{
+    public abstract class Animal<T> where T : Animal<T>
+    {
+        public int Legs;
+        protected abstract T Clone();
+    }
+
+    public class Dog : Animal<Dog>
+    {
+        private string name;
+        protected override Dog Clone() => new Dog();
+    }
+}
+"""
+
+
+def _diagram_lines(mermaid: str):
+    return [line.strip() for line in mermaid.split("\n")]
+
+
+def test_generic_members_attach_to_class_node(tmp_path):
+    (tmp_path / "Animal.cs").write_text(SOURCE)
+
+    result = build_type_members(str(tmp_path), "Animal")
+
+    lines = _diagram_lines(result.mermaid)
+    assert "class Animal~T~" in lines
+    member_lines = [line for line in lines if " : " in line]
+    assert member_lines == ["Animal~T~ : +int Legs", "Animal~T~ : #Clone()* T"]
+    assert [member.name for member in result.members] == ["Legs", "Clone"]
+
+
+def test_base_edge_uses_declared_generic_node(tmp_path):
+    (tmp_path / "Animal.cs").write_text(SOURCE)
+
+    result = build_type_members(str(tmp_path), "Dog")
+
+    lines = _diagram_lines(result.mermaid)
+    assert "Animal~T~ <|-- Dog" in lines
+    assert "Dog : -string name" in lines
+    assert not any(line.startswith("Animal~Dog~") for line in lines)
@@ -0,0 +1,18 @@
+import os
+
+import pytest
+
+from core.walker import iter_source_files
+
+
+@pytest.mark.skipif(not hasattr(os, "symlink"), reason="symlinks not supported")
+def test_scandir_walk_does_not_follow_directory_links(tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "a" / "Dog.cs").write_text("class Dog {}\n")
+    (tmp_path / "Cat.cs").write_text("class Cat {}\n")
+    os.symlink("..", tmp_path / "a" / "loop")
+    os.symlink(str(tmp_path / "a"), tmp_path / "alias")
+
+    found = [rel_path for _, rel_path in iter_source_files(str(tmp_path), use_git=False)]
+
+    assert found == ["Cat.cs", "a/Dog.cs"]
@@ -0,0 +1,62 @@
+import os
+import shutil
+import time
+
+import pytest
+
+from core import watcher as watcher_module
+from core.index import get_type_index
+from core.watcher import WorkspaceWatcher
+
+
+def _wait_for(condition, timeout: float = 10.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def _types(root) -> set:
+    index = get_type_index(str(root), refresh=False)
+    return {entry.decl.name for entries in index._types.values() for entry in entries}
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    root = tmp_path / "ws"
+    (root / "Animals").mkdir(parents=True)
+    (root / "Animals" / "Dog.cs").write_text("class Dog {}\n")
+    (root / "Cat.cs").write_text("class Cat {}\n")
+    rendered = []
+
+    def render_files(paths, **_):
+        # Stands in for the slow cache warm-up: a file saved meanwhile.
+        if not rendered:
+            (root / "Late.cs").write_text("class Late {}\n")
+        rendered.extend(paths)
+
+    monkeypatch.setattr(watcher_module, "render_files", render_files)
+    return root
+
+
+@pytest.mark.parametrize("polling", [False, True])
+def test_changes_during_warm_up_and_folder_moves_are_indexed(workspace, tmp_path, polling):
+    if not polling and watcher_module.watchfiles is None:
+        pytest.skip("watchfiles not installed")
+    watcher = WorkspaceWatcher([str(workspace)], debounce_ms=50, poll_interval=0.1, force_polling=polling)
+    watcher.start()
+    try:
+        index = get_type_index(str(workspace), refresh=False)
+        assert _wait_for(lambda: index.watched)
+        assert _types(workspace) == {"Cat", "Dog", "Late"}
+
+        shutil.move(str(workspace / "Animals"), str(tmp_path / "Animals"))
+        assert _wait_for(lambda: "Dog" not in _types(workspace))
+
+        shutil.move(str(tmp_path / "Animals"), str(workspace / "Zoo"))
+        assert _wait_for(lambda: "Dog" in _types(workspace))
+        assert {entry.file for entry in index.lookup_current("Dog")} == {"Zoo/Dog.cs"}
+    finally:
+        watcher.stop()
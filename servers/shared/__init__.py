@@ -0,0 +1,4 @@
+# shared/__init__.py
+# Modules used unchanged by both services (mermaid-class and
+# grep-search-container). Each image copies this package next to its own
+# core package; run locally with the servers/ directory on PYTHONPATH.
@@ -0,0 +1,155 @@
+# shared/compression.py
+# gzip/brotli response encoding.
+import os
+import zlib
+from typing import List
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Encodings offered, in order of preference when a client accepts several
+# equally; an empty value turns compression off.
+RESPONSE_COMPRESSION = [
+    name.strip().lower()
+    for name in os.environ.get("RESPONSE_COMPRESSION", "br,gzip").split(",")
+    if name.strip()
+]
+# Complete bodies smaller than this are sent as they are.
+COMPRESS_MIN_BYTES = int(os.environ.get("RESPONSE_COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = 6
+# About gzip -6's CPU cost for a smaller body; higher qualities cost much more.
+BROTLI_QUALITY = 5
+
+# Already compressed, or streams whose readers expect every event unencoded.
+_SKIP_CONTENT_TYPES = ("text/event-stream", "image/", "audio/", "video/", "application/zip", "application/gzip")
+
+
+def available_encodings(preferred: List[str] | None = None) -> List[str]:
+    names = RESPONSE_COMPRESSION if preferred is None else preferred
+    return [name for name in names if name == "gzip" or (name == "br" and brotli is not None)]
+
+
+def choose_encoding(accept_encoding: str, available: List[str]) -> str | None:
+    """
+    The available encoding the Accept-Encoding header rates highest (ties go
+    to the order of available), or None.
+    """
+    ratings = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        ratings[name.strip()] = quality
+    best, best_quality = None, 0.0
+    for name in available:
+        quality = ratings.get(name, ratings.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+
+class _Encoder:
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._zlib = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # 31: gzip container
+
+    def chunk(self, data: bytes, last: bool) -> bytes:
+        """
+        Compressed data, flushed so the client can decode it right away; the
+        stream is closed when last.
+        """
+        if self.encoding == "br":
+            out = self._brotli.process(data)
+            return out + (self._brotli.finish() if last else self._brotli.flush())
+        out = self._zlib.compress(data)
+        return out + self._zlib.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    """
+    Pure ASGI middleware encoding response bodies with brotli (when the
+    brotli package is installed) or gzip, whichever the client prefers.
+    Whole bodies below minimum_size go out untouched; streamed bodies are
+    compressed chunk by chunk and flushed after each one, so NDJSON records
+    still arrive as they are produced.
+    """
+
+    def __init__(self, app, encodings: List[str] | None = None, minimum_size: int | None = None):
+        self.app = app
+        self.encodings = available_encodings(encodings)
+        self.minimum_size = COMPRESS_MIN_BYTES if minimum_size is None else minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.encodings:
+            await self.app(scope, receive, send)
+            return
+        accept = ""
+        for name, value in scope.get("headers", ()):
+            if name == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+        encoding = choose_encoding(accept, self.encodings) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        encoder: _Encoder | None = None
+        passthrough = False
+
+        async def encode_send(message):
+            nonlocal start, encoder, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if encoder is None:
+                headers = start.get("headers", [])
+                content_type = b""
+                encoded = False
+                for name, value in headers:
+                    if name == b"content-type":
+                        content_type = value.lower()
+                    elif name == b"content-encoding":
+                        encoded = True
+                if (
+                    encoded
+                    or content_type.decode("latin-1").startswith(_SKIP_CONTENT_TYPES)
+                    or (not more_body and len(body) < self.minimum_size)
+                ):
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                encoder = _Encoder(encoding)
+                data = encoder.chunk(body, not more_body)
+                headers = [(n, v) for n, v in headers if n not in (b"content-length", b"vary")]
+                vary = [v for n, v in start.get("headers", []) if n == b"vary"]
+                headers.append((b"content-encoding", encoding.encode("ascii")))
+                headers.append((b"vary", b", ".join(vary + [b"Accept-Encoding"])))
+                if not more_body:
+                    headers.append((b"content-length", str(len(data)).encode("ascii")))
+                await send({**start, "headers": headers})
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+                return
+            await send({"type": "http.response.body", "body": encoder.chunk(body, not more_body), "more_body": more_body})
+
+        await self.app(scope, receive, encode_send)
+        if start is not None and encoder is None and not passthrough:
+            # The app finished without sending a body message.
+            await send(start)
@@ -0,0 +1,185 @@
+# shared/store.py
+# Results shared by every worker process and container that mounts the same
+# data volume: one SQLite database in WAL mode.
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from .utils import logger
+
+# Unset or empty keeps results per process only.
+RESULT_STORE_PATH = os.environ.get("RESULT_STORE_PATH", "")
+RESULT_STORE_MAX_BYTES = int(os.environ.get("RESULT_STORE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+# Size is checked (and least recently used rows evicted) every this many writes.
+_EVICT_EVERY = 128
+# Reads refresh a row's access time at most this often, so hits rarely write.
+_TOUCH_SECONDS = 60.0
+_BUSY_TIMEOUT_SECONDS = 5.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed);
+"""
+
+
+class ResultStore:
+    """
+    Byte values keyed by (namespace, key), compressed, bounded by max_bytes
+    with least-recently-used eviction. Each thread of each process opens its
+    own connection; WAL lets readers run alongside the single writer, and a
+    failed or contended write is logged and dropped, never raised.
+    """
+
+    def __init__(self, path: str, max_bytes: int = RESULT_STORE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self.errors = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connect().executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        # A connection must not cross a fork (pool workers start from a copy of this process).
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=_BUSY_TIMEOUT_SECONDS, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def get(self, namespace: str, key: str, max_age: float | None = None) -> bytes | None:
+        """
+        The stored value, or None when missing, older than max_age seconds,
+        or the store is unavailable.
+        """
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT value, created, accessed FROM results WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            ).fetchone()
+            now = time.time()
+            if row is None or (max_age is not None and now - row[1] > max_age):
+                self._count("misses")
+                return None
+            if now - row[2] > _TOUCH_SECONDS:
+                conn.execute(
+                    "UPDATE results SET accessed = ? WHERE namespace = ? AND key = ?",
+                    (now, namespace, key),
+                )
+            value = zlib.decompress(row[0])
+        except (sqlite3.Error, zlib.error) as exc:
+            self._count("errors")
+            logger.warning(f"Result store read failed: {exc}")
+            return None
+        self._count("hits")
+        return value
+
+    def put(self, namespace: str, key: str, value: bytes) -> None:
+        data = zlib.compress(value, 1)
+        now = time.time()
+        try:
+            self._connect().execute(
+                "INSERT OR REPLACE INTO results (namespace, key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?, ?)",
+                (namespace, key, data, len(data), now, now),
+            )
+        except sqlite3.Error as exc:
+            self._count("errors")
+            logger.warning(f"Result store write failed: {exc}")
+            return
+        self._count("writes")
+        if self.writes % _EVICT_EVERY == 0:
+            self.evict()
+
+    def evict(self) -> int:
+        """
+        Deletes least recently used rows until the stored size is under
+        max_bytes (down to 90% of it, so this does not run on every write).
+        """
+        try:
+            conn = self._connect()
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+            if total <= self.max_bytes:
+                return 0
+            target = total - int(self.max_bytes * 0.9)
+            freed = 0
+            rows = conn.execute("SELECT namespace, key, size FROM results ORDER BY accessed").fetchall()
+            doomed = []
+            for namespace, key, size in rows:
+                if freed >= target:
+                    break
+                doomed.append((namespace, key))
+                freed += size
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany("DELETE FROM results WHERE namespace = ? AND key = ?", doomed)
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                conn.execute("ROLLBACK")
+                raise
+            removed = len(doomed)
+        except sqlite3.Error as exc:
+            self._count("errors")
+            logger.warning(f"Result store eviction failed: {exc}")
+            return 0
+        self._count("evictions", removed)
+        logger.info(f"Result store evicted {removed} entries ({freed} bytes)")
+        return removed
+
+    def stats(self) -> dict:
+        try:
+            entries, size = self._connect().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        except sqlite3.Error:
+            entries, size = -1, -1
+        with self._lock:
+            return {
+                "path": self.path,
+                "entries": entries,
+                "bytes": size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "evictions": self.evictions,
+                "errors": self.errors,
+            }
+
+
+def store_from_env() -> ResultStore | None:
+    """
+    The store at RESULT_STORE_PATH, or None when it is unset or cannot be opened.
+    """
+    if not RESULT_STORE_PATH:
+        return None
+    try:
+        return ResultStore(RESULT_STORE_PATH)
+    except (OSError, sqlite3.Error) as exc:
+        logger.warning(f"Result store unavailable ({RESULT_STORE_PATH}): {exc}")
+        return None
+
+
+result_store = store_from_env()
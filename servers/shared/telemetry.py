@@ -0,0 +1,219 @@
+# shared/telemetry.py
+# Request logging and Prometheus-style metrics.
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+from .utils import logger
+
+# Share of requests logged (0 turns request logging off, 1 logs every request)
+# and how much of each logged request body to include.
+REQUEST_LOG_SAMPLE = float(os.environ.get("REQUEST_LOG_SAMPLE", "1"))
+REQUEST_LOG_BODY_BYTES = int(os.environ.get("REQUEST_LOG_BODY_BYTES", "256"))
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}", *self._samples()]
+
+    def _samples(self) -> Iterator[str]:
+        return iter(())
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self) -> Iterator[str]:
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            yield f"{self.name}{_format_labels(self.labels, key)} {value:g}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[Tuple[str, ...], list] = {}  # key -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[i] += 1
+            entry[-2] += value
+            entry[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self) -> Iterator[str]:
+        with self._lock:
+            values = [(key, list(entry)) for key, entry in self._values.items()]
+        for key, entry in values:
+            for bound, count in zip(self.buckets, entry):
+                le = f'le="{bound:g}"'
+                yield f"{self.name}_bucket{_format_labels(self.labels, key, le)} {count}"
+            le = 'le="+Inf"'
+            yield f"{self.name}_bucket{_format_labels(self.labels, key, le)} {entry[-1]}"
+            yield f"{self.name}_sum{_format_labels(self.labels, key)} {entry[-2]:g}"
+            yield f"{self.name}_count{_format_labels(self.labels, key)} {entry[-1]}"
+
+
+class Registry:
+    """
+    Named metrics of this process, rendered in the Prometheus text format.
+    Asking twice for the same name returns the same metric.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name: str, documentation: str, labels: Tuple[str, ...], **options) -> _Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labels, **options)
+            return metric
+
+    def counter(self, name: str, documentation: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self._get(Counter, name, documentation, labels)
+
+    def gauge(self, name: str, documentation: str, labels: Tuple[str, ...] = ()) -> Gauge:
+        return self._get(Gauge, name, documentation, labels)
+
+    def histogram(self, name: str, documentation: str, labels: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, documentation, labels, buckets=buckets)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+
+metrics = Registry()
+
+request_seconds = metrics.histogram(
+    "http_request_duration_seconds", "Time from request start to the last response byte.", ("method", "route", "status"),
+)
+response_bytes = metrics.counter("http_response_bytes_total", "Response body bytes sent.", ("route",))
+requests_in_flight = metrics.gauge("http_requests_in_flight", "Requests currently being served.")
+
+
+class InstrumentationMiddleware:
+    """
+    Pure ASGI middleware recording request latency, status and bytes out.
+    Bodies are never buffered or re-wrapped: the request body is only
+    observed (up to body_bytes) for requests picked for logging, and response
+    messages are passed through untouched, so Content-Length survives.
+    """
+
+    def __init__(self, app, sample_rate: float | None = None, body_bytes: int | None = None, logger=logger):
+        self.app = app
+        self.logger = logger
+        self.sample_rate = REQUEST_LOG_SAMPLE if sample_rate is None else sample_rate
+        self.body_bytes = REQUEST_LOG_BODY_BYTES if body_bytes is None else body_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        root_path = scope.get("root_path", "")
+        status = 500
+        sent = 0
+        logged = self.sample_rate > 0 and (self.sample_rate >= 1 or random.random() < self.sample_rate)
+        body = bytearray() if logged and self.body_bytes > 0 else None
+
+        async def observe_receive():
+            message = await receive()
+            if message["type"] == "http.request" and len(body) < self.body_bytes:
+                body.extend(message.get("body", b"")[:self.body_bytes - len(body)])
+            return message
+
+        async def observe_send(message):
+            nonlocal status, sent
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                sent += len(message.get("body", b""))
+            await send(message)
+
+        requests_in_flight.inc()
+        try:
+            await self.app(scope, observe_receive if body is not None else receive, observe_send)
+        finally:
+            requests_in_flight.dec()
+            elapsed = time.perf_counter() - start
+            route = scope.get("route")
+            if route is not None:
+                label = getattr(route, "path", scope["path"])
+            else:
+                # Mounted apps (the MCP endpoint) leave no route behind, only
+                # a longer root_path: label them by mount prefix, never by the
+                # raw path, so the label set stays bounded.
+                label = scope.get("root_path", "")[len(root_path):] or "unmatched"
+            request_seconds.observe(elapsed, method=scope["method"], route=label, status=status)
+            response_bytes.inc(sent, route=label)
+            if logged:
+                line = f"{scope['method']} {scope['path']} → {status} in {elapsed * 1000:.1f} ms, {sent} bytes"
+                if body:
+                    line += f", body: {body.decode('utf-8', errors='replace')}"
+                self.logger.info(line)
@@ -0,0 +1,250 @@
+"""
+Comment-insensitive diff of the work tree against a revision (HEAD by
+default), followed by the class-diagram delta of each changed .cs file.
+
+Only files whose blob id differs from the revision are looked at (one
+`git diff --raw`); their old contents come from a single `git cat-file
+--batch` stream, and comment stripping, diffing and parsing run on a
+process pool. Blank lines and trailing whitespace are ignored, so changes
+that only touch comments produce no output.
+
+    python tools/strip_comments.py [pathspec ...] [--rev HEAD] [--workers N]
+                                   [--color auto|always|never] [--no-diagram]
+
+tools/strip_comments runs this with its arguments passed through, or acts
+as the "nocomments" textconv from .gitconfig when called with --textconv.
+"""
+import argparse
+import difflib
+import hashlib
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "servers"))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "servers", "mermaid-class"))
+
+from core.parser import _decode, render_declaration, scan_declarations, strip_comments  # noqa: E402
+from core.reader import sniff_encoding  # noqa: E402
+
+NULL_ID = "0" * 40
+# Like git: a NUL in the first 8000 bytes of an unmarked file means binary.
+_BINARY_SNIFF = 8000
+# Below this many changed files the pool costs more than it saves.
+POOL_MIN_FILES = 8
+
+_COLORS = {"meta": "\033[1m", "frag": "\033[36m", "old": "\033[31m", "new": "\033[32m", "reset": "\033[m"}
+
+
+class Change(NamedTuple):
+    path: str
+    old_id: str  # NULL_ID when the file is new
+    new_id: str  # NULL_ID when only the work tree has the new content
+    status: str  # git diff --raw status letter
+
+
+class Comparison(NamedTuple):
+    path: str
+    diff: List[str]  # unified diff lines of the stripped contents; empty if only comments changed
+    removed: List[str]  # diagram lines only in the old version
+    added: List[str]  # diagram lines only in the new version
+    skipped: str | None  # why the file was not compared (binary, unchanged blob)
+
+
+def git(*args: str, cwd: str | None = None) -> bytes:
+    result = subprocess.run(["git", *args], cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise RuntimeError(f"git {' '.join(args)} failed: {result.stderr.decode(errors='replace').strip()}")
+    return result.stdout
+
+
+def changed_files(rev: str, pathspec: List[str], cwd: str) -> List[Change]:
+    """
+    Tracked files whose blob id in the work tree differs from rev, with both ids.
+    """
+    out = git("diff", "--raw", "-z", "--no-renames", "--abbrev=40", rev, "--", *pathspec, cwd=cwd)
+    fields = out.split(b"\0")
+    changes = []
+    for i in range(0, len(fields) - 1, 2):
+        old_mode, new_mode, old_id, new_id, status = fields[i].decode().lstrip(":").split()
+        if "160000" in (old_mode, new_mode):
+            continue  # submodule
+        changes.append(Change(fields[i + 1].decode("utf-8", errors="surrogateescape"), old_id, new_id, status[0]))
+    return changes
+
+
+def read_blobs(ids: List[str], cwd: str) -> Dict[str, bytes]:
+    """
+    Contents of the given blobs through one `git cat-file --batch` process.
+    """
+    wanted = list(dict.fromkeys(i for i in ids if i != NULL_ID))
+    if not wanted:
+        return {}
+    proc = subprocess.Popen(["git", "cat-file", "--batch"], cwd=cwd, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+    def request() -> None:
+        # Written from a thread so neither side blocks on a full pipe.
+        proc.stdin.write("".join(f"{blob_id}\n" for blob_id in wanted).encode("ascii"))
+        proc.stdin.close()
+
+    writer = threading.Thread(target=request, daemon=True)
+    writer.start()
+    blobs = {}
+    for blob_id in wanted:
+        header = proc.stdout.readline().split()
+        if len(header) != 3:
+            raise RuntimeError(f"git cat-file: cannot read {blob_id}: {b' '.join(header).decode(errors='replace')}")
+        size = int(header[2])
+        blobs[blob_id] = proc.stdout.read(size)
+        proc.stdout.read(1)  # trailing newline
+    writer.join()
+    proc.wait()
+    return blobs
+
+
+def blob_id(data: bytes) -> str:
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def to_text(data: bytes) -> str | None:
+    """
+    Decoded file contents (BOM/UTF-16 aware, cp1252 fallback), or None if binary.
+    """
+    encoding, offset = sniff_encoding(data[:4])
+    if encoding.startswith(("utf-16", "utf-32")):
+        return data[offset:].decode(encoding, errors="replace")
+    if b"\0" in data[:_BINARY_SNIFF]:
+        return None
+    return _decode(data[offset:])
+
+
+def significant_lines(text: str) -> List[str]:
+    lines = (line.rstrip() for line in strip_comments(text).splitlines())
+    return [line for line in lines if line]
+
+
+def diagram_lines(text: str) -> List[str]:
+    lines: Dict[str, None] = {}
+    for decl in scan_declarations(text):
+        for line in render_declaration(decl):
+            lines.setdefault(line.strip())
+    return list(lines)
+
+
+def compare(change: Change, old: bytes, root: str, context: int, diagram: bool) -> Comparison:
+    """
+    Runs in a pool worker: reads the work-tree side itself, then strips,
+    diffs and (for .cs files) parses both versions.
+    """
+    path = change.path
+    try:
+        with open(os.path.join(root, path), "rb") as f:
+            new = f.read()
+    except FileNotFoundError:
+        new = b""
+    if change.new_id == NULL_ID and change.old_id != NULL_ID and blob_id(new) == change.old_id:
+        return Comparison(path, [], [], [], "unchanged")
+
+    old_text, new_text = to_text(old), to_text(new)
+    if old_text is None or new_text is None:
+        return Comparison(path, [], [], [], "binary")
+    old_name = "/dev/null" if change.status == "A" else f"a/{path}"
+    new_name = "/dev/null" if change.status == "D" else f"b/{path}"
+    diff = list(difflib.unified_diff(
+        significant_lines(old_text), significant_lines(new_text), old_name, new_name, n=context, lineterm="",
+    ))
+    removed: List[str] = []
+    added: List[str] = []
+    if diagram and path.endswith(".cs") and diff:
+        old_lines, new_lines = diagram_lines(old_text), diagram_lines(new_text)
+        old_set, new_set = set(old_lines), set(new_lines)
+        removed = [line for line in old_lines if line not in new_set]
+        added = [line for line in new_lines if line not in old_set]
+    return Comparison(path, diff, removed, added, None)
+
+
+def _compare_args(args: Tuple) -> Comparison:
+    return compare(*args)
+
+
+def print_comparison(result: Comparison, color: bool, out) -> None:
+    def paint(kind: str, line: str) -> str:
+        return f"{_COLORS[kind]}{line}{_COLORS['reset']}" if color else line
+
+    out.write(paint("meta", f"diff --git a/{result.path} b/{result.path}") + "\n")
+    for line in result.diff:
+        if line.startswith(("---", "+++")):
+            kind = "meta"
+        elif line.startswith("@@"):
+            kind = "frag"
+        elif line.startswith("-"):
+            kind = "old"
+        elif line.startswith("+"):
+            kind = "new"
+        else:
+            out.write(line + "\n")
+            continue
+        out.write(paint(kind, line) + "\n")
+    if result.removed or result.added:
+        out.write(paint("frag", "@@ classDiagram @@") + "\n")
+        for line in result.removed:
+            out.write(paint("old", f"-{line}") + "\n")
+        for line in result.added:
+            out.write(paint("new", f"+{line}") + "\n")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("pathspec", nargs="*", help="Limit to these paths (git pathspec)")
+    parser.add_argument("--rev", default="HEAD", help="Revision to compare the work tree against")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--context", type=int, default=3, help="Lines of context in each hunk")
+    parser.add_argument("--color", choices=("auto", "always", "never"), default="auto")
+    parser.add_argument("--no-diagram", action="store_true", help="Skip the class-diagram delta")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    try:
+        root = git("rev-parse", "--show-toplevel").decode().strip()
+        # Pathspecs are relative to the current directory; reported paths to root.
+        changes = changed_files(args.rev, args.pathspec, os.getcwd())
+        blobs = read_blobs([change.old_id for change in changes], root)
+    except (OSError, RuntimeError) as exc:
+        print(f"strip_comments: {exc}", file=sys.stderr)
+        return 2
+    work = [
+        (change, blobs.get(change.old_id, b""), root, args.context, not args.no_diagram)
+        for change in changes
+    ]
+    if args.workers > 1 and len(work) >= POOL_MIN_FILES:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            results = list(pool.map(_compare_args, work, chunksize=max(1, len(work) // (args.workers * 4))))
+    else:
+        results = [compare(*item) for item in work]
+
+    color = args.color == "always" or (args.color == "auto" and sys.stdout.isatty())
+    shown = comment_only = skipped = 0
+    for result in results:
+        if result.skipped:
+            skipped += 1
+            if result.skipped == "binary":
+                print(f"Binary file {result.path} changed")
+        elif result.diff:
+            shown += 1
+            print_comparison(result, color, sys.stdout)
+        else:
+            comment_only += 1
+    print(
+        f"{len(changes)} changed files: {shown} with code changes, {comment_only} comments/whitespace only, "
+        f"{skipped} skipped ({time.perf_counter() - started:.2f}s)",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())